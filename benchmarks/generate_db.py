@@ -0,0 +1,134 @@
+# benchmarks/generate_db.py
+
+import sqlite3
+import os
+import sys
+import time
+import random
+import hashlib
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import history, schema, search
+from src.price_fetcher import SYMBOL_TO_ID
+
+# Synthetic CoinTether database with the same schema the app creates:
+# users, admins, user_wallets, user_flags, user_notes and portfolio history.
+#
+#   python benchmarks/generate_db.py bench.db --users 100000 --positions 10
+#
+# Usernames are user000000, user000001, ...; every password is "password" and
+# the admin is bench / bench. The first `history_users` users get `history`
+# minute-spaced points each (packed into blocks the way the app does).
+
+SYMBOLS = sorted(SYMBOL_TO_ID)
+COIN_NAMES = {symbol: coin_id.split("-")[0].title() for symbol, coin_id in SYMBOL_TO_ID.items()}
+PASSWORD_HASH = hashlib.sha256(b"password").hexdigest()
+
+
+def username(i):
+    return f"user{i:06d}"
+
+
+def create_schema(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS admins (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            username TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS user_wallets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            coin_name TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            holdings REAL DEFAULT 0
+        )
+    """)
+    conn.execute("CREATE TABLE IF NOT EXISTS user_flags (username TEXT PRIMARY KEY, suspended INTEGER DEFAULT 0)")
+    conn.execute("CREATE TABLE IF NOT EXISTS user_notes (id INTEGER PRIMARY KEY, username TEXT, note TEXT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)")
+    history.ensure_history_table(conn)
+    schema.ensure_user_links(conn)
+
+
+def generate(path, users=1000, positions=5, notes=1, suspended=0.05, history_users=10, history_points=1000,
+             seed=42, log=print):
+    """Create (or replace) `path` and fill it; returns the row counts written."""
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA synchronous=OFF")
+    try:
+        create_schema(conn)
+        conn.execute("INSERT INTO admins (username, password) VALUES ('bench', ?)", (hashlib.sha256(b"bench").hexdigest(),))
+        conn.executemany(
+            "INSERT INTO users (name, username, email, password) VALUES (?, ?, ?, ?)",
+            ((f"Bench User {i}", username(i), f"{username(i)}@example.com", PASSWORD_HASH) for i in range(users))
+        )
+
+        def wallet_rows():
+            for i in range(users):
+                for k in range(positions):
+                    symbol = SYMBOLS[(i + k) % len(SYMBOLS)] if k < len(SYMBOLS) else rng.choice(SYMBOLS)
+                    yield username(i), COIN_NAMES[symbol], symbol, round(rng.lognormvariate(0, 1.5), 6)
+        conn.executemany("INSERT INTO user_wallets (username, coin_name, symbol, holdings) VALUES (?, ?, ?, ?)", wallet_rows())
+
+        flagged = [(username(i), 1) for i in range(users) if rng.random() < suspended]
+        conn.executemany("INSERT INTO user_flags (username, suspended) VALUES (?, ?)", flagged)
+        conn.executemany(
+            "INSERT INTO user_notes (username, note) VALUES (?, ?)",
+            ((username(i), f"Synthetic note {n} for {username(i)}") for i in range(users) for n in range(notes))
+        )
+
+        now = time.time()
+        written_history = 0
+        for i in range(min(history_users, users)):
+            value, points = 10000.0 * (1 + i), []
+            for p in range(history_points):
+                value *= 1 + rng.gauss(0, 0.002)
+                points.append((username(i), now - 60 * (history_points - p), value))
+            conn.executemany("INSERT INTO portfolio_history (username, ts, value) VALUES (?, ?, ?)", points)
+            history.compact_history(conn, username(i))
+            written_history += len(points)
+        search.ensure_search_index(conn)
+        conn.commit()
+    finally:
+        conn.close()
+    counts = {"users": users, "positions": users * positions, "notes": users * notes,
+              "suspended": len(flagged), "history_points": written_history}
+    log(f"generated {path} in {time.perf_counter() - started:.1f}s: " + ", ".join(f"{k}={v:,}" for k, v in counts.items()))
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic CoinTether database.")
+    parser.add_argument("path")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--positions", type=int, default=5, help="wallet rows per user")
+    parser.add_argument("--notes", type=int, default=1, help="admin notes per user")
+    parser.add_argument("--suspended", type=float, default=0.05, help="fraction of suspended users")
+    parser.add_argument("--history-users", type=int, default=10)
+    parser.add_argument("--history", type=int, default=1000, help="history points per history user")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+    generate(args.path, args.users, args.positions, args.notes, args.suspended, args.history_users, args.history, args.seed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,305 @@
+# benchmarks/run.py
+
+import os
+import sys
+import json
+import math
+import time
+import shutil
+import hashlib
+import platform
+import argparse
+import datetime
+import statistics
+import subprocess
+import tempfile
+
+# Headless benchmark suite. Every scale gets a freshly generated database
+# (benchmarks/generate_db.py); the GUI scenarios run on an offscreen Qt platform,
+# message boxes are answered automatically and prices come from a deterministic
+# local stand-in instead of CoinGecko, so runs are repeatable and offline.
+#
+#   python benchmarks/run.py                          # small + medium
+#   python benchmarks/run.py --scales large --repeat 1
+#   python benchmarks/run.py --compare benchmarks/results/<earlier>.json
+#
+# Results (median/min per scenario and scale, plus the perf span summary) are
+# written to benchmarks/results/<date>-<git rev>.json; --compare flags scenarios
+# whose best run got more than --threshold slower and exits with status 1 if any did.
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ["COINTETHER_PRICE_DAEMON"] = "0"
+os.environ["COINTETHER_WARM_IMPORTS"] = "0"
+
+from benchmarks.generate_db import generate, username
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+SCALES = {
+    "small": dict(users=1000, positions=5, history_users=5, history_points=10000),
+    "medium": dict(users=10000, positions=8, history_users=5, history_points=100000),
+    "large": dict(users=100000, positions=10, history_users=5, history_points=525600),
+}
+BULK_USERS = 10
+FILTER_TEXT = "user00012"
+
+
+def stand_in_prices(symbols):
+    """Deterministic stand-in for price_fetcher.fetch_upstream."""
+    from src import sparklines
+    prices, series = {}, {}
+    for symbol in symbols:
+        symbol = symbol.upper()
+        usd = 1 + int(hashlib.md5(symbol.encode()).hexdigest()[:6], 16) % 50000
+        prices[symbol] = {"usd": float(usd), "inr": usd * 83.0, "image": None}
+        # 168 hourly points drifting around the price, like sparkline_in_7d.
+        series[symbol] = [usd * (1 + 0.05 * math.sin((i + usd) / 12.0)) for i in range(168)]
+    sparklines.store(series)
+    return prices
+
+
+def stand_in_market_page(page, per_page=250):
+    """Deterministic stand-in for price_fetcher.fetch_market_page."""
+    coins = []
+    for n in range((page - 1) * per_page, page * per_page):
+        usd = 1 + int(hashlib.md5(str(n).encode()).hexdigest()[:6], 16) % 50000
+        coins.append({"id": f"bench-coin-{n}", "symbol": f"b{n}", "name": f"Bench Coin {n}", "image": None,
+                      "rank": n + 1, "usd": float(usd), "change_24h": (usd % 200) / 10 - 10,
+                      "market_cap": 1e12 / (n + 1), "volume": usd * 1000.0})
+    return coins
+
+
+def install_stand_ins(db):
+    """Point every module at the benchmark database and stub out network, dialogs and cache writes."""
+    from PyQt5.QtWidgets import QMessageBox, QInputDialog
+    from src import price_fetcher
+    import src.dashboard, src.admin_dashboard, src.user_wallet_viewer, src.add_coin
+    from src import sparklines, markets
+    price_fetcher.fetch_upstream = stand_in_prices
+    price_fetcher.fetch_market_page = stand_in_market_page
+    sparklines.sparklines_path = os.path.join(os.path.dirname(db), "sparklines.db")
+    markets.markets_path = os.path.join(os.path.dirname(db), "markets.db")
+    for module in (src.dashboard, src.admin_dashboard, src.user_wallet_viewer, src.add_coin):
+        if hasattr(module, "db_path"):
+            module.db_path = db
+    src.dashboard.save_price_cache = lambda data: None
+    for name in ("information", "warning", "critical"):
+        setattr(QMessageBox, name, staticmethod(lambda *a, **k: QMessageBox.Ok))
+    QMessageBox.question = staticmethod(lambda *a, **k: QMessageBox.Yes)
+    QInputDialog.getText = staticmethod(lambda *a, **k: ("password", True))
+
+
+# ---------------------- Scenarios ----------------------
+# Each scenario takes the context dict and returns a callable that is timed;
+# setup done outside the callable is not measured.
+def admin_load(ctx):
+    from src.admin_dashboard import AdminDashboard
+    def run():
+        window = AdminDashboard("bench")
+        ctx["app"].processEvents()
+        window.close()
+    return run
+
+
+def admin_filter(ctx):
+    window = ctx["admin"]()
+    def run():
+        for i in range(1, len(FILTER_TEXT) + 1):
+            window.search_bar.setText(FILTER_TEXT[:i])
+            ctx["app"].processEvents()
+        window.search_bar.setText("")
+    return run
+
+
+def admin_bulk(ctx):
+    from PyQt5.QtWidgets import QTableWidgetSelectionRange
+    window = ctx["admin"]()
+    def run():
+        window.table.clearSelection()
+        window.table.setRangeSelected(QTableWidgetSelectionRange(0, 0, BULK_USERS - 1, 4), True)
+        window.batch_suspend()
+        window.table.clearSelection()
+        window.table.setRangeSelected(QTableWidgetSelectionRange(0, 0, BULK_USERS - 1, 4), True)
+        window.batch_unban()
+    return run
+
+
+def dashboard_load(ctx):
+    from src.dashboard import UserDashboard
+    def run():
+        window = UserDashboard(username(0))
+        ctx["app"].processEvents()
+        window.close()
+    return run
+
+
+def dashboard_refresh(ctx):
+    window = ctx["dashboard"]()
+    return lambda: window.refresh_prices()
+
+
+def dashboard_filter(ctx):
+    window = ctx["dashboard"]()
+    def run():
+        for text in ("b", "bi", "bit", "bitc", ""):
+            window.search_bar.setText(text)
+            ctx["app"].processEvents()
+    return run
+
+
+def history_graph(ctx):
+    from src.charts import HistoryChartDialog
+    def run():
+        dialog = HistoryChartDialog(ctx["db"], username(0))
+        dialog.refresh()
+        dialog.canvas.draw()
+    return run
+
+
+def market_explorer(ctx):
+    # Scroll through the top 5,000 coins (from the page cache after the first run), then sort and filter.
+    from PyQt5.QtCore import Qt
+    from src.market_explorer import MarketExplorerDialog
+    def run():
+        dialog = MarketExplorerDialog(set(), lambda coin: True)
+        while dialog.model.canFetchMore() or dialog.model.pending is not None:
+            dialog.model.fetchMore()
+            ctx["app"].processEvents()
+            time.sleep(0.001)
+        dialog.view.sortByColumn(3, Qt.DescendingOrder)
+        dialog.search_bar.setText("coin 4")
+        dialog.close()
+    return run
+
+
+def export_format(fmt):
+    def scenario(ctx):
+        from src import exports
+        path = os.path.join(ctx["tmp"], "export." + fmt)
+        return lambda: exports.export_dataset(path, ctx["db"], "wallets")
+    scenario.__name__ = "export_wallets_" + fmt
+    return scenario
+
+
+SCENARIOS = [admin_load, admin_filter, admin_bulk, dashboard_load, dashboard_refresh, dashboard_filter,
+             history_graph, market_explorer, export_format("csv"), export_format("parquet")]
+
+
+def time_scenario(make, ctx, repeat):
+    from src import perf
+    run = make(ctx)
+    perf.clear()
+    runs = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        runs.append(time.perf_counter() - started)
+    spans = {name: {"count": count, "p50_ms": round(p50, 3), "p95_ms": round(p95, 3)}
+             for name, count, p50, p95, worst, total in perf.summary()}
+    return {"runs": [round(r, 4) for r in runs], "median": round(statistics.median(runs), 4),
+            "min": round(min(runs), 4), "spans": spans}
+
+
+def run_scale(scale, params, repeat, only, log):
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    tmp = tempfile.mkdtemp(prefix=f"cointether-bench-{scale}-")
+    try:
+        db = os.path.join(tmp, "bench.db")
+        generate(db, **params, log=log)
+        install_stand_ins(db)
+        windows = {}
+
+        def lazy(key, factory):
+            def get():
+                if key not in windows:
+                    windows[key] = factory()
+                    app.processEvents()
+                return windows[key]
+            return get
+
+        from src.admin_dashboard import AdminDashboard
+        from src.dashboard import UserDashboard
+        ctx = {"app": app, "db": db, "tmp": tmp,
+               "admin": lazy("admin", lambda: AdminDashboard("bench")),
+               "dashboard": lazy("dashboard", lambda: UserDashboard(username(0)))}
+        results = {}
+        for make in SCENARIOS:
+            if only and make.__name__ not in only:
+                continue
+            results[make.__name__] = time_scenario(make, ctx, repeat)
+            log(f"  {scale:<7} {make.__name__:<22} median {results[make.__name__]['median'] * 1000:9.1f} ms")
+        for window in windows.values():
+            window.close()
+        return results
+    finally:
+        from src import mail_queue
+        for sender in list(mail_queue._senders.values()):
+            sender.stop()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+
+def compare(current, previous_path, threshold, log):
+    with open(previous_path, encoding="utf-8") as f:
+        previous = json.load(f)
+    regressions = []
+    log(f"\nCompared with {previous_path} ({previous['meta'].get('revision')}):")
+    for scale, scenarios in current["results"].items():
+        for name, result in scenarios.items():
+            before = previous["results"].get(scale, {}).get(name)
+            if not before or not before["min"]:
+                continue
+            # Best-of-N is far less noisy than the median on a busy machine.
+            ratio = result["min"] / before["min"]
+            flag = "  REGRESSION" if ratio > 1 + threshold else ""
+            log(f"  {scale:<7} {name:<22} {before['min'] * 1000:9.1f} -> {result['min'] * 1000:9.1f} ms  x{ratio:.2f}{flag}")
+            if flag:
+                regressions.append((scale, name, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the CoinTether benchmark suite.")
+    parser.add_argument("--scales", nargs="+", default=["small", "medium"], help=f"any of {', '.join(SCALES)}")
+    parser.add_argument("--scenarios", nargs="+", help="only these scenarios: " + ", ".join(s.__name__ for s in SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown counted as a regression (0.2 = 20%%)")
+    parser.add_argument("--out", default=RESULTS_DIR)
+    args = parser.parse_args(argv)
+    unknown = [s for s in args.scales if s not in SCALES]
+    if unknown:
+        parser.error(f"unknown scale: {', '.join(unknown)}")
+
+    log = lambda message: print(message, flush=True)
+    current = {
+        "meta": {"revision": git_revision(), "date": datetime.datetime.now().isoformat(timespec="seconds"),
+                 "python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(),
+                 "repeat": args.repeat, "scales": {s: SCALES[s] for s in args.scales}},
+        "results": {},
+    }
+    for scale in args.scales:
+        current["results"][scale] = run_scale(scale, SCALES[scale], args.repeat, args.scenarios, log)
+
+    os.makedirs(args.out, exist_ok=True)
+    path = os.path.join(args.out, f"{datetime.datetime.now():%Y%m%d-%H%M%S}-{current['meta']['revision']}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(current, f, indent=2)
+    log(f"\nResults saved to {path}")
+
+    if args.compare:
+        return 1 if compare(current, args.compare, args.threshold, log) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
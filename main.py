@@ -1,11 +1,37 @@
 # main.py
 
-from PyQt5.QtWidgets import QApplication
 import sys
-from src.welcome_screen import WelcomeScreen
 
 if __name__ == "__main__":
+    # Any command-line command runs headless (see src/cli.py) without importing Qt.
+    from src import cli
+    if len(sys.argv) > 1 and (sys.argv[1] in cli.COMMANDS or sys.argv[1] in ("--db", "--format", "-h", "--help")):
+        sys.exit(cli.main(sys.argv[1:]))
+
+    from src import startup
+
+    # `python main.py --profile-startup` (or COINTETHER_PROFILE_STARTUP=1) prints
+    # per-module import times up to the moment the welcome window is shown.
+    profiler = None
+    if startup.profiling_requested():
+        profiler = startup.ImportProfiler()
+        profiler.start()
+
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QTimer
+    from src.welcome_screen import WelcomeScreen
+
     app = QApplication(sys.argv)
     window = WelcomeScreen()
     window.show()
+
+    def after_first_paint():
+        if profiler:
+            profiler.mark("welcome window shown")
+            profiler.stop()
+            profiler.write_report()
+        if startup.warm_up_enabled():
+            startup.warm_up_in_background()
+
+    QTimer.singleShot(0, after_first_paint)
     sys.exit(app.exec_())
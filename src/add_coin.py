@@ -2,17 +2,13 @@
 
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QLineEdit, QPushButton,
-    QLabel, QMessageBox, QScrollArea, QWidget, QHBoxLayout
+    QLabel, QMessageBox
 )
-from PyQt5.QtGui import QPixmap
-from PyQt5.QtCore import Qt
-import sqlite3
 import os
 import sys
-import requests
-from io import BytesIO
 
-from src.price_fetcher import SYMBOL_TO_ID, fetch_prices
+from src.price_fetcher import register_symbol
+from src import db_writer
 
 def get_database_path():
     if getattr(sys, 'frozen', False):
@@ -28,6 +24,8 @@ class AddCoinDialog(QDialog):
     def __init__(self, username, parent=None):
         super().__init__(parent)
         self.username = username
+        self.added_coin = None
+        self.picked_coin = None
         self.setWindowTitle("Add Coin")
         self.setFixedSize(300, 250)
         self.setup_ui()
@@ -75,58 +73,21 @@ class AddCoinDialog(QDialog):
             return
 
         try:
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            cursor.execute("""
+            wallet_id, _ = db_writer.wait(db_writer.execute(db_path, """
                 INSERT INTO user_wallets (username, coin_name, symbol, holdings)
                 VALUES (?, ?, ?, ?)
-            """, (self.username, coin, symbol, holdings))
-            conn.commit()
-            conn.close()
+            """, (self.username, coin, symbol, holdings)))
+            if self.picked_coin and self.picked_coin["symbol"].upper() == symbol:
+                register_symbol(symbol, self.picked_coin["id"])
+            self.added_coin = (wallet_id, coin, symbol, holdings)
             self.accept()
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to add coin:\n{e}")
 
     def show_supported_coins(self):
-        dialog = QDialog(self)
-        dialog.setWindowTitle("Supported Coins")
-        dialog.setFixedSize(350, 450)
-
-        layout = QVBoxLayout()
-        scroll = QScrollArea()
-        scroll.setWidgetResizable(True)
-        inner = QWidget()
-        inner_layout = QVBoxLayout()
-
-        prices = fetch_prices(list(SYMBOL_TO_ID.keys()))
-        if "error" in prices:
-            QMessageBox.critical(self, "API Error", prices["error"])
-            return
-
-        for symbol in sorted(prices.keys()):
-            coin_info = prices[symbol]
-            coin_name = SYMBOL_TO_ID[symbol].replace("-", " ").title()
-            logo_url = coin_info.get("image", "")
-
-            h_layout = QHBoxLayout()
-
-            if logo_url:
-                try:
-                    response = requests.get(logo_url, timeout=5)
-                    pixmap = QPixmap()
-                    pixmap.loadFromData(response.content)
-                    logo_label = QLabel()
-                    logo_label.setPixmap(pixmap.scaled(32, 32, Qt.KeepAspectRatio, Qt.SmoothTransformation))
-                    h_layout.addWidget(logo_label)
-                except:
-                    h_layout.addWidget(QLabel("❓"))
-
-            h_layout.addWidget(QLabel(f"{symbol} - {coin_name}"))
-            h_layout.addStretch()
-            inner_layout.addLayout(h_layout)
-
-        inner.setLayout(inner_layout)
-        scroll.setWidget(inner)
-        layout.addWidget(scroll)
-        dialog.setLayout(layout)
-        dialog.exec_()
+        from src.coin_browser import SupportedCoinsDialog
+        dialog = SupportedCoinsDialog(self)
+        if dialog.exec_() == QDialog.Accepted and dialog.selected_coin:
+            self.picked_coin = dialog.selected_coin
+            self.coin_name_input.setText(self.picked_coin["name"])
+            self.symbol_input.setText(self.picked_coin["symbol"].upper())
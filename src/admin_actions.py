@@ -0,0 +1,78 @@
+# src/admin_actions.py
+
+import hashlib
+
+from src import schema
+
+# Set-based moderation shared by the admin dashboard and `python main.py admin`.
+# Each function takes an open connection and a list of usernames and issues one
+# executemany per table, so acting on 1,000 users is one transaction rather than
+# 1,000 connect/commit round trips. The caller owns the transaction: the
+# dashboard runs these through db_writer.submit(), the CLI commits itself.
+
+
+def ensure_admin_tables(conn):
+    new = [table for table in ("user_flags", "user_notes") if not schema.table_exists(conn, table)]
+    conn.execute("CREATE TABLE IF NOT EXISTS user_flags (username TEXT PRIMARY KEY, suspended INTEGER DEFAULT 0)")
+    conn.execute("CREATE TABLE IF NOT EXISTS user_notes (id INTEGER PRIMARY KEY, username TEXT, note TEXT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)")
+    schema.link_new_tables(conn, new)
+
+
+def set_suspended(conn, usernames, suspended):
+    """Suspend (True) or unban (False) every user in `usernames`."""
+    ensure_admin_tables(conn)
+    conn.executemany(
+        "INSERT INTO user_flags (username, suspended) VALUES (?, ?) ON CONFLICT(username) DO UPDATE SET suspended = excluded.suspended",
+        [(name, int(suspended)) for name in usernames]
+    )
+    return {name: bool(suspended) for name in usernames}
+
+
+def toggle_suspended(conn, usernames):
+    """Flip each user's flag; returns {username: now_suspended}."""
+    ensure_admin_tables(conn)
+    conn.executemany(
+        "INSERT INTO user_flags (username, suspended) VALUES (?, 1) ON CONFLICT(username) DO UPDATE SET suspended = 1 - COALESCE(suspended, 0)",
+        [(name,) for name in usernames]
+    )
+    return suspension_status(conn, usernames)
+
+
+def suspension_status(conn, usernames):
+    status = {name: False for name in usernames}
+    for i in range(0, len(usernames), 500):
+        chunk = usernames[i:i + 500]
+        rows = conn.execute(
+            f"SELECT username, suspended FROM user_flags WHERE username IN ({','.join('?' * len(chunk))})", chunk
+        ).fetchall()
+        status.update((name, bool(flag)) for name, flag in rows)
+    return status
+
+
+def delete_users(conn, usernames):
+    """Remove the accounts and everything stored for them (see src/schema.py)."""
+    ensure_admin_tables(conn)
+    users = [(name,) for name in usernames]
+    if not schema.foreign_keys_enabled(conn):
+        # No cascade on this connection: clear the child rows through the user_id index first.
+        present = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        for table in schema.USER_TABLES:
+            if table in present:
+                conn.executemany(f"DELETE FROM {table} WHERE user_id = (SELECT id FROM users WHERE username = ?)", users)
+    conn.executemany("DELETE FROM users WHERE username=?", users)
+    return len(usernames)
+
+
+def hash_password(password):
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def reset_passwords(conn, usernames, password):
+    conn.executemany("UPDATE users SET password=? WHERE username=?", [(hash_password(password), name) for name in usernames])
+    return len(usernames)
+
+
+def add_notes(conn, usernames, note):
+    ensure_admin_tables(conn)
+    conn.executemany("INSERT INTO user_notes (username, note) VALUES (?, ?)", [(name, note) for name in usernames])
+    return len(usernames)
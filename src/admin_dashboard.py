@@ -3,14 +3,13 @@
 from PyQt5.QtWidgets import (
     QWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, QMessageBox,
     QTableWidget, QTableWidgetItem, QDialog, QTextEdit, QInputDialog,
-    QLineEdit, QHeaderView, QAbstractItemView, QFileDialog
+    QLineEdit, QHeaderView, QAbstractItemView, QFileDialog, QStyledItemDelegate, QMenu
 )
 from PyQt5.QtGui import QPixmap, QIcon
-from PyQt5.QtCore import Qt
-import os, sqlite3, hashlib, csv, datetime
-from fpdf import FPDF
+from PyQt5.QtCore import Qt, QTimer
+import os, sqlite3, hashlib, functools, bisect
 
-from src.user_wallet_viewer import UserWalletViewer
+from src import perf, db_writer, admin_actions, audit, search
 
 def get_database_path():
     import sys
@@ -22,16 +21,42 @@ def get_database_path():
 
 db_path = get_database_path()
 
+VALUE_COLUMN = 2
+SEARCH_INDEX_TIMEOUT = 300   # seconds to wait for the first FTS build before giving up
+
+def report_audit_failure(action, future):
+    # Runs on the writer thread; stderr is all it can safely touch.
+    import sys
+    error = future.exception()
+    if error is not None:
+        print(f"Audit log write for '{action}' failed: {error}", file=sys.stderr)
+
+class MoneyDelegate(QStyledItemDelegate):
+    # Value cells hold floats so Qt sorts them numerically; this only formats them for display.
+    def displayText(self, value, locale):
+        if isinstance(value, float):
+            return f"{value:,.2f}"
+        return super().displayText(value, locale)
+
 class AdminDashboard(QWidget):
     def __init__(self, admin_username):
         super().__init__()
         self.admin_username = admin_username
         self.setWindowTitle("CoinTether - Admin Dashboard")
         self.setFixedSize(900, 700)
-        self.notifications = []
+        from src.price_fetcher import load_price_cache
+        from src.valuation import UserValueCache
+        self.prices = load_price_cache()
+        self.value_cache = UserValueCache(db_path)
+        self.price_worker = None
+        self.search_conn = None
+        self.search_worker = None
+        self.closed = False
+        self.user_rows = {}             # username -> table row, see user_row()
         self.setup_ui()
         self.apply_dark_theme()
         self.load_users()
+        self.refresh_market_prices()
 
     def setup_ui(self):
         layout = QVBoxLayout()
@@ -50,15 +75,18 @@ class AdminDashboard(QWidget):
         layout.addWidget(title)
 
         self.search_bar = QLineEdit()
-        self.search_bar.setPlaceholderText("Search users by username or email...")
+        self.search_bar.setPlaceholderText("Search users by username, email, name or note...")
         self.search_bar.textChanged.connect(self.filter_table)
         layout.addWidget(self.search_bar)
 
         self.table = QTableWidget()
         self.table.setColumnCount(6)
         self.table.setHorizontalHeaderLabels([
-            "Username", "Email", "Total USD+INR", "Coins", "Status", "Actions"
+            "Username", "Email", "Value (USD)", "Coins", "Status", "Actions"
         ])
+        self.table.setItemDelegateForColumn(VALUE_COLUMN, MoneyDelegate(self.table))
+        self.table.verticalScrollBar().valueChanged.connect(self.ensure_action_widgets)
+        self.table.horizontalHeader().sortIndicatorChanged.connect(lambda *_: QTimer.singleShot(0, self.ensure_action_widgets))
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.table.setSelectionMode(QAbstractItemView.MultiSelection)
@@ -67,7 +95,7 @@ class AdminDashboard(QWidget):
         btn_layout = QHBoxLayout()
 
         self.refresh_btn = QPushButton("Refresh")
-        self.refresh_btn.clicked.connect(self.load_users)
+        self.refresh_btn.clicked.connect(lambda: self.load_users())
 
         self.batch_suspend_btn = QPushButton("Suspend Selected")
         self.batch_suspend_btn.clicked.connect(self.batch_suspend)
@@ -75,14 +103,21 @@ class AdminDashboard(QWidget):
         self.batch_unban_btn = QPushButton("Unban Selected")
         self.batch_unban_btn.clicked.connect(self.batch_unban)
 
+        self.batch_more_btn = QPushButton("More Selected")
+        batch_menu = QMenu(self.batch_more_btn)
+        batch_menu.addAction("Reset Passwords...", self.batch_reset_password)
+        batch_menu.addAction("Send Note...", self.batch_note)
+        batch_menu.addAction("Delete Users", self.batch_delete)
+        self.batch_more_btn.setMenu(batch_menu)
+
         self.export_csv_btn = QPushButton("Export CSV")
         self.export_csv_btn.clicked.connect(self.export_csv)
 
         self.export_pdf_btn = QPushButton("Export PDF")
         self.export_pdf_btn.clicked.connect(self.export_pdf)
 
-        self.notifications_btn = QPushButton("Notifications")
-        self.notifications_btn.clicked.connect(self.show_notifications)
+        self.audit_btn = QPushButton("Audit Log")
+        self.audit_btn.clicked.connect(self.show_audit_log)
 
         self.logout_btn = QPushButton("Logout")
         self.logout_btn.clicked.connect(self.logout)
@@ -90,13 +125,15 @@ class AdminDashboard(QWidget):
         self.settings_btn = QPushButton("⚙️ Settings")
         self.settings_btn.clicked.connect(self.open_settings)
 
-        for b in [self.refresh_btn, self.batch_suspend_btn, self.batch_unban_btn,
-                  self.export_csv_btn, self.export_pdf_btn, self.notifications_btn,
+        for b in [self.refresh_btn, self.batch_suspend_btn, self.batch_unban_btn, self.batch_more_btn,
+                  self.export_csv_btn, self.export_pdf_btn, self.audit_btn,
                   self.settings_btn, self.logout_btn]:
             btn_layout.addWidget(b)
 
         layout.addLayout(btn_layout)
         self.setLayout(layout)
+        from src.perf_dialog import install_shortcut
+        install_shortcut(self)
 
         icon_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'assets', 'CoinStack.ico'))
         if os.path.exists(icon_path):
@@ -133,104 +170,198 @@ class AdminDashboard(QWidget):
             }
         """)
 
+    # One query for the user list and one grouped valuation for every user's market
+    # value (cached until holdings or prices change). Action buttons are only built
+    # for rows that scroll into view, so the list stays cheap at 100k users.
+    @perf.traced("admin.load_users")
     def load_users(self):
+        self.table.setSortingEnabled(False)
         self.table.setRowCount(0)
+        self.user_rows = {}
         try:
+            db_writer.ready(db_path)        # tables and indexes come from the writer's schema setup
             conn = sqlite3.connect(db_path)
             cur = conn.cursor()
-            cur.execute("""CREATE TABLE IF NOT EXISTS user_flags (username TEXT PRIMARY KEY, suspended INTEGER DEFAULT 0);""")
-            cur.execute("""CREATE TABLE IF NOT EXISTS user_notes (username TEXT, note TEXT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP);""")
-            conn.commit()
-
-            cur.execute("SELECT username, email FROM users")
-            users = cur.fetchall()
-
-            for row_idx, (username, email) in enumerate(users):
-                cur.execute("SELECT SUM(holdings) FROM user_wallets WHERE username=?", (username,))
-                total = cur.fetchone()[0] or 0
-
-                coin_count = cur.execute("SELECT COUNT(*) FROM user_wallets WHERE username=?", (username,)).fetchone()[0]
-
-                flag = cur.execute("SELECT suspended FROM user_flags WHERE username=?", (username,)).fetchone()
-                suspended = "Suspended" if flag and flag[0] else "Active"
-
-                self.table.insertRow(row_idx)
-                self.table.setItem(row_idx, 0, QTableWidgetItem(username))
-                self.table.setItem(row_idx, 1, QTableWidgetItem(email))
-                self.table.setItem(row_idx, 2, QTableWidgetItem(f"{total:.2f}"))
-                self.table.setItem(row_idx, 3, QTableWidgetItem(str(coin_count)))
-                self.table.setItem(row_idx, 4, QTableWidgetItem(suspended))
-
-                btn_widget = QWidget()
-                btn_layout = QHBoxLayout()
-                btn_layout.setContentsMargins(0,0,0,0)
-                btn_layout.setSpacing(4)
-
-                def make_btn(text, tip, func):
-                    b = QPushButton(text)
-                    b.setToolTip(tip)
-                    b.setFixedSize(32, 32)
-                    b.clicked.connect(lambda _, u=username: func(u))
-                    return b
-
-                view_btn = make_btn("👁", "View Wallet", self.view_wallet)
-                reset_btn = make_btn("🔁", "Reset Password", self.reset_password)
-                ban_btn = make_btn("🚫" if suspended=="Active" else "🔓", "Ban/Unban", self.toggle_suspend)
-                delete_btn = make_btn("🗑", "Delete User", self.delete_user)
-                note_btn = make_btn("📝", "Send Note", self.send_note)
-
-                for b in [view_btn, reset_btn, ban_btn, delete_btn, note_btn]:
-                    btn_layout.addWidget(b)
-
-                btn_widget.setLayout(btn_layout)
-                self.table.setCellWidget(row_idx, 5, btn_widget)
-
+            if self.search_conn is None:
+                if search.search_ready(conn): self.search_conn = sqlite3.connect(db_path)
+                else: self.build_search_index()
+
+            with perf.span("db.users_query"):
+                users = cur.execute("""
+                    SELECT u.username, u.email, COALESCE(w.coins, 0), COALESCE(f.suspended, 0)
+                    FROM users u
+                    LEFT JOIN (SELECT username, COUNT(*) AS coins FROM user_wallets GROUP BY username) w ON w.username = u.username
+                    LEFT JOIN user_flags f ON f.username = u.username
+                    ORDER BY u.id
+                """).fetchall()
             conn.close()
+            with perf.span("valuation.users"):
+                values = self.value_cache.get(self.prices)
+
+            with perf.span("table.populate", rows=len(users)):
+                self.table.setRowCount(len(users))
+                for row_idx, (username, email, coin_count, suspended) in enumerate(users):
+                    self.user_rows[username] = row_idx
+                    self.table.setItem(row_idx, 0, QTableWidgetItem(username))
+                    self.table.setItem(row_idx, 1, QTableWidgetItem(email))
+                    self.table.setItem(row_idx, VALUE_COLUMN, self.value_item(values.get(username)))
+                    coins_item = QTableWidgetItem()
+                    coins_item.setData(Qt.DisplayRole, coin_count)
+                    self.table.setItem(row_idx, 3, coins_item)
+                    self.table.setItem(row_idx, 4, QTableWidgetItem("Suspended" if suspended else "Active"))
         except Exception as e:
             QMessageBox.critical(self, "Error", str(e))
+        self.table.setSortingEnabled(True)
+        if self.search_bar.text(): self.filter_table(self.search_bar.text())
+        else: self.ensure_action_widgets()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        QTimer.singleShot(0, self.ensure_action_widgets)
+
+    def value_item(self, values):
+        item = QTableWidgetItem()
+        self.set_value(item, values)
+        return item
+
+    def set_value(self, item, values):
+        values = values or {"usd": 0.0, "inr": 0.0}
+        item.setData(Qt.DisplayRole, float(values["usd"]))
+        item.setToolTip(f"USD {values['usd']:,.2f} | INR {values['inr']:,.2f}")
+
+    def refresh_market_prices(self):
+        """Fetch prices for every held symbol in one batch, off the GUI thread."""
+        from src.price_fetcher import fetch_all_prices
+        from src.valuation import wallet_symbols
+        from src.workers import FunctionWorker, start_worker
+        try:
+            symbols = wallet_symbols(db_path)
+        except sqlite3.Error:
+            return
+        if not symbols: return
+        self.price_worker = FunctionWorker(fetch_all_prices, symbols)
+        self.price_worker.result.connect(self.apply_market_prices)
+        start_worker(self.price_worker)
+
+    @perf.traced("admin.apply_prices")
+    def apply_market_prices(self, prices):
+        if not prices: return
+        self.prices.update(prices)
+        values = self.value_cache.get(self.prices)
+        self.table.setSortingEnabled(False)
+        for row in range(self.table.rowCount()):
+            self.set_value(self.table.item(row, VALUE_COLUMN), values.get(self.table.item(row, 0).text()))
+        self.table.setSortingEnabled(True)
+
+    def ensure_action_widgets(self):
+        first = self.table.rowAt(0)
+        if first < 0: return
+        last = self.table.rowAt(self.table.viewport().height() - 1)
+        if last < 0: last = self.table.rowCount() - 1
+        for row in range(first, last + 1):
+            if self.table.isRowHidden(row) or self.table.cellWidget(row, 5) is not None: continue
+            username = self.table.item(row, 0).text()
+            self.table.setCellWidget(row, 5, self.action_widget(username, self.table.item(row, 4).text()))
+
+    def action_widget(self, username, suspended):
+        btn_widget = QWidget()
+        btn_layout = QHBoxLayout()
+        btn_layout.setContentsMargins(0,0,0,0)
+        btn_layout.setSpacing(4)
+
+        def make_btn(text, tip, func):
+            b = QPushButton(text)
+            b.setToolTip(tip)
+            b.setFixedSize(32, 32)
+            b.clicked.connect(lambda _, u=username: func(u))
+            return b
+
+        view_btn = make_btn("👁", "View Wallet", self.view_wallet)
+        reset_btn = make_btn("🔁", "Reset Password", self.reset_password)
+        ban_btn = make_btn("🚫" if suspended=="Active" else "🔓", "Ban/Unban", self.toggle_suspend)
+        delete_btn = make_btn("🗑", "Delete User", self.delete_user)
+        note_btn = make_btn("📝", "Send Note", self.send_note)
+
+        for b in [view_btn, reset_btn, ban_btn, delete_btn, note_btn]:
+            btn_layout.addWidget(b)
+
+        btn_widget.setLayout(btn_layout)
+        return btn_widget
 
+    # Three or more characters are looked up in the FTS index (src/search.py), which
+    # also covers names and admin notes; shorter text filters the loaded rows.
+    @perf.traced("admin.filter")
     def filter_table(self, text):
+        found = self.search_matches(text)
         text = text.lower()
+        # Each visible setRowHidden re-lays out the view; with updates off it is ~100x cheaper.
+        self.table.setUpdatesEnabled(False)
         for row in range(self.table.rowCount()):
-            username = self.table.item(row,0).text().lower()
-            email = self.table.item(row,1).text().lower()
-            matches = text in username or text in email
+            username = self.table.item(row,0).text()
+            if found is not None:
+                matches = username in found
+            else:
+                matches = text in username.lower() or text in self.table.item(row,1).text().lower()
             self.table.setRowHidden(row, not matches)
+        self.table.setUpdatesEnabled(True)
+        self.ensure_action_widgets()
+
+    def build_search_index(self):
+        """First run on a database: build the FTS index on the writer, off the GUI thread.
+        Until it is ready the search bar uses the substring filter."""
+        from src.workers import FunctionWorker, start_worker
+        if self.search_worker is not None: return
+        self.search_worker = FunctionWorker(lambda: db_writer.wait(db_writer.submit(db_path, search.ensure_search_index), SEARCH_INDEX_TIMEOUT))
+        self.search_worker.result.connect(self.on_search_index)
+        self.search_worker.failed.connect(self.on_search_index_failed)
+        self.search_worker.finished.connect(lambda: setattr(self, "search_worker", None))
+        start_worker(self.search_worker)
+
+    def on_search_index(self, ready):
+        if not ready or self.search_conn is not None or self.closed: return
+        self.search_conn = sqlite3.connect(db_path)
+        if self.search_bar.text(): self.filter_table(self.search_bar.text())
+
+    def on_search_index_failed(self, error):
+        # The substring filter keeps working; say why full-text search is missing.
+        import sys
+        message = f"Search index build failed: {error or 'timed out'}"
+        print(message, file=sys.stderr)
+        self.search_bar.setToolTip(message + " - using substring matching.")
+
+    def search_matches(self, text):
+        if self.search_conn is None: return None
+        try:
+            with perf.span("search.fts"):
+                rows = search.search_users(self.search_conn, text)
+        except sqlite3.Error:
+            return None
+        return None if rows is None else {username for username, score in rows}
 
     # ---------------------- User Actions ----------------------
     def view_wallet(self, username):
+        from src.user_wallet_viewer import UserWalletViewer
         dialog = UserWalletViewer(username)
         dialog.exec_()
 
     def reset_password(self, username):
         new_pwd, ok = QInputDialog.getText(self, "Reset Password", f"Enter new password for {username}:")
         if ok and new_pwd:
-            hashed = hashlib.sha256(new_pwd.encode()).hexdigest()
             try:
-                conn = sqlite3.connect(db_path)
-                conn.execute("UPDATE users SET password=? WHERE username=?", (hashed, username))
-                conn.commit()
-                conn.close()
-                self.add_notification(f"Password reset for {username}.")
+                self.apply_action(admin_actions.reset_passwords, [username], new_pwd, log="reset_password")
                 QMessageBox.information(self, "Success", f"Password reset for {username}.")
             except Exception as e:
                 QMessageBox.critical(self, "Error", str(e))
 
     def toggle_suspend(self, username):
         try:
-            conn = sqlite3.connect(db_path)
-            cur = conn.cursor()
-            cur.execute("SELECT suspended FROM user_flags WHERE username=?", (username,))
-            flag = cur.fetchone()
-            if flag:
-                new_status = 0 if flag[0] else 1
-                cur.execute("UPDATE user_flags SET suspended=? WHERE username=?", (new_status, username))
-            else:
-                cur.execute("INSERT INTO user_flags (username, suspended) VALUES (?, 1)", (username,))
-            conn.commit()
-            conn.close()
-            self.load_users()
-            self.add_notification(f"Toggled suspension for {username}.")
+            # The flip happens inside the writer's transaction so two admins can't race.
+            def toggle(conn, usernames):
+                status = admin_actions.toggle_suspended(conn, usernames)
+                for name, suspended in status.items():
+                    audit.record(conn, self.admin_username, "suspend" if suspended else "unban", [name])
+                return status
+            self.update_status_rows(self.apply_action(toggle, [username]))
         except Exception as e:
             QMessageBox.critical(self, "Error", str(e))
 
@@ -238,13 +369,8 @@ class AdminDashboard(QWidget):
         confirm = QMessageBox.question(self, "Confirm", f"Delete account and data for {username}?", QMessageBox.Yes | QMessageBox.No)
         if confirm != QMessageBox.Yes: return
         try:
-            conn = sqlite3.connect(db_path)
-            for table in ["users","user_wallets","user_flags","user_notes"]:
-                conn.execute(f"DELETE FROM {table} WHERE username=?", (username,))
-            conn.commit()
-            conn.close()
-            self.load_users()
-            self.add_notification(f"Deleted user {username}.")
+            self.apply_action(admin_actions.delete_users, [username], log="delete")
+            self.remove_user_rows([username])
             QMessageBox.information(self, "Deleted", f"{username}'s account deleted.")
         except Exception as e:
             QMessageBox.critical(self, "Error", str(e))
@@ -266,80 +392,150 @@ class AdminDashboard(QWidget):
             QMessageBox.warning(dialog, "Empty", "Note cannot be empty.")
             return
         try:
-            conn = sqlite3.connect(db_path)
-            conn.execute("INSERT INTO user_notes (username, note) VALUES (?, ?)", (username, note.strip()))
-            conn.commit()
-            conn.close()
-            self.add_notification(f"Sent note to {username}.")
+            self.apply_action(admin_actions.add_notes, [username], note.strip(), log="note", detail=note.strip())
             dialog.accept()
         except Exception as e:
             QMessageBox.critical(dialog, "Error", str(e))
 
     # ---------------------- Batch Actions ----------------------
+    # Every batch is one set-based transaction (src/admin_actions.py) followed by a
+    # single in-place pass over the table -- no per-user commits or full reloads.
+    def selected_usernames(self):
+        rows = sorted({index.row() for index in self.table.selectionModel().selectedIndexes()})
+        return [self.table.item(row, 0).text() for row in rows]
+
+    def apply_action(self, action, usernames, *args, log=None, detail=None):
+        """Run an admin_actions function in one writer transaction, with its audit rows when `log` names the action."""
+        def mutation(conn):
+            result = action(conn, usernames, *args)
+            if log: audit.record(conn, self.admin_username, log, usernames, detail)
+            return result
+        return db_writer.wait(db_writer.submit(db_path, mutation))
+
+    def user_row(self, username):
+        """Table row of `username`, or None.
+
+        The map is built in load_users. Sorting moves rows, so an entry is checked
+        against the row's username and the map is rebuilt only when it is stale.
+        """
+        row = self.user_rows.get(username)
+        if row is None or row >= self.table.rowCount() or self.table.item(row, 0).text() != username:
+            self.user_rows = {self.table.item(r, 0).text(): r for r in range(self.table.rowCount())}
+            row = self.user_rows.get(username)
+        return row
+
+    def update_status_rows(self, status):
+        """Set the Status cell (and rebuild the ban button) for {username: suspended}."""
+        self.table.setSortingEnabled(False)
+        for username, suspended in status.items():
+            row = self.user_row(username)
+            if row is None: continue
+            self.table.item(row, 4).setText("Suspended" if suspended else "Active")
+            self.table.removeCellWidget(row, 5)
+        self.table.setSortingEnabled(True)
+        self.ensure_action_widgets()
+
+    def remove_user_rows(self, usernames):
+        self.table.setSortingEnabled(False)
+        rows = sorted({row for row in map(self.user_row, usernames) if row is not None})
+        for row in reversed(rows):
+            self.table.removeRow(row)
+        # Rows below each removed one moved up; shift the map instead of re-reading the table.
+        removed = set(rows)
+        self.user_rows = {u: r - bisect.bisect_left(rows, r) for u, r in self.user_rows.items() if r not in removed}
+        self.table.setSortingEnabled(True)
+        self.ensure_action_widgets()
+
+    def batch_set_suspended(self, suspended):
+        usernames = self.selected_usernames()
+        if not usernames: return
+        try:
+            self.update_status_rows(self.apply_action(admin_actions.set_suspended, usernames, suspended,
+                                                      log="suspend" if suspended else "unban"))
+        except Exception as e:
+            QMessageBox.critical(self, "Error", str(e))
+
     def batch_suspend(self):
-        selected = self.table.selectedItems()
-        usernames = list({self.table.item(i.row(),0).text() for i in selected})
-        for user in usernames: self.toggle_suspend(user)
+        self.batch_set_suspended(True)
 
     def batch_unban(self):
-        selected = self.table.selectedItems()
-        usernames = list({self.table.item(i.row(),0).text() for i in selected})
-        for user in usernames:
-            try:
-                conn = sqlite3.connect(db_path)
-                cur = conn.cursor()
-                cur.execute("UPDATE user_flags SET suspended=0 WHERE username=?", (user,))
-                conn.commit(); conn.close()
-                self.load_users()
-                self.add_notification(f"Unbanned {user}.")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", str(e))
+        self.batch_set_suspended(False)
 
-    # ---------------------- Export ----------------------
-    def export_csv(self):
-        path, _ = QFileDialog.getSaveFileName(self, "Save CSV", "", "CSV Files (*.csv)")
-        if not path: return
+    def batch_delete(self):
+        usernames = self.selected_usernames()
+        if not usernames: return
+        confirm = QMessageBox.question(self, "Confirm", f"Delete {len(usernames)} account(s) and their data?", QMessageBox.Yes | QMessageBox.No)
+        if confirm != QMessageBox.Yes: return
+        try:
+            self.apply_action(admin_actions.delete_users, usernames, log="delete")
+            self.remove_user_rows(usernames)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", str(e))
+
+    def batch_reset_password(self):
+        usernames = self.selected_usernames()
+        if not usernames: return
+        new_pwd, ok = QInputDialog.getText(self, "Reset Passwords", f"Enter new password for {len(usernames)} user(s):")
+        if not (ok and new_pwd): return
+        try:
+            self.apply_action(admin_actions.reset_passwords, usernames, new_pwd, log="reset_password")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", str(e))
+
+    def batch_note(self):
+        usernames = self.selected_usernames()
+        if not usernames: return
+        note, ok = QInputDialog.getMultiLineText(self, "Send Note", f"Note for {len(usernames)} user(s):")
+        if not (ok and note.strip()): return
         try:
-            with open(path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(["Username","Email","Total USD+INR","Coins","Status"])
-                for row in range(self.table.rowCount()):
-                    writer.writerow([self.table.item(row,i).text() for i in range(5)])
-            QMessageBox.information(self, "CSV Exported", f"CSV saved to {path}")
-            self.add_notification(f"Exported CSV to {path}.")
+            self.apply_action(admin_actions.add_notes, usernames, note.strip(), log="note", detail=note.strip())
         except Exception as e:
             QMessageBox.critical(self, "Error", str(e))
 
+    # ---------------------- Export ----------------------
+    def export_csv(self):
+        path, chosen = QFileDialog.getSaveFileName(
+            self, "Export Users", "", "CSV Files (*.csv);;Parquet Files (*.parquet);;Arrow Files (*.arrow)"
+        )
+        if not path: return
+        if not os.path.splitext(path)[1]:
+            path += {"CSV": ".csv", "Parquet": ".parquet", "Arrow": ".arrow"}.get(chosen.split(" ")[0], ".csv")
+        from src.exports import export_dataset, count_rows
+        from src.workers import ProgressWorker, run_with_progress
+
+        def done(rows):
+            QMessageBox.information(self, "Export Complete", f"{rows:,} users exported to {path}")
+            self.log_action("export", detail=f"users to {path}")
+
+        # Streams from the database, so hidden/filtered rows and unloaded users are exported too.
+        export = functools.partial(export_dataset, prices=dict(self.prices))
+        worker = ProgressWorker(export, path, db_path, "admin_users", count_rows(db_path, "admin_users"))
+        run_with_progress(self, "Exporting users...", worker, done)
+
     def export_pdf(self):
         path, _ = QFileDialog.getSaveFileName(self, "Save PDF", "", "PDF Files (*.pdf)")
         if not path: return
-        try:
-            pdf = FPDF(); pdf.add_page(); pdf.set_font("Arial","B",16)
-            pdf.cell(0,10,"CoinTether Admin User Report", ln=True, align="C"); pdf.ln(10)
-            pdf.set_font("Arial","",12)
-            for row in range(self.table.rowCount()):
-                pdf.cell(0,8," | ".join([self.table.item(row,i).text() for i in range(5)]), ln=True)
-            pdf.output(path)
+        from src.reports import write_admin_report
+        from src.workers import ProgressWorker, run_with_progress
+
+        def done(rows):
             QMessageBox.information(self, "PDF Exported", f"PDF saved to {path}")
-            self.add_notification(f"Exported PDF to {path}.")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", str(e))
+            self.log_action("export", detail=f"PDF to {path}")
 
-    # ---------------------- Notifications ----------------------
-    def add_notification(self, text):
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.notifications.append(f"[{timestamp}] {text}")
+        run_with_progress(self, "Exporting PDF...", ProgressWorker(write_admin_report, path, db_path, dict(self.prices)), done)
 
-    def show_notifications(self):
-        dialog = QDialog(self)
-        dialog.setWindowTitle("Admin Notifications")
-        layout = QVBoxLayout()
-        text_area = QTextEdit()
-        text_area.setReadOnly(True)
-        text_area.setText("\n".join(self.notifications[-50:]))  # last 50 actions
-        layout.addWidget(text_area)
-        dialog.setLayout(layout)
-        dialog.exec_()
+    # ---------------------- Audit Log ----------------------
+    # Changes are audited inside their own transaction (apply_action); this is for
+    # actions that change nothing in the database. It is queued, not waited on, so
+    # it group-commits with whatever else the writer is doing.
+    def log_action(self, action, targets=(None,), detail=None):
+        future = db_writer.submit(db_path, lambda conn: audit.record(conn, self.admin_username, action, targets, detail))
+        # Nobody waits on this write, so a failure would otherwise vanish with the future.
+        future.add_done_callback(functools.partial(report_audit_failure, action))
+
+    def show_audit_log(self):
+        from src.audit_dialog import AuditLogDialog
+        AuditLogDialog(db_path, self).exec_()
 
     # ---------------------- Admin Settings ----------------------
     def open_settings(self):
@@ -362,17 +558,19 @@ class AdminDashboard(QWidget):
             QMessageBox.warning(dialog,"Input Error","All fields are required."); return
         if new_pwd != confirm_pwd:
             QMessageBox.warning(dialog,"Mismatch","New passwords do not match."); return
+        def change(conn):
+            # Checked and changed in one writer transaction.
+            result = conn.execute("SELECT password FROM admins WHERE username=?", (self.admin_username,)).fetchone()
+            if not result: return "missing"
+            if hashlib.sha256(current_pwd.encode()).hexdigest() != result[0]: return "wrong"
+            conn.execute("UPDATE admins SET password=? WHERE username=?", (hashlib.sha256(new_pwd.encode()).hexdigest(), self.admin_username))
+            return "ok"
         try:
-            conn = sqlite3.connect(db_path); cur = conn.cursor()
-            cur.execute("SELECT password FROM admins WHERE username=?",(self.admin_username,))
-            result = cur.fetchone()
-            if not result: QMessageBox.critical(dialog,"Error","Admin not found."); conn.close(); return
-            if hashlib.sha256(current_pwd.encode()).hexdigest()!=result[0]:
-                QMessageBox.warning(dialog,"Error","Current password is incorrect."); conn.close(); return
-            cur.execute("UPDATE admins SET password=? WHERE username=?", (hashlib.sha256(new_pwd.encode()).hexdigest(), self.admin_username))
-            conn.commit(); conn.close()
+            outcome = db_writer.wait(db_writer.submit(db_path, change))
+            if outcome == "missing": QMessageBox.critical(dialog,"Error","Admin not found."); return
+            if outcome == "wrong": QMessageBox.warning(dialog,"Error","Current password is incorrect."); return
             QMessageBox.information(dialog,"Success","Password updated successfully."); dialog.accept()
-            self.add_notification("Admin changed their password.")
+            self.log_action("change_password", [self.admin_username])
         except Exception as e:
             QMessageBox.critical(dialog,"Error",str(e))
 
@@ -382,3 +580,9 @@ class AdminDashboard(QWidget):
         self.login_screen = UserLoginScreen()
         self.login_screen.show()
         self.close()
+
+    def closeEvent(self, event):
+        self.closed = True
+        if self.search_conn is not None:
+            self.search_conn.close(); self.search_conn = None
+        super().closeEvent(event)
@@ -0,0 +1,459 @@
+# src/alerts.py
+
+import sqlite3
+import time
+import threading
+from bisect import bisect_left, bisect_right
+
+# Price and portfolio-value alerts.
+#
+# Every alert is reduced to one or two threshold crossings on a key: a coin
+# symbol for price alerts, "@username" for portfolio-value alerts. "above" fires
+# once the value is >= threshold and "below" once it is <= threshold; a percent
+# move of p% from the value at creation is an above/below pair that fire together.
+#
+# Per key, AlertIndex keeps the above and below thresholds in sorted lists. The
+# above alerts that fire on a tick are always a prefix of the live part of the
+# above list and the below alerts always a suffix of the below list, so a tick is
+# one bisect per side plus the alerts that actually fire; nothing else is looked at.
+#
+# Engines notice alerts added, deleted or fired elsewhere through the price_alerts
+# counter in data_versions (src/versions.py): one primary-key lookup per tick.
+
+KINDS = ("price", "portfolio")
+DIRECTIONS = ("above", "below", "move")
+
+
+def ensure_alert_tables(conn):
+    from src.schema import table_exists, link_new_tables
+    from src.versions import ensure_versions
+    new = [table for table in ("price_alerts", "alert_events") if not table_exists(conn, table)]
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS price_alerts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            symbol TEXT,
+            direction TEXT NOT NULL,
+            threshold REAL,
+            percent REAL,
+            base_value REAL,
+            notify_email INTEGER NOT NULL DEFAULT 1,
+            active INTEGER NOT NULL DEFAULT 1,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            triggered_at DATETIME
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_price_alerts_user ON price_alerts (username, active)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS alert_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            alert_id INTEGER NOT NULL,
+            username TEXT NOT NULL,
+            message TEXT NOT NULL,
+            value REAL,
+            seen INTEGER NOT NULL DEFAULT 0,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_alert_events_user ON alert_events (username, seen)")
+    link_new_tables(conn, new)
+    ensure_versions(conn, ("price_alerts",))
+
+
+def alert_key(kind, symbol, username):
+    return symbol.upper() if kind == "price" else "@" + username
+
+
+def crossings(direction, threshold, percent, base_value):
+    """[(side, threshold)] an alert watches; a percent move watches both sides of its base."""
+    if direction == "move":
+        return [("above", base_value * (1 + percent / 100)), ("below", base_value * (1 - percent / 100))]
+    return [(direction, threshold)]
+
+
+class _Side:
+    """Sorted thresholds (with alert ids) for one side of one key.
+
+    Only [lo, hi) is live: fired above alerts advance lo, fired below alerts pull
+    hi back, so firing never shifts the list. New alerts are insorted into the
+    live range; the dead ends are trimmed once they outweigh it.
+    """
+    __slots__ = ("thresholds", "ids", "lo", "hi")
+
+    def __init__(self):
+        self.thresholds, self.ids, self.lo, self.hi = [], [], 0, 0
+
+    def insert(self, threshold, alert_id):
+        pos = bisect_right(self.thresholds, threshold, self.lo, self.hi)
+        self.thresholds.insert(pos, threshold)
+        self.ids.insert(pos, alert_id)
+        self.hi += 1
+
+    def rebuild(self, pairs):
+        pairs = sorted(pairs)
+        self.thresholds = [t for t, i in pairs]
+        self.ids = [i for t, i in pairs]
+        self.lo, self.hi = 0, len(pairs)
+
+    def fire_above(self, value, keep=False):
+        end = bisect_right(self.thresholds, value, self.lo, self.hi)
+        fired = self.ids[self.lo:end]
+        if not keep:
+            self.lo = end
+            self._trim()
+        return fired
+
+    def fire_below(self, value, keep=False):
+        start = bisect_left(self.thresholds, value, self.lo, self.hi)
+        fired = self.ids[start:self.hi]
+        if not keep:
+            self.hi = start
+            self._trim()
+        return fired
+
+    def _trim(self):
+        live = self.hi - self.lo
+        if len(self.ids) > 64 and live < len(self.ids) // 2:
+            self.thresholds = self.thresholds[self.lo:self.hi]
+            self.ids = self.ids[self.lo:self.hi]
+            self.lo, self.hi = 0, live
+
+
+class AlertIndex:
+    """In-memory threshold index over active alerts; knows nothing about the database."""
+
+    def __init__(self):
+        self.sides = {}         # key -> {"above": _Side, "below": _Side}
+        self.alerts = {}        # alert id -> (username, key, direction, threshold, percent, base_value)
+
+    def __len__(self):
+        return len(self.alerts)
+
+    def add(self, alert_id, username, key, direction, threshold=None, percent=None, base_value=None):
+        self.alerts[alert_id] = (username, key, direction, threshold, percent, base_value)
+        sides = self.sides.setdefault(key, {"above": _Side(), "below": _Side()})
+        for side, value in crossings(direction, threshold, percent, base_value):
+            sides[side].insert(value, alert_id)
+
+    def add_many(self, rows):
+        """Bulk load (alert_id, username, key, direction, threshold, percent, base_value) rows, sorting once per side."""
+        pending = {}
+        for alert_id, username, key, direction, threshold, percent, base_value in rows:
+            self.alerts[alert_id] = (username, key, direction, threshold, percent, base_value)
+            for side, value in crossings(direction, threshold, percent, base_value):
+                pending.setdefault((key, side), []).append((value, alert_id))
+        for (key, side), pairs in pending.items():
+            sides = self.sides.setdefault(key, {"above": _Side(), "below": _Side()})
+            target = sides[side]
+            target.rebuild(list(zip(target.thresholds[target.lo:target.hi], target.ids[target.lo:target.hi])) + pairs)
+
+    def remove(self, alert_id):
+        # The thresholds stay in the lists and are skipped when they fire.
+        return self.alerts.pop(alert_id, None)
+
+    def update(self, key, value, keep=False):
+        """Feed a new value for `key`; returns [(alert_id, alert)] for alerts that fired.
+
+        With keep=True nothing is removed: the same call without it drops them later.
+        """
+        sides = self.sides.get(key)
+        if sides is None or value is None:
+            return []
+        fired = []
+        for alert_id in sides["above"].fire_above(value, keep) + sides["below"].fire_below(value, keep):
+            alert = self.alerts.get(alert_id) if keep else self.alerts.pop(alert_id, None)
+            if alert is not None:
+                fired.append((alert_id, alert))
+        return fired
+
+    def update_prices(self, prices, currency="usd", keep=False):
+        fired = []
+        for symbol, entry in prices.items():
+            if symbol in self.sides:
+                try:
+                    fired += self.update(symbol, float(entry[currency]), keep)
+                except (KeyError, TypeError, ValueError):
+                    continue
+        return fired
+
+
+def describe(alert, value):
+    username, key, direction, threshold, percent, base_value = alert
+    subject = f"{key} price" if not key.startswith("@") else "Portfolio value"
+    if direction == "move":
+        return f"{subject} moved {percent:g}% from {base_value:,.2f} (now {value:,.2f} USD)"
+    return f"{subject} is {direction} {threshold:,.2f} USD (now {value:,.2f} USD)"
+
+
+class AlertEngine:
+    """AlertIndex backed by the price_alerts table.
+
+    Loads the active alerts once (all users, or one user for the dashboard's
+    alerts dialog), evaluates each tick in memory, and only touches the database
+    for alerts that fire: they are deactivated, logged to alert_events and, if the
+    alert asks for it, emailed through the mail queue. Every write goes through
+    the database writer (src/db_writer.py).
+
+    Alerts are evaluated by the all-users engine wherever prices are fetched (see
+    shared_engine and src/price_daemon.py). Several of those may run at once, in
+    different windows and processes; an alert is only recorded by the one that
+    deactivates it, so it fires once. Fired alerts leave the index only once that
+    write has committed; if it fails they are still live on the next tick.
+
+    `signature` is the price_alerts counter the index reflects. The engine's own
+    writes move it along, so only a change made elsewhere makes sync() reload;
+    with background=True (the shared engine) that reload, and the first load,
+    run on a thread while ticks keep using the index they have.
+    """
+
+    def __init__(self, db_path, username=None, background=False):
+        self.db_path = db_path
+        self.username = username
+        self.index = AlertIndex()
+        self.signature = None
+        self._lock = threading.Lock()
+        self._loader = None
+        if background: self.sync(wait=False)
+        else: self.load()
+
+    def _connect(self):
+        from src import db_writer
+        from src.versions import is_tracked
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        if not is_tracked(conn, "price_alerts"):
+            db_writer.ready(self.db_path)       # the writer creates the tables and their counter
+        return conn
+
+    def _version(self, conn):
+        from src.versions import get_version
+        return get_version(conn, "price_alerts")
+
+    def _write(self, change):
+        """Run change(conn) on the database writer and return its result."""
+        from src import db_writer
+
+        def mutation(conn):
+            ensure_alert_tables(conn)
+            before = self._version(conn)
+            result = change(conn)
+            return before, self._version(conn), result
+        before, after, result = db_writer.wait(db_writer.submit(self.db_path, mutation))
+        with self._lock:
+            # Only our own change happened since the index was read; anything else still needs a reload.
+            if before == self.signature:
+                self.signature = after
+        return result
+
+    def load(self):
+        index = AlertIndex()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN")
+            version = self._version(conn)
+            sql = "SELECT id, username, kind, symbol, direction, threshold, percent, base_value FROM price_alerts WHERE active = 1"
+            params = ()
+            if self.username is not None:
+                sql += " AND username = ?"; params = (self.username,)
+            index.add_many(
+                (alert_id, username, alert_key(kind, symbol or "", username), direction, threshold, percent, base_value)
+                for alert_id, username, kind, symbol, direction, threshold, percent, base_value in conn.execute(sql, params)
+            )
+        finally:
+            conn.close()
+        with self._lock:
+            self.index, self.signature = index, version
+
+    def _load_in_background(self):
+        try:
+            self.load()
+        except sqlite3.Error as e:
+            print(f"Could not load alerts: {e}")
+
+    def sync(self, wait=True):
+        """Reload if alerts were added, deleted or fired outside this engine since it loaded.
+
+        With wait=False a needed reload runs on a background thread instead.
+        """
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            version = self._version(conn)
+        except sqlite3.OperationalError:
+            version = None          # no counter yet: load() creates it
+        finally:
+            conn.close()
+        if version is not None and version == self.signature:
+            return
+        if wait:
+            self.load()
+        elif self._loader is None or not self._loader.is_alive():
+            self._loader = threading.Thread(target=self._load_in_background, name="alert-loader", daemon=True)
+            self._loader.start()
+
+    def add_alert(self, username, kind, direction, threshold=None, symbol=None, percent=None, base_value=None, notify_email=True):
+        if kind not in KINDS or direction not in DIRECTIONS:
+            raise ValueError(f"Unknown alert: {kind} {direction}")
+        if kind == "price" and not symbol:
+            raise ValueError("Price alerts need a symbol.")
+        if direction == "move" and (not percent or base_value is None):
+            raise ValueError("Percent-move alerts need a percentage and a current value.")
+        if direction != "move" and threshold is None:
+            raise ValueError("Above/below alerts need a threshold.")
+        symbol = symbol.upper() if symbol else None
+        alert_id = self._write(lambda conn: conn.execute(
+            "INSERT INTO price_alerts (username, kind, symbol, direction, threshold, percent, base_value, notify_email) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (username, kind, symbol, direction, threshold, percent, base_value, int(notify_email))
+        ).lastrowid)
+        self.index.add(alert_id, username, alert_key(kind, symbol or "", username), direction, threshold, percent, base_value)
+        return alert_id
+
+    def delete_alert(self, alert_id):
+        self._write(lambda conn: conn.execute("UPDATE price_alerts SET active = 0 WHERE id = ?", (alert_id,)).rowcount)
+        self.index.remove(alert_id)
+
+    def list_alerts(self, username):
+        conn = self._connect()
+        try:
+            return conn.execute(
+                "SELECT id, kind, symbol, direction, threshold, percent, base_value, active, triggered_at "
+                "FROM price_alerts WHERE username = ? ORDER BY active DESC, id DESC", (username,)
+            ).fetchall()
+        finally:
+            conn.close()
+
+    def on_prices(self, prices):
+        """Evaluate price alerts against a {SYMBOL: {"usd": ...}} snapshot; returns the events recorded."""
+        if self.username is None:
+            self.sync(wait=False)
+        index = self.index
+        fired = index.update_prices(prices, keep=True)
+        values = {}
+        for alert_id, alert in fired:
+            values[alert_id] = float(prices[alert[1]]["usd"])
+        events = self._record(fired, values)
+        index.update_prices(prices)
+        return events
+
+    def on_portfolio_value(self, username, value):
+        index = self.index
+        fired = index.update("@" + username, value, keep=True)
+        events = self._record(fired, {alert_id: value for alert_id, alert in fired})
+        index.update("@" + username, value)
+        return events
+
+    def watched_symbols(self):
+        """Symbols the live alerts depend on: price alert coins and every coin held by a user with a portfolio alert."""
+        self.sync()
+        symbols = {alert[1] for alert in self.index.alerts.values() if not alert[1].startswith("@")}
+        users = sorted({alert[0] for alert in self.index.alerts.values() if alert[1].startswith("@")})
+        if users:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            try:
+                for i in range(0, len(users), 500):
+                    batch = users[i:i + 500]
+                    symbols.update(row[0].upper() for row in conn.execute(
+                        f"SELECT DISTINCT symbol FROM user_wallets WHERE username IN ({','.join('?' * len(batch))})", batch
+                    ))
+            finally:
+                conn.close()
+        return symbols
+
+    def on_market(self, prices):
+        """Evaluate every user's price and portfolio-value alerts against a price snapshot.
+
+        Portfolio values are only computed when some portfolio alert is live, in
+        one grouped query over all wallets.
+        """
+        events = self.on_prices(prices)
+        watched = {alert[0] for alert in self.index.alerts.values() if alert[1].startswith("@")}
+        if watched:
+            from src.valuation import user_market_values
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            try:
+                values = user_market_values(conn, prices)
+            finally:
+                conn.close()
+            for username in sorted(watched):
+                events += self.on_portfolio_value(username, values.get(username, {}).get("usd", 0.0))
+        return events
+
+    def _record(self, fired, values):
+        if not fired:
+            return []
+        events = [(alert_id, alert[0], describe(alert, values[alert_id]), values[alert_id]) for alert_id, alert in fired]
+        now = time.strftime("%Y-%m-%d %H:%M:%S")
+
+        def deactivate(conn):
+            # Another engine may have fired (or the user deleted) the alert since this one loaded it.
+            kept = [e for e in events if conn.execute(
+                "UPDATE price_alerts SET active = 0, triggered_at = ? WHERE id = ? AND active = 1", (now, e[0])
+            ).rowcount]
+            conn.executemany("INSERT INTO alert_events (alert_id, username, message, value) VALUES (?, ?, ?, ?)", kept)
+            emails = {}
+            ids = [e[0] for e in kept]
+            for i in range(0, len(ids), 500):
+                batch = ids[i:i + 500]
+                emails.update(conn.execute(
+                    f"SELECT a.id, u.email FROM price_alerts a JOIN users u ON u.username = a.username "
+                    f"WHERE a.id IN ({','.join('?' * len(batch))}) AND a.notify_email = 1", batch
+                ))
+            return kept, emails
+        events, emails = self._write(deactivate)
+        messages = [(emails[alert_id], "CoinTether Alert", f"Hi {username},\n\n{message}\n", None)
+                    for alert_id, username, message, value in events if alert_id in emails]
+        if messages:
+            from src import mail_queue
+            mail_queue.enqueue_many(self.db_path, messages)
+            try:
+                mail_queue.start_background_sender(self.db_path)
+            except mail_queue.MailConfigError as e:
+                print(f"Alert emails stay queued: {e}")
+        return events
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def shared_engine(db_path):
+    """The process-wide all-users engine for `db_path`; it picks up alerts added elsewhere on each tick.
+
+    It loads in the background, so the first ticks after it is created may see no alerts yet.
+    """
+    with _shared_lock:
+        engine = _shared.get(db_path)
+        if engine is None:
+            engine = _shared[db_path] = AlertEngine(db_path, background=True)
+    return engine
+
+
+def unseen_events(db_path, username):
+    from src.schema import table_exists
+    conn = sqlite3.connect(db_path)
+    try:
+        if not table_exists(conn, "alert_events"):
+            return []
+        return conn.execute(
+            "SELECT id, message, created_at FROM alert_events WHERE username = ? AND seen = 0 ORDER BY id", (username,)
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def recent_events(db_path, username, limit=50):
+    from src.schema import table_exists
+    conn = sqlite3.connect(db_path)
+    try:
+        if not table_exists(conn, "alert_events"):
+            return []
+        return conn.execute(
+            "SELECT id, message, created_at, seen FROM alert_events WHERE username = ? ORDER BY id DESC LIMIT ?", (username, limit)
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def mark_events_seen(db_path, username):
+    from src import db_writer
+    db_writer.wait(db_writer.execute(db_path, "UPDATE alert_events SET seen = 1 WHERE username = ? AND seen = 0", (username,)))
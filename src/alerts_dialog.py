@@ -0,0 +1,116 @@
+# src/alerts_dialog.py
+
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QComboBox, QLineEdit, QPushButton, QLabel,
+    QCheckBox, QTableWidget, QTableWidgetItem, QListWidget, QMessageBox, QHeaderView, QAbstractItemView
+)
+from PyQt5.QtCore import Qt
+
+from src import alerts
+
+
+class AlertsDialog(QDialog):
+    """Create and remove price / portfolio-value alerts and read recent alert events.
+
+    `current_value(kind, symbol)` returns the latest USD price (or portfolio value);
+    percent-move alerts are measured from it.
+    """
+
+    CONDITIONS = [("Goes above (USD)", "above"), ("Goes below (USD)", "below"), ("Moves by (%)", "move")]
+
+    def __init__(self, engine, username, symbols, current_value, parent=None):
+        super().__init__(parent)
+        self.engine = engine
+        self.username = username
+        self.current_value = current_value
+        self.setWindowTitle("Price Alerts")
+        self.setFixedSize(560, 520)
+
+        layout = QVBoxLayout()
+        form = QHBoxLayout()
+        self.kind_box = QComboBox(); self.kind_box.addItems(["Coin price", "Portfolio value"])
+        self.symbol_box = QComboBox(); self.symbol_box.setEditable(True); self.symbol_box.addItems(symbols)
+        self.condition_box = QComboBox()
+        for label, direction in self.CONDITIONS:
+            self.condition_box.addItem(label, direction)
+        self.value_input = QLineEdit(); self.value_input.setPlaceholderText("Value")
+        self.email_check = QCheckBox("Email me"); self.email_check.setChecked(True)
+        add_button = QPushButton("Add Alert"); add_button.clicked.connect(self.add_alert)
+        self.kind_box.currentIndexChanged.connect(lambda i: self.symbol_box.setEnabled(i == 0))
+        for widget in [self.kind_box, self.symbol_box, self.condition_box, self.value_input, self.email_check, add_button]:
+            form.addWidget(widget)
+        layout.addLayout(form)
+
+        self.table = QTableWidget(0, 4)
+        self.table.setHorizontalHeaderLabels(["Alert", "Condition", "Status", "Triggered"])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        layout.addWidget(self.table)
+        delete_button = QPushButton("Delete Selected"); delete_button.clicked.connect(self.delete_selected)
+        layout.addWidget(delete_button)
+
+        layout.addWidget(QLabel("Recent alerts"))
+        self.events_list = QListWidget()
+        layout.addWidget(self.events_list)
+        self.setLayout(layout)
+
+        self.load_alerts()
+        self.load_events()
+        alerts.mark_events_seen(self.engine.db_path, self.username)
+
+    def load_alerts(self):
+        rows = self.engine.list_alerts(self.username)
+        self.table.setRowCount(len(rows))
+        for row_idx, (alert_id, kind, symbol, direction, threshold, percent, base_value, active, triggered_at) in enumerate(rows):
+            target = f"{symbol} price" if kind == "price" else "Portfolio value"
+            if direction == "move":
+                condition = f"moves {percent:g}% from {base_value:,.2f}"
+            else:
+                condition = f"{direction} {threshold:,.2f}"
+            name_item = QTableWidgetItem(target)
+            name_item.setData(Qt.UserRole, alert_id)
+            self.table.setItem(row_idx, 0, name_item)
+            self.table.setItem(row_idx, 1, QTableWidgetItem(condition))
+            self.table.setItem(row_idx, 2, QTableWidgetItem("Active" if active else ("Triggered" if triggered_at else "Deleted")))
+            self.table.setItem(row_idx, 3, QTableWidgetItem(triggered_at or ""))
+
+    def load_events(self):
+        self.events_list.clear()
+        for event_id, message, created_at, seen in alerts.recent_events(self.engine.db_path, self.username):
+            self.events_list.addItem(f"[{created_at}] {message}")
+
+    def add_alert(self):
+        kind = "price" if self.kind_box.currentIndex() == 0 else "portfolio"
+        symbol = self.symbol_box.currentText().strip().upper() if kind == "price" else None
+        direction = self.condition_box.currentData()
+        try:
+            value = float(self.value_input.text())
+            if value <= 0: raise ValueError
+        except ValueError:
+            QMessageBox.warning(self, "Invalid Value", "Enter a positive number."); return
+        if kind == "price" and not symbol:
+            QMessageBox.warning(self, "Missing Coin", "Choose a coin symbol."); return
+        base_value = None
+        if direction == "move":
+            base_value = self.current_value(kind, symbol)
+            if base_value is None:
+                QMessageBox.warning(self, "No Price", "There is no current value to measure the move from. Refresh prices first."); return
+        try:
+            self.engine.add_alert(
+                self.username, kind, direction,
+                threshold=None if direction == "move" else value, symbol=symbol,
+                percent=value if direction == "move" else None, base_value=base_value,
+                notify_email=self.email_check.isChecked()
+            )
+        except Exception as e:
+            QMessageBox.critical(self, "Error", str(e)); return
+        self.value_input.clear()
+        self.load_alerts()
+
+    def delete_selected(self):
+        rows = {index.row() for index in self.table.selectionModel().selectedRows()}
+        for row in rows:
+            self.engine.delete_alert(self.table.item(row, 0).data(Qt.UserRole))
+        if rows:
+            self.load_alerts()
@@ -0,0 +1,201 @@
+# src/analytics.py
+
+import os
+import sqlite3
+import time
+
+from src import history
+
+# Risk and performance metrics over the stored portfolio history.
+#
+# The raw series is kept in memory per user and only extended with points recorded
+# since the last call. Metrics for a window are computed in a few vectorised NumPy
+# passes and cached per (user, window) together with the history version they were
+# computed from, so re-opening the dialog or switching back to a window is free
+# until a new point is recorded.
+#
+# A window is one of the WINDOWS presets, a number of seconds back from the latest
+# point, or an explicit (start, end) pair of epoch seconds (either end may be None).
+
+WINDOWS = {
+    "1 Day": 86400,
+    "1 Week": 7 * 86400,
+    "1 Month": 30 * 86400,
+    "3 Months": 90 * 86400,
+    "1 Year": 365 * 86400,
+    "All": None,
+}
+# Horizon of the rolling return plotted for each window.
+ROLLING = {"1 Day": 3600, "1 Week": 86400, "1 Month": 86400, "3 Months": 7 * 86400, "1 Year": 30 * 86400, "All": 30 * 86400}
+# Rolling horizon for other windows, by span: (longest span, horizon).
+ROLLING_BY_SPAN = ((2 * 86400, 3600), (60 * 86400, 86400), (180 * 86400, 7 * 86400))
+SECONDS_PER_YEAR = 365.25 * 86400
+
+_series = {}        # (db_path, username) -> (ids, ts, values)
+_metrics = {}       # (db_path, username, window) -> (version, metrics)
+_contributions = {} # (db_path, username, window) -> (version, rows)
+
+
+def load_series(db_path, username):
+    """(ts, values, version) for the user's whole history, read incrementally."""
+    import numpy as np
+    key = (os.path.abspath(db_path), username)
+    ids, ts, values = _series.get(key) or (np.empty(0, dtype=np.int64), np.empty(0), np.empty(0))
+    new_ids, new_ts, new_values = history.load_history(db_path, username, after_id=int(ids[-1]) if len(ids) else 0)
+    if len(new_ids):
+        ids, ts, values = np.concatenate([ids, new_ids]), np.concatenate([ts, new_ts]), np.concatenate([values, new_values])
+        _series[key] = (ids, ts, values)
+    return ts, values, int(ids[-1]) if len(ids) else 0
+
+
+def window_slice(ts, seconds, now=None):
+    import numpy as np
+    if seconds is None or not len(ts):
+        return slice(0, len(ts))
+    now = ts[-1] if now is None else now
+    return slice(int(np.searchsorted(ts, now - seconds, side="left")), len(ts))
+
+
+def window_bounds(window):
+    """(seconds, start, end) for a preset name, a number of seconds or a (start, end) pair.
+
+    Exactly one of seconds or (start, end) is meaningful; seconds None with no
+    bounds means all history.
+    """
+    if isinstance(window, str):
+        if window not in WINDOWS:
+            raise ValueError(f"Unknown window: {window} (use one of {', '.join(WINDOWS)}, seconds or (start, end))")
+        return WINDOWS[window], None, None
+    if isinstance(window, (tuple, list)):
+        start, end = window
+        if start is not None and end is not None and start >= end:
+            raise ValueError("A window must start before it ends.")
+        return None, start, end
+    if window is None or window <= 0:
+        raise ValueError("A window must be a positive number of seconds.")
+    return float(window), None, None
+
+
+def rolling_horizon(window, span):
+    """Rolling-return horizon for `window`: the preset's, else one suited to a span of `span` seconds."""
+    if isinstance(window, str):
+        return ROLLING[window]
+    for longest, horizon in ROLLING_BY_SPAN:
+        if span <= longest:
+            return horizon
+    return 30 * 86400
+
+
+def range_slice(ts, start, end):
+    import numpy as np
+    lo = 0 if start is None else int(np.searchsorted(ts, start, side="left"))
+    hi = len(ts) if end is None else int(np.searchsorted(ts, end, side="right"))
+    return slice(lo, max(lo, hi))
+
+
+def compute_metrics(ts, values, rolling_seconds=86400):
+    """Metrics of one (ts, values) series.
+
+    Returns a dict with points, start/end, total_return, annualised volatility and
+    Sharpe-like ratio (zero risk-free rate) of log returns, max drawdown with its
+    peak/trough times, and the rolling-return and drawdown series for plotting.
+    """
+    import numpy as np
+    keep = values > 0
+    ts, values = ts[keep], values[keep]
+    result = {"points": len(ts)}
+    if len(ts) < 2:
+        return result
+    result.update(start=float(ts[0]), end=float(ts[-1]), first_value=float(values[0]), last_value=float(values[-1]))
+    result["total_return"] = float(values[-1] / values[0] - 1)
+
+    log_returns = np.diff(np.log(values))
+    dt = np.diff(ts)
+    # Irregular sampling: annualise with the typical spacing between points.
+    step = float(np.median(dt[dt > 0])) if np.any(dt > 0) else 1.0
+    periods_per_year = SECONDS_PER_YEAR / step
+    std = float(log_returns.std(ddof=1)) if len(log_returns) > 1 else 0.0
+    result["volatility"] = std * np.sqrt(periods_per_year)
+    result["sharpe"] = float(log_returns.mean() / std * np.sqrt(periods_per_year)) if std > 0 else None
+
+    peaks = np.maximum.accumulate(values)
+    drawdown = values / peaks - 1
+    trough = int(np.argmin(drawdown))
+    peak = int(np.argmax(values[:trough + 1])) if trough else 0
+    result.update(max_drawdown=float(drawdown[trough]), drawdown_peak=float(ts[peak]), drawdown_trough=float(ts[trough]))
+    result["drawdown_series"] = (ts, drawdown)
+
+    # Return over the trailing `rolling_seconds` at every point that has that much history.
+    base = np.searchsorted(ts, ts - rolling_seconds, side="right") - 1
+    valid = base >= 0
+    result["rolling_series"] = (ts[valid], values[valid] / values[base[valid]] - 1)
+    result["rolling_seconds"] = rolling_seconds
+    return result
+
+
+def portfolio_metrics(db_path, username, window="1 Month"):
+    """compute_metrics over a window: a WINDOWS name, seconds back from the latest point, or (start, end)."""
+    seconds, start, end = window_bounds(window)
+    ts, values, version = load_series(db_path, username)
+    key = (os.path.abspath(db_path), username, tuple(window) if isinstance(window, list) else window)
+    cached = _metrics.get(key)
+    if cached and cached[0] == version:
+        return cached[1]
+    part = window_slice(ts, seconds) if start is None and end is None else range_slice(ts, start, end)
+    span = float(ts[part][-1] - ts[part][0]) if len(ts[part]) else 0.0
+    metrics = compute_metrics(ts[part], values[part], rolling_horizon(window, span))
+    _metrics[key] = (version, metrics)
+    return metrics
+
+
+def coin_contributions(db_path, username, window="1 Month", now=None):
+    """Per-coin share of the USD change over the window, at current holdings.
+
+    `window` is a WINDOWS name, seconds back from `now`, or a (start, end) pair.
+    Rows are (symbol, holdings, start_price, end_price, change, contribution_usd,
+    contribution) where contribution is relative to the portfolio's USD value at
+    the start of the window. Prices come from price_history; coins without a
+    recorded price are left out.
+
+    Only reads: the tables and the user_wallets counter are created by the
+    database writer's schema setup (schema.ensure_schema). Until that has run
+    there is nothing to show, or nothing to key a cache on.
+    """
+    from src.schema import table_exists
+    from src.versions import get_version, is_tracked
+    now = time.time() if now is None else now
+    seconds, start, end = window_bounds(window)
+    window = tuple(window) if isinstance(window, list) else window
+    conn = sqlite3.connect(db_path)
+    try:
+        if not (table_exists(conn, "price_history") and table_exists(conn, "user_wallets")):
+            return []
+        tracked = is_tracked(conn, "user_wallets")
+        version = (get_version(conn, "user_wallets") if tracked else None,
+                   conn.execute("SELECT MAX(id) FROM price_history").fetchone()[0], int(now // 60))
+        key = (os.path.abspath(db_path), username, window)
+        cached = _contributions.get(key)
+        if tracked and cached and cached[0] == version:
+            return cached[1]
+        holdings = conn.execute(
+            "SELECT UPPER(symbol), SUM(holdings) FROM user_wallets WHERE username = ? GROUP BY UPPER(symbol)", (username,)
+        ).fetchall()
+        if start is None and end is None:
+            start_ts, end_ts = (now - seconds if seconds else 0), now
+        else:
+            start_ts, end_ts = start or 0, now if end is None else end
+        rows = []
+        for symbol, amount in holdings:
+            p0, p1 = history.price_at(conn, symbol, start_ts), history.price_at(conn, symbol, end_ts)
+            if p0 is None or p1 is None:
+                continue
+            rows.append([symbol, amount, p0, p1, p1 / p0 - 1 if p0 else 0.0, amount * (p1 - p0)])
+    finally:
+        conn.close()
+    start_value = sum(r[1] * r[2] for r in rows)
+    for r in rows:
+        r.append(r[5] / start_value if start_value else 0.0)
+    rows = [tuple(r) for r in sorted(rows, key=lambda r: r[5], reverse=True)]
+    if tracked:
+        _contributions[key] = (version, rows)
+    return rows
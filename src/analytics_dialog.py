@@ -0,0 +1,117 @@
+# src/analytics_dialog.py
+
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QGridLayout, QComboBox, QLabel, QTableWidget, QTableWidgetItem,
+    QHeaderView, QAbstractItemView
+)
+import datetime
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+
+from src import analytics, perf
+from src.charts import lttb
+
+METRICS = [
+    ("total_return", "Return"), ("volatility", "Volatility (ann.)"), ("sharpe", "Sharpe-like ratio"),
+    ("max_drawdown", "Max drawdown"), ("points", "Data points"), ("drawdown_trough", "Drawdown trough"),
+]
+
+
+def format_horizon(seconds):
+    return f"{seconds // 86400}d" if seconds >= 86400 else f"{seconds // 3600}h"
+
+
+class AnalyticsDialog(QDialog):
+    """Risk and performance metrics for one user over a selectable window.
+
+    Numbers come from src/analytics.py, which caches them per window until new
+    history is recorded, so switching windows back and forth does not recompute.
+    """
+
+    def __init__(self, db_path, username, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.username = username
+        self.setWindowTitle("Portfolio Analytics"); self.setFixedSize(720, 640)
+
+        layout = QVBoxLayout(self)
+        top = QHBoxLayout()
+        top.addWidget(QLabel("Window:"))
+        self.window_box = QComboBox(); self.window_box.addItems(list(analytics.WINDOWS))
+        self.window_box.setCurrentText("1 Month")
+        self.window_box.currentTextChanged.connect(self.refresh)
+        top.addWidget(self.window_box); top.addStretch()
+        layout.addLayout(top)
+
+        grid = QGridLayout()
+        self.metric_labels = {}
+        for i, (key, title) in enumerate(METRICS):
+            grid.addWidget(QLabel(title + ":"), i // 3, (i % 3) * 2)
+            self.metric_labels[key] = QLabel("-"); grid.addWidget(self.metric_labels[key], i // 3, (i % 3) * 2 + 1)
+        layout.addLayout(grid)
+
+        self.figure = Figure(); self.canvas = FigureCanvas(self.figure); layout.addWidget(self.canvas, 3)
+        self.rolling_ax, self.drawdown_ax = self.figure.subplots(2, 1, sharex=True)
+        tz = datetime.datetime.now().astimezone().tzinfo
+        self.rolling_ax.xaxis_date(tz=tz)
+        self.rolling_line, = self.rolling_ax.plot([], [], color='#2980B9')
+        self.drawdown_line, = self.drawdown_ax.plot([], [], color='#C0392B')
+        self.rolling_ax.grid(True); self.drawdown_ax.grid(True)
+        self.drawdown_ax.set_ylabel("Drawdown %")
+        self.figure.autofmt_xdate()
+
+        self.table = QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(["Coin", "Start (USD)", "End (USD)", "Change %", "Contribution %"])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        layout.addWidget(self.table, 2)
+
+    @perf.traced("chart.analytics")
+    def refresh(self, window=None):
+        """Recompute (or fetch cached) metrics for the window. Returns False if there is no history."""
+        window = window or self.window_box.currentText()
+        metrics = analytics.portfolio_metrics(self.db_path, self.username, window)
+        for key, label in self.metric_labels.items():
+            label.setText(self.format_metric(key, metrics.get(key)))
+        self.plot(metrics)
+        self.fill_contributions(analytics.coin_contributions(self.db_path, self.username, window))
+        return metrics["points"] > 0
+
+    def format_metric(self, key, value):
+        if value is None:
+            return "-"
+        if key == "points":
+            return f"{value:,}"
+        if key == "sharpe":
+            return f"{value:.2f}"
+        if key == "drawdown_trough":
+            return datetime.datetime.fromtimestamp(value).strftime("%Y-%m-%d %H:%M")
+        return f"{value * 100:+.2f}%" if key != "volatility" else f"{value * 100:.2f}%"
+
+    def plot(self, metrics):
+        width = max(self.width(), 100)
+        for line, key, scale in [(self.rolling_line, "rolling_series", 100), (self.drawdown_line, "drawdown_series", 100)]:
+            ts, values = metrics.get(key, ([], []))
+            if len(ts):
+                x, y = lttb(analytics_days(ts), values * scale, width)
+                line.set_data(x, y)
+            else:
+                line.set_data([], [])
+        horizon = metrics.get("rolling_seconds")
+        self.rolling_ax.set_ylabel(f"{format_horizon(horizon)} return %" if horizon else "Return %")
+        for ax in (self.rolling_ax, self.drawdown_ax):
+            ax.relim(); ax.autoscale_view()
+        self.canvas.draw_idle()
+
+    def fill_contributions(self, rows):
+        self.table.setRowCount(len(rows))
+        for row_idx, (symbol, holdings, start, end, change, contribution_usd, contribution) in enumerate(rows):
+            cells = [symbol, f"{start:,.4f}", f"{end:,.4f}", f"{change * 100:+.2f}%", f"{contribution * 100:+.2f}%"]
+            for col, text in enumerate(cells):
+                self.table.setItem(row_idx, col, QTableWidgetItem(text))
+
+
+def analytics_days(ts):
+    """Unix seconds -> matplotlib date numbers."""
+    import matplotlib.dates as mdates
+    return mdates.date2num(datetime.datetime(1970, 1, 1)) + ts / 86400.0
@@ -0,0 +1,384 @@
+# src/api_server.py
+
+import sqlite3
+import os
+import sys
+import json
+import hashlib
+import pathlib
+import argparse
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qsl, unquote
+
+# Read-only JSON API over the CoinTether database for other local tools.
+#
+#   GET /users?limit=&after=                 users, keyset-paged by username
+#   GET /users/<name>                        one user with portfolio totals
+#   GET /users/<name>/wallet                 positions
+#   GET /users/<name>/valuation              positions valued with the cached prices
+#   GET /users/<name>/history?after=&limit=&since=   portfolio history, paged by point id
+#   GET /valuations?limit=&after=            every user's USD/INR totals
+#   GET /prices                              the price cache the dashboard keeps
+#
+# Responses are built once and kept in memory together with the data version they
+# were built from: the data_versions counters (src/versions.py), the history id
+# sequence and the price cache's mtime. Any write through the app or the CLI moves
+# one of those, so a cached body is served until something changes and then
+# rebuilt once, however many clients ask at the same moment. Every response has
+# an ETag and If-None-Match gets a 304. The server never calls CoinGecko and its
+# queries run on read-only connections, so clients cannot block the app's writes.
+#
+#   python -m src.api_server --port 8765
+
+DEFAULT_PORT = 8765
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+CACHE_SIZE = 1024
+MAX_HEADER_BYTES = 16384
+
+
+def get_database_path():
+    if getattr(sys, 'frozen', False):
+        app_dir = os.path.dirname(sys.executable)
+        return os.path.join(app_dir, "data", "users.db")
+    else:
+        return os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'users.db'))
+
+db_path = get_database_path()
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+def page_params(query):
+    try:
+        limit = int(query.get("limit", PAGE_SIZE))
+    except ValueError:
+        raise ApiError(400, "limit must be an integer")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ApiError(400, f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return limit, query.get("after")
+
+
+class ApiServer:
+    """The HTTP service. `start()` runs it on its own thread (for embedding in the
+    app or a test); `serve()` is the coroutine for callers that own a loop."""
+
+    def __init__(self, db_path=db_path, host="127.0.0.1", port=DEFAULT_PORT, workers=4):
+        self.db_path = db_path
+        self.host = host
+        self.port = port
+        self.cache = OrderedDict()      # target -> (version, etag, body)
+        self.building = {}              # target -> (version, future) being built
+        self.hits = self.misses = self.not_modified = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api")
+        # Version checks get their own thread: they never wait behind a build, and
+        # the event loop never waits on SQLite or the filesystem.
+        self._version_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="api-version")
+        self._local = threading.local()
+        self._version_conn = None
+        self._prices, self._prices_mtime = {}, None
+        self._value_cache = None
+        self._value_lock = threading.Lock()
+        self._loop = None
+        self._server = None
+        self._ready = threading.Event()
+        self._thread = None
+        self._writers = set()
+
+    # -------- lifecycle --------
+    def prepare(self):
+        """Create the tables and triggers the read-only connections rely on."""
+        from src.versions import ensure_versions
+        from src.history import ensure_history_table
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute("CREATE TABLE IF NOT EXISTS user_flags (username TEXT PRIMARY KEY, suspended INTEGER DEFAULT 0)")
+            ensure_history_table(conn)
+            ensure_versions(conn)
+            conn.commit()
+        finally:
+            conn.close()
+
+    async def serve(self):
+        self.prepare()
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, backlog=1024)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="api-server", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._server.close)
+            self._thread.join(5)
+        self._executor.shutdown(wait=False)
+        self._version_executor.shutdown(wait=False)
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self.serve())
+        except asyncio.CancelledError:
+            pass
+        finally:
+            # Idle keep-alive connections are still waiting for their next request.
+            for writer in list(self._writers):
+                writer.close()
+            tasks = asyncio.all_tasks(self._loop)
+            self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self._loop.close()
+
+    # -------- data access --------
+    def _readonly(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            uri = pathlib.Path(os.path.abspath(self.db_path)).as_uri() + "?mode=ro"
+            conn = self._local.conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        return conn
+
+    def data_version(self):
+        if self._version_conn is None:
+            uri = pathlib.Path(os.path.abspath(self.db_path)).as_uri() + "?mode=ro"
+            self._version_conn = sqlite3.connect(uri, uri=True)
+        conn = self._version_conn
+        tables = tuple(conn.execute("SELECT name, version FROM data_versions ORDER BY name"))
+        history = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'portfolio_history'").fetchone()
+        return tables, history[0] if history else 0, self._price_mtime()
+
+    def _price_mtime(self):
+        from src.price_fetcher import price_cache_path
+        try:
+            return os.stat(price_cache_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def prices(self):
+        mtime = self._price_mtime()
+        if mtime != self._prices_mtime:
+            from src.price_fetcher import load_price_cache
+            self._prices, self._prices_mtime = load_price_cache(), mtime
+        return self._prices
+
+    # -------- HTTP --------
+    async def _handle(self, reader, writer):
+        self._writers.add(writer)
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                if len(head) > MAX_HEADER_BYTES:
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    self._write(writer, 400, {"error": "malformed request line"}, keep_alive=False)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                await self._respond(writer, method, target, headers, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _respond(self, writer, method, target, headers, keep_alive):
+        if method not in ("GET", "HEAD"):
+            self._write(writer, 405, {"error": "read-only API"}, keep_alive, extra={"Allow": "GET, HEAD"}); return
+        try:
+            etag, body = await self._cached(target)
+        except ApiError as e:
+            self._write(writer, e.status, {"error": str(e)}, keep_alive); return
+        except Exception as e:
+            self._write(writer, 500, {"error": str(e)}, keep_alive); return
+        if etag in [t.strip() for t in headers.get("if-none-match", "").split(",")]:
+            self.not_modified += 1
+            self._write(writer, 304, None, keep_alive, extra={"ETag": etag}); return
+        self._write(writer, 200, body, keep_alive, extra={"ETag": etag}, head_only=method == "HEAD")
+
+    def _write(self, writer, status, payload, keep_alive, extra=None, head_only=False):
+        if payload is None:
+            body = b""
+        elif isinstance(payload, bytes):
+            body = payload
+        else:
+            body = json.dumps(payload).encode()
+        headers = [f"HTTP/1.1 {status} {REASONS.get(status, '')}", "Cache-Control: no-cache",
+                   f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if status != 304:
+            headers += ["Content-Type: application/json", f"Content-Length: {len(body)}"]
+        headers += [f"{k}: {v}" for k, v in (extra or {}).items()]
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1"))
+        if status != 304 and not head_only:
+            writer.write(body)
+
+    async def _cached(self, target):
+        """(etag, body) for `target`, rebuilt only when the data version has moved."""
+        parts = urlsplit(target)
+        key = parts.path.rstrip("/") + "?" + "&".join(f"{k}={v}" for k, v in sorted(parse_qsl(parts.query)))
+        version = await asyncio.get_running_loop().run_in_executor(self._version_executor, self.data_version)
+        entry = self.cache.get(key)
+        if entry and entry[0] == version:
+            self.cache.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+        # Concurrent requests for the same stale resource share one build.
+        pending = self.building.get(key)
+        if pending is None or pending[0] != version:
+            self.misses += 1
+            pending = self.building[key] = (version, asyncio.ensure_future(self._rebuild(key, version, parts)))
+        return await asyncio.shield(pending[1])
+
+    async def _rebuild(self, key, version, parts):
+        try:
+            body = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._build, parts.path, dict(parse_qsl(parts.query)))
+        finally:
+            if self.building.get(key, (None,))[0] == version:
+                del self.building[key]
+        etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+        self.cache[key] = (version, etag, body)
+        self.cache.move_to_end(key)
+        while len(self.cache) > CACHE_SIZE:
+            self.cache.popitem(last=False)
+        return etag, body
+
+    def _build(self, path, query):
+        segments = [unquote(s) for s in path.strip("/").split("/") if s]
+        if not segments:
+            result = {"endpoints": ["/users", "/users/<name>", "/users/<name>/wallet", "/users/<name>/valuation",
+                                   "/users/<name>/history", "/valuations", "/prices"]}
+        elif segments == ["users"]:
+            result = self.users(query)
+        elif segments == ["valuations"]:
+            result = self.valuations(query)
+        elif segments == ["prices"]:
+            result = self.prices()
+        elif segments[0] == "users" and len(segments) in (2, 3):
+            username = segments[1]
+            action = segments[2] if len(segments) == 3 else "user"
+            handler = {"user": self.user, "wallet": self.wallet, "valuation": self.valuation, "history": self.history}.get(action)
+            if handler is None:
+                raise ApiError(404, f"no such resource: {path}")
+            self._require_user(username)
+            result = handler(username, query)
+        else:
+            raise ApiError(404, f"no such resource: {path}")
+        return json.dumps(result).encode()
+
+    # -------- resources --------
+    def _require_user(self, username):
+        if not self._readonly().execute("SELECT 1 FROM users WHERE username = ?", (username,)).fetchone():
+            raise ApiError(404, f"no such user: {username}")
+
+    def users(self, query):
+        limit, after = page_params(query)
+        rows = self._readonly().execute("""
+            SELECT u.username, u.name, u.email, COALESCE(f.suspended, 0) FROM users u
+            LEFT JOIN user_flags f ON f.username = u.username
+            WHERE u.username > ? ORDER BY u.username LIMIT ?
+        """, (after or "", limit + 1)).fetchall()
+        items = [{"username": u, "name": n, "email": e, "status": "Suspended" if s else "Active"} for u, n, e, s in rows[:limit]]
+        return {"items": items, "next": items[-1]["username"] if len(rows) > limit else None}
+
+    def user(self, username, query):
+        name, email, suspended = self._readonly().execute("""
+            SELECT u.name, u.email, COALESCE(f.suspended, 0) FROM users u
+            LEFT JOIN user_flags f ON f.username = u.username WHERE u.username = ?
+        """, (username,)).fetchone()
+        totals = self._value_cache_get().get(username, {"usd": 0.0, "inr": 0.0})
+        return {"username": username, "name": name, "email": email, "status": "Suspended" if suspended else "Active", "totals": totals}
+
+    def wallet(self, username, query):
+        rows = self._readonly().execute(
+            "SELECT id, coin_name, symbol, holdings FROM user_wallets WHERE username = ? ORDER BY id", (username,)
+        ).fetchall()
+        return {"items": [{"id": i, "coin": c, "symbol": s, "holdings": h} for i, c, s, h in rows]}
+
+    def valuation(self, username, query):
+        from src.valuation import value_positions
+        rows = self._readonly().execute(
+            "SELECT coin_name, symbol, holdings FROM user_wallets WHERE username = ? ORDER BY id", (username,)
+        ).fetchall()
+        book = value_positions(rows, self.prices())
+        items = [{"coin": c, "symbol": s, "holdings": h, "usd": usd, "inr": inr} for c, s, h, usd, inr in book.rows()]
+        return {"items": items, "totals": book.totals}
+
+    def history(self, username, query):
+        from src.history import iter_history
+        limit, after = page_params(query)
+        try:
+            after_id = int(after or 0)
+            since = float(query["since"]) if "since" in query else None
+        except ValueError:
+            raise ApiError(400, "after and since must be numbers")
+        # Read limit + 1 points at a time after the cursor; only points before `since` cost extra reads.
+        points = []
+        for ids, ts, values in iter_history(self._readonly(), username, limit + 1, after_id):
+            if since is not None:
+                keep = ts >= since
+                ids, ts, values = ids[keep], ts[keep], values[keep]
+            points += zip(ids.tolist(), ts.tolist(), values.tolist())
+            if len(points) > limit:
+                break
+        items = [{"id": i, "ts": t, "value": v} for i, t, v in points[:limit]]
+        return {"items": items, "next": str(items[-1]["id"]) if len(points) > limit else None}
+
+    def _value_cache_get(self):
+        from src.valuation import UserValueCache
+        with self._value_lock:
+            if self._value_cache is None:
+                self._value_cache = UserValueCache(self.db_path)
+            return self._value_cache.get(self.prices())
+
+    def valuations(self, query):
+        limit, after = page_params(query)
+        values = self._value_cache_get()
+        usernames = [row[0] for row in self._readonly().execute(
+            "SELECT username FROM users WHERE username > ? ORDER BY username LIMIT ?", (after or "", limit + 1)
+        )]
+        items = [{"username": u, **values.get(u, {"usd": 0.0, "inr": 0.0})} for u in usernames[:limit]]
+        return {"items": items, "next": items[-1]["username"] if len(usernames) > limit else None}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.api_server", description="Read-only local JSON API over CoinTether data.")
+    parser.add_argument("--db", default=db_path)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+    server = ApiServer(args.db, port=args.port)
+    print(f"Serving {args.db} on http://127.0.0.1:{args.port}/", file=sys.stderr)
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
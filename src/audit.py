@@ -0,0 +1,89 @@
+# src/audit.py
+
+import time
+import sqlite3
+
+# Append-only record of admin actions: one row per (actor, action, target), so a
+# batch that suspends 500 users is 500 rows written with one executemany, and
+# "everything that happened to user000123" is an index lookup.
+#
+# Writes that change data call record() inside the same transaction as the
+# change (see AdminDashboard.apply_action), so an action and its audit row
+# commit or roll back together. Reads page with a keyset on id -- "rows older
+# than the last one on screen" -- so page 500 costs the same as page 1 and the
+# dashboard never holds more than one page in memory.
+
+ACTIONS = ["suspend", "unban", "delete", "reset_password", "note", "export", "change_password"]
+PAGE_SIZE = 100
+
+
+def ensure_audit_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS admin_audit (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts REAL NOT NULL,
+            actor TEXT NOT NULL,
+            action TEXT NOT NULL,
+            target TEXT,
+            detail TEXT
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_admin_audit_target ON admin_audit (target, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_admin_audit_action ON admin_audit (action, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_admin_audit_actor ON admin_audit (actor, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_admin_audit_ts ON admin_audit (ts)")
+
+
+def record(conn, actor, action, targets=(None,), detail=None, ts=None):
+    """Append one row per target; the caller commits."""
+    ensure_audit_table(conn)
+    ts = time.time() if ts is None else ts
+    conn.executemany(
+        "INSERT INTO admin_audit (ts, actor, action, target, detail) VALUES (?, ?, ?, ?, ?)",
+        [(ts, actor, action, target, detail) for target in targets]
+    )
+    return len(targets)
+
+
+def page(conn, before_id=None, after_id=None, limit=PAGE_SIZE, actor=None, action=None, target=None, text=None,
+         since=None, until=None, exact=False):
+    """One page of (id, ts, actor, action, target, detail), newest first.
+
+    `before_id` pages towards older rows, `after_id` towards newer ones; both are
+    keysets on id. `target` matches as a prefix (the whole name with `exact`),
+    `text` anywhere in target or detail.
+    """
+    where, params = [], []
+    if before_id is not None: where.append("id < ?"); params.append(before_id)
+    if after_id is not None: where.append("id > ?"); params.append(after_id)
+    if actor: where.append("actor = ?"); params.append(actor)
+    if action: where.append("action = ?"); params.append(action)
+    if target and exact: where.append("target = ?"); params.append(target)
+    elif target: where.append("target >= ? AND target < ?"); params += [target, target + "\uffff"]
+    if text:
+        where.append("(target LIKE ? ESCAPE '\\' OR detail LIKE ? ESCAPE '\\')")
+        pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        params += [pattern, pattern]
+    # ts grows with id, so a date bound becomes an id bound: one seek on the ts index.
+    first_at = "COALESCE((SELECT id FROM admin_audit WHERE ts >= ? ORDER BY ts LIMIT 1), 1 << 62)"
+    if since is not None: where.append(f"id >= {first_at}"); params.append(since)
+    if until is not None: where.append(f"id < {first_at}"); params.append(until)
+    # Paging newer means walking up from after_id; the rows are flipped back to newest first.
+    order = "ASC" if after_id is not None else "DESC"
+    rows = conn.execute(
+        f"SELECT id, ts, actor, action, target, detail FROM admin_audit {'WHERE ' + ' AND '.join(where) if where else ''} "
+        f"ORDER BY id {order} LIMIT ?", params + [limit]
+    ).fetchall()
+    return rows[::-1] if order == "ASC" else rows
+
+
+def actors(conn):
+    return [row[0] for row in conn.execute("SELECT DISTINCT actor FROM admin_audit ORDER BY actor")]
+
+
+def connect(db_path):
+    """Connection for the viewer; creates the table first if this database has none."""
+    conn = sqlite3.connect(db_path, timeout=30)
+    ensure_audit_table(conn)
+    conn.commit()
+    return conn
@@ -0,0 +1,112 @@
+# src/audit_dialog.py
+
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QComboBox, QLineEdit, QPushButton, QLabel, QDateEdit, QCheckBox,
+    QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView
+)
+from PyQt5.QtCore import QTimer, QDate, QDateTime, QTime
+import datetime
+
+from src import audit
+
+
+class AuditLogDialog(QDialog):
+    """Admin audit log, one keyset page at a time, filtered by action, actor, user, text and date.
+
+    Only the page on screen is held in memory; Older / Newer move the keyset
+    (the oldest or newest id shown) instead of using OFFSET.
+    """
+
+    COLUMNS = ["Time", "Admin", "Action", "User", "Details"]
+
+    def __init__(self, db_path, parent=None):
+        super().__init__(parent)
+        self.conn = audit.connect(db_path)
+        self.rows = []
+        self.setWindowTitle("Audit Log"); self.resize(860, 560)
+
+        layout = QVBoxLayout(self)
+        filters = QHBoxLayout()
+        self.action_box = QComboBox(); self.action_box.addItem("All actions", None)
+        for action in audit.ACTIONS:
+            self.action_box.addItem(action.replace("_", " ").title(), action)
+        self.actor_box = QComboBox(); self.actor_box.addItem("All admins", None)
+        for actor in audit.actors(self.conn):
+            self.actor_box.addItem(actor, actor)
+        self.target_input = QLineEdit(); self.target_input.setPlaceholderText("User (prefix)")
+        self.text_input = QLineEdit(); self.text_input.setPlaceholderText("Search details...")
+        self.since_check = QCheckBox("Since")
+        self.since_edit = QDateEdit(QDate.currentDate().addMonths(-1)); self.since_edit.setCalendarPopup(True)
+        for widget in [self.action_box, self.actor_box, self.target_input, self.text_input, self.since_check, self.since_edit]:
+            filters.addWidget(widget)
+        layout.addLayout(filters)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.horizontalHeader().setSectionResizeMode(4, QHeaderView.Stretch)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        layout.addWidget(self.table)
+
+        nav = QHBoxLayout()
+        self.newest_btn = QPushButton("Newest"); self.newest_btn.clicked.connect(lambda: self.load())
+        self.newer_btn = QPushButton("< Newer"); self.newer_btn.clicked.connect(self.newer)
+        self.older_btn = QPushButton("Older >"); self.older_btn.clicked.connect(self.older)
+        self.page_label = QLabel()
+        for widget in [self.newest_btn, self.newer_btn, self.page_label, self.older_btn]:
+            nav.addWidget(widget)
+        layout.addLayout(nav)
+
+        # Typing re-queries after a short pause rather than on every keystroke.
+        self.search_timer = QTimer(self); self.search_timer.setSingleShot(True); self.search_timer.setInterval(250)
+        self.search_timer.timeout.connect(lambda: self.load())
+        self.target_input.textChanged.connect(self.search_timer.start)
+        self.text_input.textChanged.connect(self.search_timer.start)
+        self.action_box.currentIndexChanged.connect(lambda _: self.load())
+        self.actor_box.currentIndexChanged.connect(lambda _: self.load())
+        self.since_check.toggled.connect(lambda _: self.load())
+        self.since_edit.dateChanged.connect(lambda _: self.since_check.isChecked() and self.load())
+        self.load()
+
+    def filters(self):
+        since = None
+        if self.since_check.isChecked():
+            since = QDateTime(self.since_edit.date(), QTime(0, 0)).toSecsSinceEpoch()
+        return dict(action=self.action_box.currentData(), actor=self.actor_box.currentData(),
+                    target=self.target_input.text().strip() or None, text=self.text_input.text().strip() or None,
+                    since=since)
+
+    def load(self, before_id=None, after_id=None):
+        rows = audit.page(self.conn, before_id=before_id, after_id=after_id, limit=audit.PAGE_SIZE + 1, **self.filters())
+        if after_id is not None:
+            more_newer, rows = len(rows) > audit.PAGE_SIZE, rows[-audit.PAGE_SIZE:]
+            more_older = True
+        else:
+            more_older, rows = len(rows) > audit.PAGE_SIZE, rows[:audit.PAGE_SIZE]
+            more_newer = before_id is not None
+        if not rows and (before_id is not None or after_id is not None):
+            return      # stepped past the end; keep the current page
+        self.rows = rows
+        self.older_btn.setEnabled(more_older); self.newer_btn.setEnabled(more_newer)
+        self.fill()
+
+    def older(self):
+        if self.rows: self.load(before_id=self.rows[-1][0])
+
+    def newer(self):
+        if self.rows: self.load(after_id=self.rows[0][0])
+
+    def fill(self):
+        self.table.setRowCount(len(self.rows))
+        for row_idx, (entry_id, ts, actor, action, target, detail) in enumerate(self.rows):
+            when = datetime.datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+            for col, text in enumerate([when, actor, action.replace("_", " "), target or "", detail or ""]):
+                self.table.setItem(row_idx, col, QTableWidgetItem(text))
+        self.page_label.setText(
+            f"{len(self.rows)} entries" + (f" (#{self.rows[-1][0]:,} - #{self.rows[0][0]:,})" if self.rows else "")
+        )
+
+    def done(self, result):
+        self.conn.close()
+        super().done(result)
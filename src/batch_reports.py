@@ -0,0 +1,178 @@
+# src/batch_reports.py
+
+import sqlite3
+import os
+import sys
+import json
+import re
+import time
+import argparse
+from itertools import groupby
+
+from src import reports
+from src.valuation import Valuation, wallet_symbols
+
+# Headless nightly job: values every user's portfolio from one shared price fetch,
+# renders the reports in a process pool and hands them to the mail queue.
+#
+#   python -m src.batch_reports                      # PDF + email for every user
+#   python -m src.batch_reports --format text --no-email --out ./reports
+#
+# Schedule it with cron or Windows Task Scheduler, e.g. nightly at 02:00:
+#   0 2 * * *  cd /path/to/CoinTether && python -m src.batch_reports
+
+CHUNK_SIZE = 500        # users per pool task; stays under SQLite's 999 bound-parameter limit
+SUBJECT = "CoinTether Portfolio Report"
+
+
+def get_database_path():
+    if getattr(sys, 'frozen', False):
+        app_dir = os.path.dirname(sys.executable)
+        return os.path.join(app_dir, 'users.db')
+    else:
+        app_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+        return os.path.join(app_dir, 'users.db')
+
+db_path = get_database_path()
+
+
+def default_output_dir():
+    return os.path.join(os.path.expanduser("~"), "CoinTether Reports", time.strftime("%Y-%m-%d"))
+
+
+def ensure_wallet_index(db_path):
+    # Each pool task selects ~CHUNK_SIZE users' wallets; without this every task scans the table.
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_user_wallets_username ON user_wallets (username)")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def report_recipients(db_path):
+    """(username, email) of every active user who holds at least one coin, in id order."""
+    conn = sqlite3.connect(db_path)
+    try:
+        has_flags = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='user_flags'").fetchone()
+        suspended = "AND NOT EXISTS (SELECT 1 FROM user_flags f WHERE f.username = u.username AND f.suspended = 1)" if has_flags else ""
+        return conn.execute(f"""
+            SELECT u.username, u.email FROM users u
+            WHERE EXISTS (SELECT 1 FROM user_wallets w WHERE w.username = u.username) {suspended}
+            ORDER BY u.id
+        """).fetchall()
+    finally:
+        conn.close()
+
+
+def _safe_name(username):
+    return re.sub(r'[^\w.-]', '_', username)
+
+
+def render_chunk(db_path, users, prices, out_dir, fmt):
+    """Pool task: render the reports for one slice of users.
+
+    Returns (recipient, subject, body, attachment) tuples for the parent to queue;
+    the workers never write to the database themselves.
+    """
+    emails = dict(users)
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(
+            f"SELECT username, coin_name, symbol, holdings FROM user_wallets "
+            f"WHERE username IN ({','.join('?' * len(users))}) ORDER BY username, id",
+            list(emails)
+        ).fetchall()
+    finally:
+        conn.close()
+    # One valuation pass for the whole chunk; each user's report is a slice of it.
+    book = Valuation([r[1] for r in rows], [r[2] for r in rows], [r[3] for r in rows], prices)
+    messages = []
+    start = 0
+    for username, group in groupby(rows, key=lambda r: r[0]):
+        stop = start + sum(1 for _ in group)
+        valuation = book.slice(start, stop)
+        start = stop
+        body = reports.text_wallet_report(username, valuation)
+        attachment = None
+        if fmt == "pdf":
+            attachment = os.path.join(out_dir, f"{_safe_name(username)}_portfolio.pdf")
+            reports.write_positions_report(attachment, username, valuation)
+        else:
+            with open(os.path.join(out_dir, f"{_safe_name(username)}_portfolio.txt"), "w", encoding="utf-8") as f:
+                f.write(body)
+        messages.append((emails[username], SUBJECT, body, attachment))
+    return messages
+
+
+def run_batch(db_path, out_dir=None, fmt="pdf", workers=None, send=True, prices=None, chunk_size=CHUNK_SIZE, log=print):
+    """Render (and optionally queue) a report for every user. Returns a summary dict."""
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from src import mail_queue
+
+    started = time.perf_counter()
+    out_dir = os.path.abspath(out_dir or default_output_dir())
+    os.makedirs(out_dir, exist_ok=True)
+    ensure_wallet_index(db_path)
+    if prices is None:
+        from src.price_fetcher import fetch_all_prices
+        prices = fetch_all_prices(wallet_symbols(db_path))
+    users = report_recipients(db_path)
+    chunks = [users[i:i + chunk_size] for i in range(0, len(users), chunk_size)]
+    log(f"{len(users):,} users, {len(prices):,} prices, {len(chunks)} chunks -> {out_dir}")
+
+    rendered = queued = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(render_chunk, db_path, chunk, prices, out_dir, fmt) for chunk in chunks]
+        for future in as_completed(futures):
+            messages = future.result()
+            rendered += len(messages)
+            # Queue from the parent only, one transaction per chunk, so the
+            # workers never contend for the database write lock.
+            if send and messages:
+                mail_queue.enqueue_many(db_path, messages)
+                queued += len(messages)
+            log(f"  {rendered:,}/{len(users):,} reports")
+
+    elapsed = time.perf_counter() - started
+    log(f"Done: {rendered:,} reports, {queued:,} emails queued in {elapsed:.1f} s")
+    return {"users": len(users), "rendered": rendered, "queued": queued, "seconds": elapsed, "output": out_dir}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.batch_reports", description="Render portfolio reports for every user.")
+    parser.add_argument("--db", default=db_path, help="database path (default: the app's users.db)")
+    parser.add_argument("--out", help="output folder (default: ~/CoinTether Reports/<date>)")
+    parser.add_argument("--format", choices=["pdf", "text"], default="pdf")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--no-email", action="store_true", help="render only; do not queue emails")
+    parser.add_argument("--send-now", action="store_true", help="deliver the queued emails before exiting")
+    parser.add_argument("--prices", help="JSON price file to use instead of fetching ({SYMBOL: {usd, inr}})")
+    args = parser.parse_args(argv)
+
+    prices = None
+    if args.prices:
+        with open(args.prices, 'r') as f:
+            prices = {k.upper(): v for k, v in json.load(f).items()}
+    result = run_batch(args.db, args.out, args.format, args.workers, not args.no_email, prices)
+
+    if args.send_now and result["queued"]:
+        from src import mail_queue
+        try:
+            sender = mail_queue.MailSender(args.db)
+        except mail_queue.MailConfigError as e:
+            print(f"Emails stay queued: {e}")
+            return 1
+        conn = sqlite3.connect(args.db, timeout=30, isolation_level=None)
+        try:
+            print(f"Sent {sender.send_pending(conn):,} queued emails")
+        finally:
+            sender.transport.close()
+            conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    from multiprocessing import freeze_support
+    freeze_support()
+    sys.exit(main())
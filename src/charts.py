@@ -0,0 +1,127 @@
+# src/charts.py
+
+from PyQt5.QtWidgets import QDialog, QVBoxLayout
+import datetime
+import numpy as np
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+import matplotlib.dates as mdates
+
+from src import history, perf
+
+# Plotting a marker per point is only readable (and cheap) for short series.
+MARKER_LIMIT = 200
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last points and, from each bucket in between, the point
+    forming the largest triangle with the previously kept point and the next
+    bucket's average, which preserves peaks and troughs that plain striding drops.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+
+    buckets = threshold - 2
+    every = (n - 2) / buckets
+    starts = (np.arange(buckets) * every).astype(np.intp) + 1
+    ends = np.append(starts[1:], n - 1)
+    counts = ends - starts
+    avg_x = np.add.reduceat(x[:n - 1], starts) / counts
+    avg_y = np.add.reduceat(y[:n - 1], starts) / counts
+
+    sampled = np.empty(threshold, dtype=np.intp)
+    sampled[0], sampled[-1] = 0, n - 1
+    a = 0
+    for i in range(buckets):
+        if i + 1 < buckets:
+            next_x, next_y = avg_x[i + 1], avg_y[i + 1]
+        else:
+            next_x, next_y = x[n - 1], y[n - 1]
+        s, e = starts[i], ends[i]
+        area = np.abs((x[a] - next_x) * (y[s:e] - y[a]) - (x[a] - x[s:e]) * (next_y - y[a]))
+        a = s + int(area.argmax())
+        sampled[i + 1] = a
+    return x[sampled], y[sampled]
+
+
+class PieChartDialog(QDialog):
+    """Long-lived portfolio distribution chart; redraws only when the data changes."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Portfolio Distribution"); self.setFixedSize(500, 450)
+        layout = QVBoxLayout(self)
+        self.figure = Figure(); self.canvas = FigureCanvas(self.figure); layout.addWidget(self.canvas)
+        self.ax = self.figure.add_subplot(111)
+        self.data_key = None
+
+    @perf.traced("chart.pie")
+    def set_data(self, data):
+        key = tuple((coin, round(vals["usd"], 2), round(vals["inr"], 2)) for coin, vals in data.items())
+        if key == self.data_key:
+            return
+        self.data_key = key
+        labels, values = [], []
+        for coin, vals in data.items():
+            labels.append(f"{coin}\nUSD {vals['usd']:,.2f}\nINR {vals['inr']:,.2f}"); values.append(vals['usd'] + vals['inr'])
+        self.ax.clear()
+        self.ax.pie(values, labels=labels, autopct='%1.1f%%', startangle=90)
+        self.ax.set_title("Portfolio Distribution (USD + INR)"); self.ax.axis('equal')
+        self.canvas.draw_idle()
+
+
+class HistoryChartDialog(QDialog):
+    """Portfolio value history that keeps its figure between openings.
+
+    The raw series is held in memory and extended with only the rows recorded
+    since the last refresh. What is drawn is an LTTB reduction to roughly one
+    point per horizontal pixel; appended points are added to the drawn line as
+    they are, and the line is only downsampled again once the tail outgrows it.
+    """
+
+    def __init__(self, db_path, username, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self.username = username
+        self.setWindowTitle("Portfolio Value History"); self.setFixedSize(600, 450)
+        layout = QVBoxLayout(self)
+        self.figure = Figure(); self.canvas = FigureCanvas(self.figure); layout.addWidget(self.canvas)
+        self.ax = self.figure.add_subplot(111)
+        self.ax.set_xlabel("Time"); self.ax.set_ylabel("Total Portfolio Value (USD + INR)")
+        self.ax.set_title("Portfolio Value History"); self.ax.grid(True)
+        self.ax.xaxis_date(tz=datetime.datetime.now().astimezone().tzinfo)
+        self.line, = self.ax.plot([], [], color='#27AE60')
+        self.figure.autofmt_xdate()
+        self.epoch = mdates.date2num(datetime.datetime(1970, 1, 1))
+
+        self.last_id = 0
+        self.raw_x = np.empty(0); self.raw_y = np.empty(0)
+        self.shown_x = np.empty(0); self.shown_y = np.empty(0)
+
+    def target_points(self):
+        return max(self.width(), 100)
+
+    @perf.traced("chart.history")
+    def refresh(self):
+        """Pull rows recorded since the last call and redraw. Returns False if there is no history."""
+        if history.history_version(self.db_path, self.username) != self.last_id:
+            ids, ts, values = history.load_history(self.db_path, self.username, after_id=self.last_id)
+            if len(ids):
+                self.last_id = int(ids[-1])
+                self.append_points(self.epoch + ts / 86400.0, values)
+        return len(self.raw_x) > 0
+
+    def append_points(self, x, y):
+        self.raw_x = np.concatenate([self.raw_x, x]); self.raw_y = np.concatenate([self.raw_y, y])
+        target = self.target_points()
+        if len(self.shown_x) + len(x) > 2 * target:
+            self.shown_x, self.shown_y = lttb(self.raw_x, self.raw_y, target)
+        else:
+            self.shown_x = np.concatenate([self.shown_x, x]); self.shown_y = np.concatenate([self.shown_y, y])
+        self.line.set_data(self.shown_x, self.shown_y)
+        self.line.set_marker('o' if len(self.shown_x) <= MARKER_LIMIT else '')
+        self.ax.relim(); self.ax.autoscale_view()
+        self.canvas.draw_idle()
@@ -0,0 +1,360 @@
+# src/cli.py
+
+import sqlite3
+import os
+import sys
+import csv
+import json
+import argparse
+import contextlib
+import datetime
+
+# Headless entry point for servers and cron. Nothing here imports PyQt5 or
+# matplotlib; heavier modules (requests, numpy, pyarrow) are only imported by the
+# commands that need them.
+#
+#   python main.py value --format csv
+#   python main.py value alice bob
+#   python main.py prices refresh
+#   python main.py history snapshot --refresh
+#   python main.py export users wallets --out ./exports
+#   python main.py import wallets holdings.csv
+#   python main.py admin suspend alice bob
+#   python main.py admin orphans                (rows left by users that no longer exist)
+#   python main.py serve --port 8765
+#
+# Results go to stdout as JSON (default) or CSV; progress and API chatter go to
+# stderr. Exit codes are meant for cron and shell scripts:
+EXIT_OK = 0
+EXIT_ERROR = 1          # database or I/O failure
+EXIT_USAGE = 2          # bad arguments (argparse's own code)
+EXIT_NOT_FOUND = 3      # a named user does not exist
+EXIT_STALE = 4          # finished, but some prices came from the cache or are missing
+
+COMMANDS = ("value", "prices", "history", "export", "import", "admin", "serve")
+
+
+def get_database_path():
+    if getattr(sys, 'frozen', False):
+        app_dir = os.path.dirname(sys.executable)
+        return os.path.join(app_dir, "data", "users.db")
+    else:
+        return os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'users.db'))
+
+db_path = get_database_path()
+
+
+def log(message):
+    print(message, file=sys.stderr)
+
+
+def emit(rows, columns, fmt, out=None):
+    out = out or sys.stdout
+    if fmt == "csv":
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(columns)
+        writer.writerows(rows)
+    else:
+        json.dump([dict(zip(columns, row)) for row in rows], out, indent=2)
+        out.write("\n")
+
+
+def missing_users(conn, usernames):
+    placeholders = ",".join("?" * len(usernames))
+    found = {row[0] for row in conn.execute(f"SELECT username FROM users WHERE username IN ({placeholders})", usernames)}
+    return [name for name in usernames if name not in found]
+
+
+def current_prices(db, refresh, symbols=None):
+    """(prices, stale_symbols). With `refresh`, fetches from CoinGecko and updates the cache."""
+    from src.valuation import wallet_symbols
+    symbols = sorted({s.upper() for s in symbols}) if symbols else wallet_symbols(db)
+    if refresh:
+        from src import price_fetcher, history, db_writer
+        cached = price_fetcher.load_price_cache()
+        live = {}
+        # fetch_prices prints its requests and responses; keep stdout for results.
+        with contextlib.redirect_stdout(sys.stderr):
+            for i in range(0, len(symbols), price_fetcher.PRICE_BATCH):
+                batch = price_fetcher.fetch_prices(symbols[i:i + price_fetcher.PRICE_BATCH])
+                if "error" in batch:
+                    log(f"price fetch failed: {batch['error']}")
+                else:
+                    live.update(batch)
+        if live:
+            cached.update(live)
+            price_fetcher.save_price_cache(cached)
+            future = history.record_prices(db, live)
+            if future: db_writer.wait(future)
+        prices = cached
+        stale = [s for s in symbols if s not in live]
+    else:
+        from src.price_fetcher import load_price_cache
+        prices = load_price_cache()
+        stale = [s for s in symbols if s not in prices]
+    return prices, stale
+
+
+def cmd_value(args):
+    from src.valuation import user_market_values, value_wallet
+    conn = sqlite3.connect(args.db)
+    try:
+        if args.users:
+            missing = missing_users(conn, args.users)
+            if missing:
+                log(f"unknown user: {', '.join(missing)}"); return EXIT_NOT_FOUND
+    finally:
+        conn.close()
+    prices, stale = current_prices(args.db, args.refresh)
+    if args.users:
+        rows = []
+        for username in args.users:
+            for coin, symbol, holdings, usd, inr in value_wallet(args.db, username, prices).rows():
+                rows.append((username, coin, symbol, holdings, usd, inr))
+        emit(rows, ["username", "coin", "symbol", "holdings", "usd", "inr"], args.format)
+    else:
+        conn = sqlite3.connect(args.db)
+        try:
+            values = user_market_values(conn, prices)
+            usernames = [row[0] for row in conn.execute("SELECT username FROM users ORDER BY username")]
+        finally:
+            conn.close()
+        rows = [(name, values.get(name, {}).get("usd", 0.0), values.get(name, {}).get("inr", 0.0)) for name in usernames]
+        emit(rows, ["username", "usd", "inr"], args.format)
+    if stale:
+        log(f"no current price for: {', '.join(stale)}")
+        return EXIT_STALE
+    return EXIT_OK
+
+
+def cmd_prices(args):
+    prices, stale = current_prices(args.db, args.action == "refresh", args.symbols)
+    symbols = sorted({s.upper() for s in args.symbols}) if args.symbols else sorted(prices)
+    rows = [(s, prices[s].get("usd"), prices[s].get("inr")) for s in symbols if s in prices]
+    emit(rows, ["symbol", "usd", "inr"], args.format)
+    if stale:
+        log(f"no {'live' if args.action == 'refresh' else 'cached'} price for: {', '.join(stale)}")
+        return EXIT_STALE
+    return EXIT_OK
+
+
+def cmd_history(args):
+    from src import history
+    if args.action == "snapshot":
+        # Same figure the dashboard records on every refresh (USD + INR totals).
+        from src.valuation import user_market_values
+        prices, stale = current_prices(args.db, args.refresh)
+        conn = sqlite3.connect(args.db)
+        try:
+            values = user_market_values(conn, prices)
+        finally:
+            conn.close()
+        history.record_values(args.db, [(name, v["usd"] + v["inr"]) for name, v in sorted(values.items())])
+        log(f"recorded {len(values):,} portfolio values")
+        return EXIT_STALE if stale else EXIT_OK
+    if args.action == "import-legacy":
+        path = args.file or history.legacy_history_path
+        if not os.path.exists(path):
+            log(f"no legacy history at {path}"); return EXIT_ERROR
+        conn = sqlite3.connect(args.db)
+        try:
+            history.ensure_history_table(conn)
+            imported = history.import_legacy_history(conn, path)
+            conn.commit()
+        finally:
+            conn.close()
+        log(f"imported history for {len(imported):,} users")
+        return EXIT_OK
+    if not args.users:
+        log("history show needs a username"); return EXIT_USAGE
+    rows = []
+    for username in args.users:
+        ids, ts, values = history.load_history(args.db, username)
+        if args.since:
+            keep = ts >= args.since.timestamp()
+            ts, values = ts[keep], values[keep]
+        stamps = [datetime.datetime.fromtimestamp(t, datetime.timezone.utc).isoformat() for t in ts.tolist()]
+        rows.extend(zip([username] * len(stamps), stamps, values.tolist()))
+    emit(rows, ["username", "timestamp", "value"], args.format)
+    return EXIT_OK
+
+
+def cmd_export(args):
+    from src import exports
+    unknown = [name for name in args.datasets if name not in exports.DATASETS]
+    if unknown:
+        log(f"unknown dataset: {', '.join(unknown)}"); return EXIT_USAGE
+    exports.export_all(args.db, args.out, args.as_format, args.datasets or None, log=log)
+    return EXIT_OK
+
+
+def cmd_import(args):
+    """Append wallet rows from a CSV with username, coin_name, symbol, holdings columns."""
+    handle = sys.stdin if args.file == "-" else open(args.file, newline="", encoding="utf-8")
+    try:
+        reader = csv.DictReader(handle)
+        needed = {"username", "coin_name", "symbol", "holdings"}
+        if not needed <= set(reader.fieldnames or []):
+            log(f"CSV needs columns: {', '.join(sorted(needed))}"); return EXIT_USAGE
+        rows, bad = [], 0
+        for line_no, row in enumerate(reader, start=2):
+            try:
+                holdings = float(row["holdings"])
+                if holdings < 0 or not row["username"] or not row["symbol"]: raise ValueError
+            except (TypeError, ValueError):
+                log(f"line {line_no}: skipped invalid row"); bad += 1; continue
+            rows.append((row["username"].strip(), row["coin_name"].strip(), row["symbol"].strip().upper(), holdings))
+    finally:
+        if handle is not sys.stdin: handle.close()
+    conn = sqlite3.connect(args.db)
+    try:
+        missing = missing_users(conn, sorted({r[0] for r in rows})) if rows else []
+        if missing:
+            log(f"unknown user: {', '.join(missing)}"); return EXIT_NOT_FOUND
+        conn.executemany("INSERT INTO user_wallets (username, coin_name, symbol, holdings) VALUES (?, ?, ?, ?)", rows)
+        conn.commit()
+    finally:
+        conn.close()
+    log(f"imported {len(rows):,} wallet rows" + (f", skipped {bad}" if bad else ""))
+    return EXIT_ERROR if bad else EXIT_OK
+
+
+def cli_actor():
+    import getpass
+    try:
+        return "cli:" + getpass.getuser()
+    except Exception:
+        return "cli"
+
+
+def cmd_admin(args):
+    from src import admin_actions, schema, audit
+    conn = schema.connect_with_foreign_keys(args.db)
+    try:
+        # Deletes cascade through user_id, so an older database is upgraded first.
+        for table, count in schema.ensure_user_links(conn).items():
+            log(f"kept {count:,} {table} rows whose user no longer exists")
+        admin_actions.ensure_admin_tables(conn)
+        conn.commit()
+        if args.action == "orphans":
+            emit(sorted(schema.orphan_counts(conn).items()), ["table", "rows"], args.format)
+            return EXIT_OK
+        if args.action == "list":
+            rows = conn.execute("""
+                SELECT u.username, u.email, COALESCE(f.suspended, 0) FROM users u
+                LEFT JOIN user_flags f ON f.username = u.username ORDER BY u.username
+            """).fetchall()
+            emit([(name, email, "Suspended" if flag else "Active") for name, email, flag in rows], ["username", "email", "status"], args.format)
+            return EXIT_OK
+        if args.action == "audit":
+            audit.ensure_audit_table(conn)
+            rows = []
+            for target in args.users or [None]:
+                rows += audit.page(conn, limit=args.limit, target=target, exact=args.exact)
+            rows.sort(reverse=True)
+            emit([(datetime.datetime.fromtimestamp(ts).isoformat(timespec="seconds"), actor, action, target, detail)
+                  for entry_id, ts, actor, action, target, detail in rows[:args.limit]],
+                 ["time", "admin", "action", "user", "detail"], args.format)
+            return EXIT_OK
+        if not args.users:
+            log(f"admin {args.action} needs at least one username"); return EXIT_USAGE
+        missing = missing_users(conn, args.users)
+        if missing:
+            log(f"unknown user: {', '.join(missing)}"); return EXIT_NOT_FOUND
+        if args.action in ("suspend", "unsuspend"):
+            admin_actions.set_suspended(conn, args.users, args.action == "suspend")
+            audit.record(conn, cli_actor(), "suspend" if args.action == "suspend" else "unban", args.users)
+        elif args.action == "delete":
+            if not args.yes:
+                log("refusing to delete without --yes"); return EXIT_USAGE
+            admin_actions.delete_users(conn, args.users)
+            audit.record(conn, cli_actor(), "delete", args.users)
+        elif args.action == "reset-password":
+            password = sys.stdin.readline().rstrip("\n")
+            if not password:
+                log("read an empty password from stdin"); return EXIT_USAGE
+            admin_actions.reset_passwords(conn, args.users, password)
+            audit.record(conn, cli_actor(), "reset_password", args.users)
+        conn.commit()
+    finally:
+        conn.close()
+    log(f"{args.action}: {len(args.users)} user(s)")
+    return EXIT_OK
+
+
+def cmd_serve(args):
+    import asyncio
+    from src.api_server import ApiServer
+    log(f"Serving {args.db} on http://127.0.0.1:{args.port}/")
+    try:
+        asyncio.run(ApiServer(args.db, port=args.port).serve())
+    except KeyboardInterrupt:
+        pass
+    return EXIT_OK
+
+
+def build_parser():
+    # --db / --format are accepted before or after the command name.
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--db", default=argparse.SUPPRESS, help="SQLite database (default: data/users.db)")
+    common.add_argument("--format", choices=["json", "csv"], default=argparse.SUPPRESS, help="output format for results (default: json)")
+    parser = argparse.ArgumentParser(prog="python main.py", description="CoinTether without the GUI.", parents=[common])
+    parser.set_defaults(db=db_path, format="json")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("value", parents=[common], help="portfolio values (all users, or positions of the named users)")
+    p.add_argument("users", nargs="*")
+    p.add_argument("--refresh", action="store_true", help="fetch live prices first instead of using the cache")
+    p.set_defaults(func=cmd_value)
+
+    p = sub.add_parser("prices", parents=[common], help="show cached prices or refresh them from CoinGecko")
+    p.add_argument("action", choices=["show", "refresh"])
+    p.add_argument("symbols", nargs="*", help="default: every symbol held by any user")
+    p.set_defaults(func=cmd_prices)
+
+    p = sub.add_parser("history", parents=[common], help="portfolio value history")
+    p.add_argument("action", choices=["snapshot", "show", "import-legacy"])
+    p.add_argument("users", nargs="*")
+    p.add_argument("--refresh", action="store_true", help="snapshot: fetch live prices first")
+    p.add_argument("--since", type=datetime.datetime.fromisoformat, help="show: only points at or after this ISO date")
+    p.add_argument("--file", help="import-legacy: JSON file (default: src/portfolio_history.json)")
+    p.set_defaults(func=cmd_history)
+
+    p = sub.add_parser("export", parents=[common], help="export datasets to CSV / Parquet / Arrow files")
+    p.add_argument("datasets", nargs="*")
+    p.add_argument("--out", default=".")
+    p.add_argument("--as", dest="as_format", choices=["csv", "parquet", "arrow"], default="parquet")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("import", parents=[common], help="import wallet rows from CSV ('-' for stdin)")
+    p.add_argument("kind", choices=["wallets"])
+    p.add_argument("file")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("admin", parents=[common], help="user administration")
+    p.add_argument("action", choices=["list", "suspend", "unsuspend", "delete", "reset-password", "audit", "orphans"])
+    p.add_argument("users", nargs="*")
+    p.add_argument("--yes", action="store_true", help="delete: confirm")
+    p.add_argument("--limit", type=int, default=100, help="audit: newest entries to show")
+    p.add_argument("--exact", action="store_true", help="audit: match usernames exactly instead of as prefixes")
+    p.set_defaults(func=cmd_admin)
+
+    p = sub.add_parser("serve", parents=[common], help="read-only JSON API on localhost (see src/api_server.py)")
+    p.add_argument("--port", type=int, default=8765)
+    p.set_defaults(func=cmd_serve)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not os.path.exists(args.db):
+        log(f"database not found: {args.db}"); return EXIT_ERROR
+    try:
+        return args.func(args)
+    except (sqlite3.Error, OSError) as e:
+        log(f"error: {e}")
+        return EXIT_ERROR
+
+
+if __name__ == "__main__":
+    sys.exit(main())
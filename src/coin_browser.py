@@ -0,0 +1,200 @@
+# src/coin_browser.py
+
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLineEdit, QListView, QLabel, QPushButton
+)
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QObject, QSize, QUrl, pyqtSignal
+from PyQt5.QtGui import QPixmap, QIcon
+from PyQt5.QtNetwork import QNetworkAccessManager, QNetworkRequest
+
+from src import price_fetcher
+from src.workers import FunctionWorker, start_worker
+
+PAGE_SIZE = 100
+LOGO_SIZE = 24
+
+
+class LogoLoader(QObject):
+    """Downloads coin logos asynchronously on the GUI thread's event loop."""
+    logo_ready = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.network = QNetworkAccessManager(self)
+        self.network.finished.connect(self._on_finished)
+        self.icons = {}
+        self.pending = set()
+
+    def request(self, coin_id, url):
+        if coin_id in self.icons or coin_id in self.pending or not url:
+            return
+        self.pending.add(coin_id)
+        reply = self.network.get(QNetworkRequest(QUrl(url)))
+        reply.setProperty("coin_id", coin_id)
+
+    def _on_finished(self, reply):
+        coin_id = reply.property("coin_id")
+        self.pending.discard(coin_id)
+        pixmap = QPixmap()
+        if pixmap.loadFromData(reply.readAll()):
+            self.icons[coin_id] = QIcon(pixmap.scaled(LOGO_SIZE, LOGO_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+            self.logo_ready.emit(coin_id)
+        reply.deleteLater()
+
+
+class CoinCatalogueModel(QAbstractListModel):
+    """List model over the coin catalogue that exposes matching coins one page at a time.
+
+    The whole catalogue is a plain list in memory; only `loaded` rows are reported
+    to the view, and Qt calls fetchMore() as the user scrolls towards the end.
+    Logos are requested for each page as it is exposed.
+    """
+
+    def __init__(self, coins, parent=None):
+        super().__init__(parent)
+        self.logos = LogoLoader(self)
+        self.logos.logo_ready.connect(self._on_logo_ready)
+        self.logo_urls = price_fetcher.load_logo_urls()
+        self.filter_text = ""
+        self.set_coins(coins)
+
+    def set_coins(self, coins):
+        featured = set(price_fetcher.SYMBOL_TO_ID.values())
+        self.coins = sorted(coins, key=lambda c: (c["id"] not in featured, c["name"].lower()))
+        self.search_keys = [f'{c["symbol"]} {c["name"]}'.lower() for c in self.coins]
+        self.set_filter(self.filter_text)
+
+    def set_filter(self, text):
+        self.beginResetModel()
+        self.filter_text = text.strip().lower()
+        if self.filter_text:
+            self.matches = [i for i, key in enumerate(self.search_keys) if self.filter_text in key]
+        else:
+            self.matches = list(range(len(self.coins)))
+        self.rows_by_id = {}
+        self.loaded = 0
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def total_matches(self):
+        return len(self.matches)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.loaded
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.loaded < len(self.matches)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        first = self.loaded
+        last = min(first + PAGE_SIZE, len(self.matches)) - 1
+        self.beginInsertRows(QModelIndex(), first, last)
+        self.loaded = last + 1
+        self.endInsertRows()
+        page = [self.coins[i] for i in self.matches[first:last + 1]]
+        for row, coin in enumerate(page, start=first):
+            self.rows_by_id[coin["id"]] = row
+        self._request_logos(page)
+
+    def coin_at(self, row):
+        return self.coins[self.matches[row]]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        coin = self.coin_at(index.row())
+        if role == Qt.DisplayRole:
+            return f'{coin["symbol"].upper()} - {coin["name"]}'
+        if role == Qt.DecorationRole:
+            return self.logos.icons.get(coin["id"])
+        if role == Qt.UserRole:
+            return coin
+        return None
+
+    def _request_logos(self, page):
+        unknown = []
+        for coin in page:
+            url = self.logo_urls.get(coin["id"])
+            if url: self.logos.request(coin["id"], url)
+            else: unknown.append(coin["id"])
+        if unknown:
+            # Logo URLs come from the markets endpoint; look them up for this page only.
+            worker = FunctionWorker(price_fetcher.fetch_logo_urls, unknown)
+            worker.result.connect(self._on_logo_urls)
+            start_worker(worker)
+
+    def _on_logo_urls(self, urls):
+        if "error" in urls:
+            return
+        self.logo_urls.update(urls)
+        for coin_id, url in urls.items():
+            if coin_id in self.rows_by_id:
+                self.logos.request(coin_id, url)
+
+    def _on_logo_ready(self, coin_id):
+        row = self.rows_by_id.get(coin_id)
+        if row is not None and row < self.loaded:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+
+class SupportedCoinsDialog(QDialog):
+    """Searchable coin list. Opens from the cached catalogue and refreshes it in the background."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Supported Coins")
+        self.setFixedSize(350, 450)
+        self.selected_coin = None
+
+        layout = QVBoxLayout()
+        self.search_bar = QLineEdit()
+        self.search_bar.setPlaceholderText("Search by coin name or symbol...")
+        layout.addWidget(self.search_bar)
+
+        self.model = CoinCatalogueModel(price_fetcher.load_coin_catalogue(), self)
+        self.list_view = QListView()
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setIconSize(QSize(LOGO_SIZE, LOGO_SIZE))
+        self.list_view.setModel(self.model)
+        self.list_view.doubleClicked.connect(self.choose)
+        layout.addWidget(self.list_view)
+
+        bottom = QHBoxLayout()
+        self.count_label = QLabel()
+        use_button = QPushButton("Use Coin")
+        use_button.clicked.connect(lambda: self.choose(self.list_view.currentIndex()))
+        bottom.addWidget(self.count_label)
+        bottom.addStretch()
+        bottom.addWidget(use_button)
+        layout.addLayout(bottom)
+        self.setLayout(layout)
+
+        self.search_bar.textChanged.connect(self.filter_coins)
+        self.update_count()
+
+        if price_fetcher.catalogue_is_stale():
+            worker = FunctionWorker(price_fetcher.fetch_coin_catalogue)
+            worker.result.connect(self._on_catalogue)
+            start_worker(worker)
+
+    def filter_coins(self, text):
+        self.model.set_filter(text)
+        self.update_count()
+
+    def update_count(self):
+        self.count_label.setText(f"{self.model.total_matches():,} coins")
+
+    def _on_catalogue(self, coins):
+        if isinstance(coins, dict):
+            return
+        self.model.set_coins(coins)
+        self.update_count()
+
+    def choose(self, index):
+        if not index.isValid():
+            return
+        self.selected_coin = self.model.data(index, Qt.UserRole)
+        self.accept()
@@ -3,15 +3,16 @@
 from PyQt5.QtWidgets import (
     QWidget, QLabel, QPushButton, QVBoxLayout,
     QHBoxLayout, QTableWidget, QTableWidgetItem, QMessageBox,
-    QDialog, QInputDialog, QLineEdit
+    QDialog, QInputDialog, QLineEdit, QStyledItemDelegate, QStyle, QApplication
 )
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QPixmap, QIcon
-import sqlite3, sys, os, requests, smtplib, json, datetime
-from email.mime.text import MIMEText
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-from fpdf import FPDF
+from PyQt5.QtCore import Qt, QPointF, QTimer
+from PyQt5.QtGui import QPixmap, QIcon, QPainter, QPen, QColor, QPolygonF
+import sqlite3, sys, os, json
+
+from src import perf, db_writer, sparklines
+
+# requests and matplotlib are imported inside the actions that use
+# them so that opening the dashboard does not pay for them up front.
 
 def get_database_path():
     if getattr(sys, 'frozen', False):
@@ -23,21 +24,6 @@ def get_database_path():
 
 db_path = get_database_path()
 cache_path = os.path.join(os.path.dirname(__file__), 'price_cache.json')
-history_path = os.path.join(os.path.dirname(__file__), 'portfolio_history.json')
-
-def send_email(sender_email, sender_password, recipient_email, subject, body):
-    try:
-        msg = MIMEText(body, "plain")
-        msg["From"] = sender_email
-        msg["To"] = recipient_email
-        msg["Subject"] = subject
-        with smtplib.SMTP("smtp.gmail.com", 587) as server:
-            server.starttls()
-            server.login(sender_email, sender_password)
-            server.sendmail(sender_email, recipient_email, msg.as_string())
-        return True
-    except Exception as e:
-        return str(e)
 
 def save_price_cache(data):
     try:
@@ -51,27 +37,64 @@ def load_price_cache():
             return json.load(f)
     except: return {}
 
+# Both are queued on the database writer and not waited on: a lost history point
+# is not worth interrupting the refresh for.
 def save_portfolio_history(username, total_value):
-    try:
-        history = {}
-        if os.path.exists(history_path):
-            with open(history_path, 'r') as f:
-                history = json.load(f)
-        if username not in history:
-            history[username] = []
-        history[username].append({"timestamp": datetime.datetime.now().isoformat(), "value": total_value})
-        with open(history_path, 'w') as f:
-            json.dump(history, f)
+    from src import history
+    try: history.record_value(db_path, username, total_value)
     except: pass
 
-def load_portfolio_history(username):
-    try:
-        if os.path.exists(history_path):
-            with open(history_path, 'r') as f:
-                history = json.load(f)
-            return history.get(username, [])
-        return []
-    except: return []
+def record_prices(prices):
+    from src import history
+    try: history.record_prices(db_path, prices)
+    except: pass
+
+TREND_COLUMN = 6
+
+def render_sparkline(points, width, height, ratio=1.0):
+    pixmap = QPixmap(int(width * ratio), int(height * ratio))
+    pixmap.setDevicePixelRatio(ratio)
+    pixmap.fill(Qt.transparent)
+    # ~168 hourly points into a cell under 100px wide: one point every 2px looks the
+    # same and halves the QPointF work, which is most of the cost of a line.
+    step = max(1, int(len(points) / max(1, width / 2)))
+    sampled = points[::step]
+    if (len(points) - 1) % step: sampled.append(points[-1])
+    lo, hi = min(sampled), max(sampled)
+    sx = (width - 1) / max(1, len(sampled) - 1)
+    sy = (height - 1) / ((hi - lo) or 1.0)
+    line = QPolygonF(list(map(QPointF, [i * sx for i in range(len(sampled))], [(hi - p) * sy for p in sampled])))
+    painter = QPainter(pixmap)
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.setPen(QPen(QColor("#2ECC71" if points[-1] >= points[0] else "#E74C3C"), 1.5))
+    painter.drawPolyline(line)
+    painter.end()
+    return pixmap
+
+class SparklineDelegate(QStyledItemDelegate):
+    # Trend cells carry the symbol under Qt.UserRole and the 7-day change as their
+    # display value (so the column sorts by it). Each line is drawn once per symbol,
+    # cell size and series version, then repaints just blit the cached pixmap.
+    def __init__(self, series, parent=None):
+        super().__init__(parent)
+        self.series = series        # the dashboard's {SYMBOL: (updated_at, points)}
+        self.pixmaps = {}           # SYMBOL -> (key, QPixmap)
+
+    def paint(self, painter, option, index):
+        self.initStyleOption(option, index)
+        option.text = ""
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_ItemViewItem, option, painter, option.widget)
+        symbol = index.data(Qt.UserRole)
+        entry = self.series.get(symbol)
+        rect = option.rect.adjusted(4, 4, -4, -4)
+        if not entry or len(entry[1]) < 2 or rect.width() < 4 or rect.height() < 4: return
+        ratio = painter.device().devicePixelRatioF()
+        key = (entry[0], rect.width(), rect.height(), ratio)
+        cached = self.pixmaps.get(symbol)
+        if cached is None or cached[0] != key:
+            cached = self.pixmaps[symbol] = (key, render_sparkline(entry[1], rect.width(), rect.height(), ratio))
+        painter.drawPixmap(rect.topLeft(), cached[1])
 
 class UserDashboard(QWidget):
     def __init__(self, username):
@@ -83,14 +106,45 @@ class UserDashboard(QWidget):
         if os.path.exists(icon_path):
             self.setWindowIcon(QIcon(icon_path))
         self.price_cache = load_price_cache()
+        self.store = self.portfolio_store()
         self.coin_images = {}
+        self.sparklines = {}
         self.total_usd = 0
         self.total_inr = 0
+        self.positions = {}
+        self.pie_chart = None
+        self.history_chart = None
+        self.analytics_dialog = None
+        self.market_dialog = None
+        self.alert_engine = None
+        self.alert_popup = None
         self.init_ui()
         self.apply_dark_theme()
         self.ensure_wallet_table()
         self.load_wallet_data()
         self.refresh_prices()
+        self.resume_mail_queue()
+        self.update_alerts_button()
+
+    # Totals, allocation and the report text are derived values in a Store (see
+    # src/store.py): each is recomputed only when the holdings, prices or FX rates
+    # it was computed from change, however often it is asked for.
+    def portfolio_store(self):
+        from src.valuation import portfolio_store
+        from src.reports import text_wallet_report
+        store = portfolio_store(prices=self.price_cache)
+        store.derive("report", lambda s: text_wallet_report(self.username, s.get("valuation")))
+        return store
+
+    def holdings_changed(self):
+        self.store.set("holdings", dict(self.positions))
+
+    def resume_mail_queue(self):
+        # Reports queued in an earlier session that had not gone out yet.
+        from src import mail_queue
+        try:
+            if mail_queue.pending_count(db_path): mail_queue.start_background_sender(db_path)
+        except (sqlite3.Error, mail_queue.MailConfigError): pass
 
     def init_ui(self):
         layout = QVBoxLayout()
@@ -110,8 +164,9 @@ class UserDashboard(QWidget):
         self.search_bar.textChanged.connect(self.filter_table)
         layout.addWidget(self.search_bar)
         self.table = QTableWidget()
-        self.table.setColumnCount(6)
-        self.table.setHorizontalHeaderLabels(["Logo", "Coin", "Symbol", "Holdings", "USD Price", "INR Price"])
+        self.table.setColumnCount(7)
+        self.table.setHorizontalHeaderLabels(["Logo", "Coin", "Symbol", "Holdings", "USD Price", "INR Price", "7d Trend"])
+        self.table.setItemDelegateForColumn(TREND_COLUMN, SparklineDelegate(self.sparklines, self.table))
         self.table.setSortingEnabled(True)
         layout.addWidget(self.table)
         self.total_label = QLabel("Total: USD 0.00 | INR 0.00")
@@ -120,19 +175,24 @@ class UserDashboard(QWidget):
         layout.addWidget(self.total_label)
         button_layout = QHBoxLayout()
         self.add_button = QPushButton("Add Coin"); self.add_button.clicked.connect(self.add_coin_dialog)
+        self.markets_button = QPushButton("Markets"); self.markets_button.clicked.connect(self.show_market_explorer)
         self.remove_button = QPushButton("Remove Coin"); self.remove_button.clicked.connect(self.remove_selected_coin)
         self.update_button = QPushButton("Update Holdings"); self.update_button.clicked.connect(self.update_holdings)
-        self.refresh_button = QPushButton("Refresh Prices"); self.refresh_button.clicked.connect(self.refresh_prices)
+        self.refresh_button = QPushButton("Refresh Prices"); self.refresh_button.clicked.connect(lambda: self.refresh_prices())
         self.email_button = QPushButton("Email Report"); self.email_button.clicked.connect(self.email_report)
         self.pdf_button = QPushButton("Export PDF"); self.pdf_button.clicked.connect(self.export_pdf)
         self.chart_button = QPushButton("Portfolio Chart"); self.chart_button.clicked.connect(self.show_pie_chart)
         self.history_button = QPushButton("History Graph"); self.history_button.clicked.connect(self.show_history_graph)
+        self.analytics_button = QPushButton("Analytics"); self.analytics_button.clicked.connect(self.show_analytics)
+        self.alerts_button = QPushButton("Alerts"); self.alerts_button.clicked.connect(self.show_alerts)
         self.logout_button = QPushButton("Logout"); self.logout_button.clicked.connect(self.logout)
-        for btn in [self.add_button, self.remove_button, self.update_button, self.refresh_button,
-                    self.email_button, self.pdf_button, self.chart_button, self.history_button, self.logout_button]:
+        for btn in [self.add_button, self.markets_button, self.remove_button, self.update_button, self.refresh_button,
+                    self.email_button, self.pdf_button, self.chart_button, self.history_button, self.analytics_button, self.alerts_button, self.logout_button]:
             button_layout.addWidget(btn)
         layout.addLayout(button_layout)
         self.setLayout(layout)
+        from src.perf_dialog import install_shortcut
+        install_shortcut(self)
 
     def apply_dark_theme(self):
         self.setStyleSheet("""
@@ -145,39 +205,110 @@ class UserDashboard(QWidget):
         """)
 
     def ensure_wallet_table(self):
+        # The writer creates every table when it connects (schema.ensure_schema).
         try:
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS user_wallets (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT NOT NULL,
-                    coin_name TEXT NOT NULL,
-                    symbol TEXT NOT NULL,
-                    holdings REAL DEFAULT 0
-                )
-            """)
-            conn.commit(); conn.close()
+            db_writer.ready(db_path)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"DB Setup Error:\n{e}")
 
+    @perf.traced("wallet.load")
     def load_wallet_data(self):
+        self.table.setSortingEnabled(False)
         self.table.setRowCount(0)
+        self.positions = {}
         try:
             conn = sqlite3.connect(db_path)
             cursor = conn.cursor()
-            cursor.execute("SELECT coin_name, symbol, holdings FROM user_wallets WHERE username = ?", (self.username,))
-            rows = cursor.fetchall(); conn.close()
-            for row_idx, (coin, symbol, holdings) in enumerate(rows):
-                self.table.insertRow(row_idx)
-                self.table.setCellWidget(row_idx, 0, QLabel("Loading..."))
-                self.table.setItem(row_idx, 1, QTableWidgetItem(coin))
-                self.table.setItem(row_idx, 2, QTableWidgetItem(symbol))
-                self.table.setItem(row_idx, 3, QTableWidgetItem(str(holdings)))
-                self.table.setItem(row_idx, 4, QTableWidgetItem("N/A"))
-                self.table.setItem(row_idx, 5, QTableWidgetItem("N/A"))
+            with perf.span("db.wallet_query"):
+                cursor.execute("SELECT id, coin_name, symbol, holdings FROM user_wallets WHERE username = ? ORDER BY id", (self.username,))
+                rows = cursor.fetchall(); conn.close()
+            self.load_sparklines({symbol for _, _, symbol, _ in rows})
+            with perf.span("table.populate", rows=len(rows)):
+                for wallet_id, coin, symbol, holdings in rows:
+                    self.insert_wallet_row(wallet_id, coin, symbol, holdings)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Load Error:\n{e}")
+        self.holdings_changed()
+        self.table.setSortingEnabled(True)
+
+    # Row-level deltas: each wallet row is keyed by its user_wallets id (stored under
+    # Qt.UserRole on the coin cell) so edits touch one row instead of reloading the table.
+    def insert_wallet_row(self, wallet_id, coin, symbol, holdings):
+        sorting = self.table.isSortingEnabled()
+        self.table.setSortingEnabled(False)
+        self.positions[wallet_id] = (coin, symbol, holdings)
+        row_idx = self.table.rowCount()
+        self.table.insertRow(row_idx)
+        self.table.setCellWidget(row_idx, 0, QLabel("Loading..."))
+        coin_item = QTableWidgetItem(coin)
+        coin_item.setData(Qt.UserRole, wallet_id)
+        self.table.setItem(row_idx, 1, coin_item)
+        self.table.setItem(row_idx, 2, QTableWidgetItem(symbol))
+        self.table.setItem(row_idx, 3, QTableWidgetItem(str(holdings)))
+        self.apply_price_to_row(row_idx, fetch_logo=False)
+        text = self.search_bar.text().lower()
+        self.table.setRowHidden(row_idx, bool(text) and text not in coin.lower() and text not in symbol.lower())
+        self.table.setSortingEnabled(sorting)
+
+    def find_wallet_row(self, wallet_id):
+        for row in range(self.table.rowCount()):
+            if self.table.item(row, 1).data(Qt.UserRole) == wallet_id:
+                return row
+        return -1
+
+    def apply_price_to_row(self, row, fetch_logo=True):
+        symbol = self.table.item(row, 2).text().upper()
+        price_data = self.price_cache.get(symbol, {"usd": "N/A", "inr": "N/A", "image": None})
+        self.table.setItem(row, 4, QTableWidgetItem(str(price_data["usd"])))
+        self.table.setItem(row, 5, QTableWidgetItem(str(price_data["inr"])))
+        trend_item = QTableWidgetItem()
+        trend_item.setData(Qt.UserRole, symbol)
+        trend = self.sparklines.get(symbol)
+        pct = sparklines.change(trend[1]) if trend else None
+        if pct is not None:
+            trend_item.setData(Qt.DisplayRole, round(pct * 100, 2))
+            trend_item.setToolTip(f"7d: {pct * 100:+.2f}%")
+        self.table.setItem(row, TREND_COLUMN, trend_item)
+
+        if fetch_logo and price_data.get("image") and symbol not in self.coin_images:
+            try:
+                import requests
+                with perf.span("logo.download", symbol=symbol):
+                    response = requests.get(price_data["image"])
+                with perf.span("logo.decode", symbol=symbol, size=len(response.content)):
+                    pixmap = QPixmap()
+                    pixmap.loadFromData(response.content)
+                self.coin_images[symbol] = pixmap
+            except: pass
+
+        if symbol in self.coin_images:
+            label = QLabel()
+            label.setPixmap(self.coin_images[symbol].scaled(32, 32))
+            label.setAlignment(Qt.AlignCenter)
+            self.table.setCellWidget(row, 0, label)
+
+    def load_sparklines(self, symbols):
+        """Load new or changed 7-day series; returns the symbols whose series changed."""
+        # Updated in place: the trend delegate holds a reference to this dict.
+        with perf.span("sparklines.load", symbols=len(symbols)):
+            symbols = {s.upper() for s in symbols}
+            known = {s for s in symbols if s in self.sparklines}
+            since = max((self.sparklines[s][0] for s in known), default=None)
+            loaded = sparklines.load(symbols - known)
+            if known: loaded.update(sparklines.load(known, since=since))
+            changed = {s for s, entry in loaded.items() if self.sparklines.get(s, (None,))[0] != entry[0]}
+            self.sparklines.update(loaded)
+            return changed
+
+    def valuation(self):
+        return self.store.get("valuation")
+
+    @perf.traced("totals.update")
+    def update_totals(self):
+        totals = self.store.get("totals")
+        self.total_label.setText(f"Total: USD {totals['usd']:,.2f} | INR {totals['inr']:,.2f}")
+        self.total_usd, self.total_inr = totals['usd'], totals['inr']
+        self.notify_alerts(self.shared_alerts().on_portfolio_value(self.username, self.total_usd))
 
     def filter_table(self, text):
         text = text.lower()
@@ -187,57 +318,58 @@ class UserDashboard(QWidget):
             matches = text in coin_name or text in symbol
             self.table.setRowHidden(row, not matches)
 
-    def refresh_prices(self):
-        from src.price_fetcher import fetch_prices
-        symbols = [self.table.item(row, 2).text().upper() for row in range(self.table.rowCount())]
+    @perf.traced("prices.refresh")
+    def refresh_prices(self, symbols=None, retry=True):
+        from src.price_fetcher import fetch_prices, using_daemon
+        if symbols is None:
+            symbols = sorted({symbol.upper() for _, symbol, _ in self.positions.values()})
         if not symbols: return
 
         try:
-            fetched = fetch_prices(symbols)
+            with perf.span("prices.fetch", symbols=len(symbols)):
+                fetched = fetch_prices(symbols)
             if "error" in fetched:
                 QMessageBox.warning(self, "Price Fetch Error", fetched["error"])
                 return
-
-            self.price_cache = fetched
-            save_price_cache(self.price_cache)
-
-            total_usd, total_inr = 0.0, 0.0
-            for row in range(self.table.rowCount()):
-                symbol = self.table.item(row, 2).text().upper()
-                price_data = self.price_cache.get(symbol, {"usd": "N/A", "inr": "N/A", "image": None})
-
-                self.table.setItem(row, 4, QTableWidgetItem(str(price_data["usd"])))
-                self.table.setItem(row, 5, QTableWidgetItem(str(price_data["inr"])))
-
-                if price_data.get("image") and symbol not in self.coin_images:
-                    try:
-                        response = requests.get(price_data["image"])
-                        pixmap = QPixmap()
-                        pixmap.loadFromData(response.content)
-                        self.coin_images[symbol] = pixmap
-                    except: continue
-
-                if symbol in self.coin_images:
-                    label = QLabel()
-                    label.setPixmap(self.coin_images[symbol].scaled(32, 32))
-                    label.setAlignment(Qt.AlignCenter)
-                    self.table.setCellWidget(row, 0, label)
-
-                try:
-                    holdings = float(self.table.item(row, 3).text())
-                    usd = float(self.table.item(row, 4).text())
-                    inr = float(self.table.item(row, 5).text())
-                    total_usd += holdings * usd
-                    total_inr += holdings * inr
-                except: continue
-
-            self.total_label.setText(f"Total: USD {total_usd:,.2f} | INR {total_inr:,.2f}")
-            self.total_usd, self.total_inr = total_usd, total_inr
-            save_portfolio_history(self.username, total_usd + total_inr)
+            # The price daemon leaves out coins it has not fetched yet and prices them
+            # on its next pass; look once more after that instead of calling CoinGecko.
+            pending = [s for s in symbols if s not in fetched]
+            if pending and retry and using_daemon():
+                from src.price_daemon import MIN_FETCH_GAP
+                timer = QTimer(self); timer.setSingleShot(True)     # owned by the window, so closing it cancels the retry
+                timer.timeout.connect(lambda: self.refresh_prices(pending, retry=False)); timer.timeout.connect(timer.deleteLater)
+                timer.start(int((MIN_FETCH_GAP + 1) * 1000))
+
+            # Only coins whose quote or 7-day series moved need their row redrawn.
+            changed = {symbol for symbol, quote in fetched.items() if self.price_cache.get(symbol) != quote}
+            if changed:
+                self.price_cache.update(fetched)
+                save_price_cache(self.price_cache)
+                self.store.set("prices", dict(self.price_cache))
+            record_prices(fetched)
+            # Every user's alerts on these coins are checked; the price daemon covers the rest.
+            if not self.notify_alerts(self.shared_alerts().on_prices(fetched)): self.update_alerts_button()
+            changed |= self.load_sparklines(symbols)
+
+            rows = [row for row in range(self.table.rowCount()) if self.row_needs_refresh(row, changed)]
+            with perf.span("table.populate", rows=len(rows)):
+                self.table.setSortingEnabled(False)
+                for row in rows:
+                    self.apply_price_to_row(row)
+                self.table.setSortingEnabled(True)
+            self.update_totals()
+            # History is a point per price refresh, not per edit of the wallet.
+            save_portfolio_history(self.username, self.total_usd + self.total_inr)
 
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to refresh prices:\n{e}")
 
+    def row_needs_refresh(self, row, changed):
+        symbol = self.table.item(row, 2).text().upper()
+        if symbol in changed: return True
+        # Rows are first filled without logos; the first refresh downloads them.
+        return symbol not in self.coin_images and bool(self.price_cache.get(symbol, {}).get("image"))
+
     def email_report(self):
         try:
             conn = sqlite3.connect(db_path)
@@ -246,107 +378,161 @@ class UserDashboard(QWidget):
             recipient_email = cursor.fetchone()[0]; conn.close()
         except:
             QMessageBox.critical(self, "Error", "Failed to fetch your registered email."); return
-        report = f"CoinTether Portfolio Report for {self.username}:\n\n"
-        report += "{:<15} {:<8} {:<12} {:<12}\n".format("Coin", "Symbol", "Holdings", "Value (USD | INR)")
-        report += "-"*55 + "\n"
-        for row in range(self.table.rowCount()):
-            try:
-                coin = self.table.item(row, 1).text()
-                symbol = self.table.item(row, 2).text()
-                holdings = float(self.table.item(row, 3).text())
-                usd = float(self.table.item(row, 4).text())
-                inr = float(self.table.item(row, 5).text())
-                report += "{:<15} {:<8} {:<12,.4f} USD {:<12,.2f} | INR {:<12,.2f}\n".format(coin, symbol, holdings, usd*holdings, inr*holdings)
-            except: continue
+        report = self.store.get("report")
         confirm = QMessageBox.question(self, "Send Report", f"Send portfolio report to {recipient_email}?", QMessageBox.Yes | QMessageBox.No)
         if confirm != QMessageBox.Yes: return
-        sender_email = "CoinTetherInc@gmail.com"; sender_password = "mojmrsmigjmpwehf"
-        result = send_email(sender_email, sender_password, recipient_email, "CoinTether Portfolio Report", report)
-        if result is True: QMessageBox.information(self, "Success", f"Report emailed to {recipient_email}")
-        else: QMessageBox.critical(self, "Error", f"Failed to send email:\n{result}")
+        # Delivery happens on the mail queue's background sender (see src/mail_queue.py).
+        from src import mail_queue
+        try:
+            mail_queue.start_background_sender(db_path)     # raises first if mail is not configured
+            mail_queue.enqueue(db_path, recipient_email, "CoinTether Portfolio Report", report)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to queue email:\n{e}"); return
+        QMessageBox.information(self, "Queued", f"Report queued for delivery to {recipient_email}")
 
     def export_pdf(self):
-        pdf = FPDF(); pdf.add_page(); pdf.set_font("Arial", "B", 16)
-        pdf.cell(0, 10, f"{self.username} Portfolio Report", ln=True, align="C")
-        pdf.set_font("Arial", "", 12); pdf.ln(10)
-        pdf.cell(0, 8, "{:<15} {:<8} {:<12} {:<25}".format("Coin", "Symbol", "Holdings", "Value (USD | INR)"), ln=True)
-        pdf.cell(0, 8, "-"*65, ln=True)
-        for row in range(self.table.rowCount()):
-            try:
-                coin = self.table.item(row, 1).text()
-                symbol = self.table.item(row, 2).text()
-                holdings = float(self.table.item(row, 3).text())
-                usd = float(self.table.item(row, 4).text())
-                inr = float(self.table.item(row, 5).text())
-                pdf.cell(0, 8, "{:<15} {:<8} {:<12,.4f} USD {:<12,.2f} | INR {:<12,.2f}".format(
-                    coin, symbol, holdings, usd*holdings, inr*holdings
-                ), ln=True)
-            except: continue
+        from src.reports import write_positions_report
+        from src.workers import ProgressWorker, run_with_progress
         path = os.path.join(os.path.expanduser("~"), f"{self.username}_portfolio.pdf")
-        pdf.output(path)
-        QMessageBox.information(self, "PDF Saved", f"Portfolio PDF saved to:\n{path}")
+        worker = ProgressWorker(write_positions_report, path, self.username, self.valuation())
+        run_with_progress(self, "Exporting PDF...", worker,
+                          lambda rows: QMessageBox.information(self, "PDF Saved", f"Portfolio PDF saved to:\n{path}"))
 
     def add_coin_dialog(self):
         from src.add_coin import AddCoinDialog
         dialog = AddCoinDialog(self.username, self)
-        if dialog.exec_() == QDialog.Accepted:
-            self.load_wallet_data(); self.refresh_prices()
+        if dialog.exec_() == QDialog.Accepted and dialog.added_coin:
+            wallet_id, coin, symbol, holdings = dialog.added_coin
+            self.insert_wallet_row(wallet_id, coin, symbol, holdings)
+            self.holdings_changed()
+            # Only a symbol we have never priced needs a network round trip.
+            if symbol.upper() in self.price_cache: self.update_totals()
+            else: self.refresh_prices([symbol.upper()])
+
+    def show_market_explorer(self):
+        # Kept for the session, so pages already loaded are not fetched again on reopen.
+        held = {symbol.upper() for _, symbol, _ in self.positions.values()}
+        if self.market_dialog is None:
+            from src.market_explorer import MarketExplorerDialog
+            self.market_dialog = MarketExplorerDialog(held, self.add_market_coin, self)
+        else:
+            self.market_dialog.set_held(held)
+        self.market_dialog.exec_()
+
+    def add_market_coin(self, coin):
+        from src.price_fetcher import register_symbol, INR_PER_USD
+        symbol = coin["symbol"].upper()
+        try:
+            wallet_id, _ = db_writer.wait(db_writer.execute(db_path, """
+                INSERT INTO user_wallets (username, coin_name, symbol, holdings)
+                VALUES (?, ?, ?, ?)
+            """, (self.username, coin["name"], symbol, 0.0)))
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to add coin:\n{e}"); return False
+        register_symbol(symbol, coin["id"])
+        # The market page already carries a price; no need to fetch one.
+        if symbol not in self.price_cache and coin.get("usd") is not None:
+            self.price_cache[symbol] = {"usd": coin["usd"], "inr": coin["usd"] * INR_PER_USD, "image": coin.get("image")}
+            save_price_cache(self.price_cache)
+            self.store.set("prices", dict(self.price_cache))
+        self.insert_wallet_row(wallet_id, coin["name"], symbol, 0.0)
+        self.holdings_changed()
+        self.update_totals()
+        return True
 
     def remove_selected_coin(self):
         selected = self.table.currentRow()
         if selected == -1: QMessageBox.warning(self, "Select Coin", "Please select a coin to remove."); return
+        wallet_id = self.table.item(selected, 1).data(Qt.UserRole)
         coin_name = self.table.item(selected, 1).text(); symbol = self.table.item(selected, 2).text()
         confirm = QMessageBox.question(self, "Confirm Delete", f"Are you sure you want to remove {coin_name} ({symbol})?", QMessageBox.Yes | QMessageBox.No)
         if confirm != QMessageBox.Yes: return
         try:
-            conn = sqlite3.connect(db_path); cursor = conn.cursor()
-            cursor.execute("DELETE FROM user_wallets WHERE username = ? AND coin_name = ? AND symbol = ?", (self.username, coin_name, symbol))
-            conn.commit(); conn.close()
-            self.load_wallet_data(); self.refresh_prices()
+            db_writer.wait(db_writer.execute(db_path, "DELETE FROM user_wallets WHERE id = ? AND username = ?", (wallet_id, self.username)))
+            self.table.removeRow(selected); self.positions.pop(wallet_id, None); self.holdings_changed()
+            self.update_totals()
         except Exception as e: QMessageBox.critical(self, "Error", f"Failed to delete:\n{e}")
 
     def update_holdings(self):
         selected = self.table.currentRow()
         if selected == -1: QMessageBox.warning(self, "Select Coin", "Please select a coin to update."); return
+        wallet_id = self.table.item(selected, 1).data(Qt.UserRole)
         coin_name = self.table.item(selected, 1).text(); symbol = self.table.item(selected, 2).text()
         current_holdings = self.table.item(selected, 3).text()
         new_value, ok = QInputDialog.getDouble(self, "Update Holdings", f"Enter new holdings for {coin_name} ({symbol}):", float(current_holdings), 0, 9999999, 8)
         if ok:
             try:
-                conn = sqlite3.connect(db_path); cursor = conn.cursor()
-                cursor.execute("UPDATE user_wallets SET holdings = ? WHERE username = ? AND coin_name = ? AND symbol = ?", (new_value, self.username, coin_name, symbol))
-                conn.commit(); conn.close()
-                self.load_wallet_data(); self.refresh_prices()
+                db_writer.wait(db_writer.execute(db_path, "UPDATE user_wallets SET holdings = ? WHERE id = ? AND username = ?", (new_value, wallet_id, self.username)))
+                self.positions[wallet_id] = (coin_name, symbol, new_value); self.holdings_changed()
+                self.table.item(selected, 3).setText(str(new_value))
+                self.update_totals()
             except Exception as e: QMessageBox.critical(self, "Error", f"Failed to update:\n{e}")
 
+    # Chart dialogs are created once and reused; each keeps its canvas and only
+    # redraws when its data has changed since it was last shown.
     def show_pie_chart(self):
-        data = {}
-        for row in range(self.table.rowCount()):
-            try:
-                coin = self.table.item(row, 1).text()
-                usd_price = float(self.table.item(row, 4).text()); inr_price = float(self.table.item(row, 5).text())
-                holdings = float(self.table.item(row, 3).text())
-                data[coin] = {"usd": usd_price * holdings, "inr": inr_price * holdings}
-            except: continue
+        data = {coin: values for coin, values, weight in self.store.get("allocation")}
         if not data: QMessageBox.information(self, "No Data", "No holdings to display."); return
-        chart_dialog = QDialog(self); chart_dialog.setWindowTitle("Portfolio Distribution"); chart_dialog.setFixedSize(500, 450)
-        layout = QVBoxLayout(chart_dialog); fig = Figure(); canvas = FigureCanvas(fig); layout.addWidget(canvas)
-        ax = fig.add_subplot(111); labels, values = [], []
-        for coin, vals in data.items(): labels.append(f"{coin}\nUSD {vals['usd']:,.2f}\nINR {vals['inr']:,.2f}"); values.append(vals['usd'] + vals['inr'])
-        ax.pie(values, labels=labels, autopct='%1.1f%%', startangle=90); ax.set_title("Portfolio Distribution (USD + INR)"); ax.axis('equal'); canvas.draw()
-        chart_dialog.exec_()
+        if self.pie_chart is None:
+            from src.charts import PieChartDialog
+            self.pie_chart = PieChartDialog(self)
+        self.pie_chart.set_data(data)
+        self.pie_chart.exec_()
 
     def show_history_graph(self):
-        history = load_portfolio_history(self.username)
-        if not history: QMessageBox.information(self, "No Data", "No portfolio history available."); return
-        timestamps = [datetime.datetime.fromisoformat(h["timestamp"]) for h in history]
-        values = [h["value"] for h in history]
-        dialog = QDialog(self); dialog.setWindowTitle("Portfolio Value History"); dialog.setFixedSize(600, 450)
-        layout = QVBoxLayout(dialog); fig = Figure(); canvas = FigureCanvas(fig); layout.addWidget(canvas)
-        ax = fig.add_subplot(111); ax.plot(timestamps, values, marker='o', color='#27AE60')
-        ax.set_xlabel("Time"); ax.set_ylabel("Total Portfolio Value (USD + INR)")
-        ax.set_title("Portfolio Value History"); ax.grid(True); fig.autofmt_xdate()
-        canvas.draw(); dialog.exec_()
+        if self.history_chart is None:
+            from src.charts import HistoryChartDialog
+            self.history_chart = HistoryChartDialog(db_path, self.username, self)
+        if not self.history_chart.refresh(): QMessageBox.information(self, "No Data", "No portfolio history available."); return
+        self.history_chart.exec_()
+
+    def show_analytics(self):
+        if self.analytics_dialog is None:
+            from src.analytics_dialog import AnalyticsDialog
+            self.analytics_dialog = AnalyticsDialog(db_path, self.username, self)
+        if not self.analytics_dialog.refresh(): QMessageBox.information(self, "No Data", "No portfolio history available."); return
+        self.analytics_dialog.exec_()
+
+    # Alerts are evaluated in memory on every price refresh and total update by the
+    # process-wide engine for all users; only alerts that fire touch the database
+    # (see src/alerts.py). This user's own engine only backs the alerts dialog.
+    def alerts(self):
+        if self.alert_engine is None:
+            from src.alerts import AlertEngine
+            self.alert_engine = AlertEngine(db_path, self.username)
+        return self.alert_engine
+
+    def shared_alerts(self):
+        from src.alerts import shared_engine
+        return shared_engine(db_path)
+
+    def notify_alerts(self, events):
+        events = [e for e in events if e[1] == self.username]
+        if not events: return False
+        self.update_alerts_button()
+        self.alert_popup = QMessageBox(QMessageBox.Information, "Price Alert", "\n".join(e[2] for e in events), QMessageBox.Ok, self)
+        self.alert_popup.setWindowModality(Qt.NonModal)
+        self.alert_popup.show()
+        return True
+
+    def update_alerts_button(self):
+        from src.alerts import unseen_events
+        try: unseen = len(unseen_events(db_path, self.username))
+        except sqlite3.Error: unseen = 0
+        self.alerts_button.setText(f"Alerts ({unseen})" if unseen else "Alerts")
+
+    def current_alert_value(self, kind, symbol):
+        if kind == "portfolio":
+            return self.total_usd or None
+        try: return float(self.price_cache[symbol]["usd"])
+        except (KeyError, TypeError, ValueError): return None
+
+    def show_alerts(self):
+        from src.alerts_dialog import AlertsDialog
+        symbols = sorted({symbol.upper() for _, symbol, _ in self.positions.values()})
+        AlertsDialog(self.alerts(), self.username, symbols, self.current_alert_value, self).exec_()
+        self.shared_alerts().sync(wait=False)
+        self.update_alerts_button()
 
     def logout(self):
         from src.login import UserLoginScreen
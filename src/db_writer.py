@@ -0,0 +1,242 @@
+# src/db_writer.py
+
+import os
+import sys
+import time
+import atexit
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from src import perf, schema
+
+# All interactive writes go through one writer thread per database. Callers
+# submit a mutation -- a function taking a connection, or one SQL statement --
+# and get a concurrent.futures.Future back:
+#
+#   future = db_writer.execute(db_path, "UPDATE users SET password=? WHERE username=?", (hashed, user))
+#   future.result()                      # (lastrowid, rowcount), or raises the sqlite3 error
+#
+# The thread drains whatever has queued up (up to MAX_BATCH, waiting at most
+# GROUP_WINDOW for stragglers) and applies it in a single BEGIN IMMEDIATE
+# transaction, so a burst of writes costs one lock acquisition and one fsync.
+# Each mutation runs in its own savepoint: one failing (e.g. a UNIQUE violation)
+# is rolled back and reported on its own future without affecting the others.
+# If another process holds the lock, the whole batch is retried with backoff
+# instead of surfacing "database is locked" to the user.
+#
+# The writer's first act is the schema setup (schema.ensure_schema plus the
+# user-link upgrade). If that or the connection fails, every queued write fails
+# with the error and the next submit starts a fresh writer.
+#
+# A batch gives up on the lock after LOCK_WAIT seconds, inside RESULT_TIMEOUT.
+# A write still queued when wait() times out is cancelled, so a caller told
+# "timed out" never has that write commit behind its back.
+
+MAX_BATCH = 200
+GROUP_WINDOW = 0.002        # seconds to wait for more work after the first item
+BUSY_TIMEOUT = 5000         # ms SQLite waits for a lock before the retry loop kicks in
+LOCK_RETRIES = 8
+BACKOFF_CAP = 2             # seconds between lock retries, at most
+LOCK_WAIT = sum(BUSY_TIMEOUT / 1000 + min(0.05 * 2 ** n, BACKOFF_CAP) for n in range(LOCK_RETRIES))
+RESULT_TIMEOUT = 60         # seconds a caller blocks in wait()
+
+
+class DbWriter(threading.Thread):
+    """Single writer thread for one database file."""
+
+    def __init__(self, db_path):
+        super().__init__(name="db-writer", daemon=True)
+        self.db_path = db_path
+        self._queue = queue.Queue()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._error = None          # set when the writer could not connect
+
+    def submit(self, mutation):
+        """Queue `mutation(conn)`; returns a Future with its return value."""
+        future = Future()
+        with self._lock:
+            if self._error is None:
+                self._queue.put((mutation, future))
+                return future
+        future.set_exception(self._error)
+        return future
+
+    def _fail_pending(self, error):
+        with self._lock:
+            self._error = error
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None and item[1].set_running_or_notify_cancel():
+                    item[1].set_exception(error)
+
+    def stop(self, timeout=10):
+        """Finish everything already queued, then end the thread."""
+        self._stopping.set()
+        self._queue.put(None)
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT / 1000, isolation_level=None)
+        try:
+            conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT}")
+            # WAL lets readers in other windows and processes carry on while a batch commits.
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # Deleting a users row cascades to that user's wallets, flags, notes, history and alerts.
+            conn.execute("PRAGMA foreign_keys = ON")
+            # The writer is where older databases get their user links and every
+            # database its tables (see src/schema.py).
+            conn.execute("BEGIN IMMEDIATE")
+            orphans = schema.ensure_user_links(conn)
+            schema.ensure_schema(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            conn.close()
+            raise
+        for table, count in orphans.items():
+            print(f"{self.db_path}: kept {count:,} {table} rows whose user no longer exists "
+                  f"(python main.py admin orphans)", file=sys.stderr)
+        return conn
+
+    def _next_batch(self):
+        item = self._queue.get()
+        batch = [] if item is None else [item]
+        deadline = time.monotonic() + GROUP_WINDOW
+        while len(batch) < MAX_BATCH:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            if item is not None:
+                batch.append(item)
+        return batch
+
+    def _apply(self, conn, batch):
+        """Run the batch in one transaction; returns [(future, result, error)]."""
+        outcomes = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for mutation, future in batch:
+                conn.execute("SAVEPOINT mutation")
+                try:
+                    result = mutation(conn)
+                    conn.execute("RELEASE mutation")
+                    outcomes.append((future, result, None))
+                except Exception as e:
+                    conn.execute("ROLLBACK TO mutation"); conn.execute("RELEASE mutation")
+                    outcomes.append((future, None, e))
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        return outcomes
+
+    def _commit_batch(self, conn, batch):
+        live = [(m, f) for m, f in batch if f.set_running_or_notify_cancel()]
+        if not live:
+            return
+        for attempt in range(LOCK_RETRIES):
+            try:
+                with perf.span("db.write_batch", size=len(live)):
+                    outcomes = self._apply(conn, live)
+                break
+            except sqlite3.OperationalError as e:
+                if ("locked" not in str(e) and "busy" not in str(e)) or attempt == LOCK_RETRIES - 1:
+                    for mutation, future in live:
+                        future.set_exception(e)
+                    return
+                time.sleep(min(0.05 * 2 ** attempt, BACKOFF_CAP))
+            except Exception as e:
+                for mutation, future in live:
+                    future.set_exception(e)
+                return
+        for future, result, error in outcomes:
+            if error is None: future.set_result(result)
+            else: future.set_exception(error)
+
+    def run(self):
+        try:
+            conn = self._connect()
+        except Exception as e:
+            print(f"{self.db_path}: database writer could not start: {e}", file=sys.stderr)
+            self._fail_pending(e)
+            return
+        try:
+            while True:
+                batch = self._next_batch()
+                if batch:
+                    self._commit_batch(conn, batch)
+                if self._stopping.is_set() and self._queue.empty():
+                    break
+        finally:
+            conn.close()
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(db_path):
+    """The (started) writer for `db_path`, created on first use."""
+    key = os.path.abspath(db_path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None or not writer.is_alive():
+            writer = DbWriter(key)
+            _writers[key] = writer
+            writer.start()
+    return writer
+
+
+def submit(db_path, mutation):
+    return get_writer(db_path).submit(mutation)
+
+
+def execute(db_path, sql, params=()):
+    """Queue one statement; the future resolves to (lastrowid, rowcount)."""
+    def mutation(conn):
+        cursor = conn.execute(sql, params)
+        return cursor.lastrowid, cursor.rowcount
+    return submit(db_path, mutation)
+
+
+def wait(future, timeout=RESULT_TIMEOUT):
+    """Block for a write's result (re-raising its error), as the dialogs do.
+
+    On timeout a write that has not started is cancelled and TimeoutError
+    raised; one already running is waited for (LOCK_WAIT bounds its lock
+    retries) so its real outcome is reported.
+    """
+    try:
+        return future.result(timeout)
+    except FutureTimeout:
+        if future.cancel():
+            raise
+        return future.result(LOCK_WAIT)
+
+
+def ready(db_path, timeout=RESULT_TIMEOUT):
+    """Block until the writer for `db_path` has connected and set up the schema."""
+    wait(submit(db_path, lambda conn: None), timeout)
+
+
+def stop_all():
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.stop()
+
+
+# Flush queued writes when the app exits instead of dropping them with the daemon thread.
+atexit.register(stop_all)
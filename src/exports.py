@@ -0,0 +1,279 @@
+# src/exports.py
+
+import sqlite3
+import os
+import sys
+import csv
+import datetime
+import argparse
+
+from src import perf
+from src.reports import ReportCancelled, iter_admin_user_rows, ADMIN_COLUMNS
+
+# Data exports for the admin dashboard and the analytics team. Every dataset is
+# read from SQLite in CHUNK_ROWS slices and written chunk by chunk, so memory use
+# stays bounded by one chunk whatever the table size:
+#   CSV      - csv module over the cursor (no pandas needed)
+#   Parquet  - pandas -> pyarrow.parquet.ParquetWriter, one row group per chunk
+#   Arrow    - pandas -> Arrow IPC file (Feather v2), one record batch per chunk
+#
+#   python -m src.exports --out ./exports --format parquet users wallets history
+
+CHUNK_ROWS = 10000
+FORMATS = {".csv": "csv", ".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow"}
+
+# Columns holding epoch seconds; written as ISO-8601 UTC in CSV and as timestamps in Parquet/Arrow.
+TIMESTAMP_COLUMNS = {"timestamp"}
+
+
+def get_database_path():
+    if getattr(sys, 'frozen', False):
+        app_dir = os.path.dirname(sys.executable)
+        return os.path.join(app_dir, 'users.db')
+    else:
+        app_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data'))
+        return os.path.join(app_dir, 'users.db')
+
+db_path = get_database_path()
+
+
+def _table_exists(conn, name):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone() is not None
+
+
+def iter_query(db_path, sql, params=(), chunk_size=CHUNK_ROWS):
+    """Yield (columns, rows) for `sql`, chunk_size rows at a time."""
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.execute(sql, params)
+        columns = [d[0] for d in cursor.description]
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield columns, rows
+    finally:
+        conn.close()
+
+
+def _chunked(columns, rows, chunk_size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield columns, chunk
+            chunk = []
+    if chunk:
+        yield columns, chunk
+
+
+def users_chunks(db_path, chunk_size=CHUNK_ROWS):
+    # Password hashes are never exported.
+    return iter_query(db_path, "SELECT id, name, username, email FROM users ORDER BY id", chunk_size=chunk_size)
+
+
+def wallets_chunks(db_path, chunk_size=CHUNK_ROWS):
+    return iter_query(db_path, "SELECT id, username, coin_name, symbol, holdings FROM user_wallets ORDER BY id", chunk_size=chunk_size)
+
+
+def transactions_chunks(db_path, chunk_size=CHUNK_ROWS):
+    conn = sqlite3.connect(db_path)
+    try:
+        exists = _table_exists(conn, "transactions")
+    finally:
+        conn.close()
+    if exists:
+        yield from iter_query(db_path, "SELECT * FROM transactions ORDER BY rowid", chunk_size=chunk_size)
+
+
+def history_chunks(db_path, chunk_size=CHUNK_ROWS):
+    from src import history
+    columns = ["username", "timestamp", "value"]
+
+    def rows():
+        # Each user's blocks and tail rows are read chunk_size points at a time, never a whole series.
+        conn = history.connect_readonly(db_path)
+        try:
+            for username in history.history_users(db_path, conn):
+                for ids, ts, values in history.iter_history(conn, username, chunk_size):
+                    yield from zip([username] * len(ids), ts.tolist(), values.tolist())
+        finally:
+            conn.close()
+
+    return _chunked(columns, rows(), chunk_size)
+
+
+def admin_users_chunks(db_path, chunk_size=CHUNK_ROWS, prices=None):
+    """The admin dashboard's user list, computed from the database rather than the table widget."""
+    return _chunked([name for name, width, align in ADMIN_COLUMNS], iter_admin_user_rows(db_path, prices), chunk_size)
+
+
+DATASETS = {
+    "users": users_chunks,
+    "wallets": wallets_chunks,
+    "transactions": transactions_chunks,
+    "history": history_chunks,
+    "admin_users": admin_users_chunks,
+}
+
+
+def format_for_path(path):
+    fmt = FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt is None:
+        raise ValueError(f"Unsupported export type: {path} (use .csv, .parquet or .arrow)")
+    return fmt
+
+
+def _iso(ts):
+    return datetime.datetime.fromtimestamp(ts, datetime.timezone.utc).isoformat() if ts is not None else None
+
+
+def _write_csv(f, chunks, on_chunk):
+    writer = csv.writer(f)
+    header_written = False
+    for columns, rows in chunks:
+        if not header_written:
+            writer.writerow(columns)
+            header_written = True
+        stamped = [i for i, c in enumerate(columns) if c in TIMESTAMP_COLUMNS]
+        if stamped:
+            writer.writerows([_iso(v) if i in stamped else v for i, v in enumerate(row)] for row in rows)
+        else:
+            writer.writerows(rows)
+        on_chunk(len(rows))
+
+
+def _frame(columns, rows):
+    import pandas as pd
+    df = pd.DataFrame.from_records(rows, columns=columns)
+    for column in TIMESTAMP_COLUMNS.intersection(columns):
+        df[column] = pd.to_datetime(df[column], unit="s", utc=True)
+    return df
+
+
+def _write_columnar(f, chunks, fmt, on_chunk):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet/Arrow export needs pyarrow (pip install pyarrow).")
+    writer, schema = None, None
+    try:
+        for columns, rows in chunks:
+            df = _frame(columns, rows)
+            if schema is None:
+                schema = pa.Schema.from_pandas(df, preserve_index=False)
+                # Columns that are entirely NULL in the first chunk would otherwise be typed null forever.
+                schema = pa.schema([pa.field(fl.name, pa.string()) if pa.types.is_null(fl.type) else fl for fl in schema])
+                writer = pq.ParquetWriter(f, schema) if fmt == "parquet" else pa.ipc.new_file(f, schema)
+            table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+            if fmt == "parquet":
+                writer.write_table(table)
+            else:
+                for batch in table.to_batches():
+                    writer.write_batch(batch)
+            on_chunk(len(rows))
+        if writer is None:
+            # Nothing to export: still produce a valid, empty file.
+            schema = pa.schema([])
+            writer = pq.ParquetWriter(f, schema) if fmt == "parquet" else pa.ipc.new_file(f, schema)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+@perf.traced("exports.dataset")
+def export_dataset(path, db_path, dataset, total_rows=None, progress=None, cancelled=None, chunk_size=CHUNK_ROWS, **options):
+    """Stream `dataset` (a DATASETS key) to `path`; the format follows the file extension.
+
+    Like reports.write_table_pdf, output goes to `path + '.part'` and is renamed into
+    place at the end, `progress(done, total_rows)` is called after every chunk and a
+    True `cancelled()` abandons the export. `options` go to the dataset's chunk
+    function (e.g. prices= for admin_users). Returns the number of rows written.
+    """
+    fmt = format_for_path(path)
+    chunks = DATASETS[dataset](db_path, chunk_size=chunk_size, **options)
+    partial = path + ".part"
+    done = [0]
+
+    def on_chunk(count):
+        done[0] += count
+        if cancelled and cancelled():
+            raise ReportCancelled()
+        if progress:
+            progress(done[0], total_rows or 0)
+
+    try:
+        if fmt == "csv":
+            with open(partial, "w", newline="", encoding="utf-8") as f:
+                _write_csv(f, chunks, on_chunk)
+        else:
+            with open(partial, "wb") as f:
+                _write_columnar(f, chunks, fmt, on_chunk)
+        os.replace(partial, path)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    return done[0]
+
+
+# The table behind each dataset, for row counts and availability checks.
+DATASET_TABLES = {"users": "users", "admin_users": "users", "wallets": "user_wallets", "transactions": "transactions"}
+
+
+def count_rows(db_path, dataset):
+    """Row count for progress reporting, or None when it cannot be had cheaply."""
+    table = DATASET_TABLES.get(dataset)
+    if table is None:
+        return None
+    conn = sqlite3.connect(db_path)
+    try:
+        if not _table_exists(conn, table):
+            return 0
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def dataset_available(db_path, dataset):
+    table = DATASET_TABLES.get(dataset)
+    if table is None:
+        return True
+    conn = sqlite3.connect(db_path)
+    try:
+        return _table_exists(conn, table)
+    finally:
+        conn.close()
+
+
+def export_all(db_path, out_dir, fmt="parquet", datasets=None, log=print):
+    os.makedirs(out_dir, exist_ok=True)
+    extension = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}[fmt]
+    written = {}
+    for name in datasets or ["users", "wallets", "transactions", "history"]:
+        if not dataset_available(db_path, name):
+            log(f"{name}: no {DATASET_TABLES[name]} table, skipped")
+            continue
+        path = os.path.join(out_dir, name + extension)
+        written[name] = export_dataset(path, db_path, name)
+        log(f"{name}: {written[name]:,} rows -> {path}")
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.exports", description="Export CoinTether data for analysis.")
+    parser.add_argument("datasets", nargs="*", help=f"any of {', '.join(sorted(DATASETS))} (default: users wallets transactions history)")
+    parser.add_argument("--db", default=db_path)
+    parser.add_argument("--out", default=".", help="output folder")
+    parser.add_argument("--format", choices=["csv", "parquet", "arrow"], default="parquet")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.datasets if name not in DATASETS]
+    if unknown:
+        parser.error(f"unknown dataset: {', '.join(unknown)}")
+    export_all(args.db, args.out, args.format, args.datasets or None)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,314 @@
+# src/history.py
+
+import sqlite3
+import json
+import os
+import time
+import pathlib
+import datetime
+from array import array
+
+# Before history lived in SQLite it was appended to this JSON file on every refresh.
+# It is only read by `python main.py history import-legacy`: creating the tables
+# imports nothing, so new, benchmark and --db databases start empty.
+legacy_history_path = os.path.join(os.path.dirname(__file__), 'portfolio_history.json')
+
+# New points are appended to portfolio_history one row at a time. Once a user has
+# BLOCK_SIZE of them they are packed into a single portfolio_history_blocks row
+# (ids, timestamps and values as raw int64/float64 buffers), so reading a year of
+# minute-level history is ~130 blob reads instead of half a million row tuples.
+BLOCK_SIZE = 4096
+
+
+def ensure_history_table(conn):
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'portfolio_history'"
+    ).fetchone()
+    if exists:
+        return
+    conn.execute("""
+        CREATE TABLE portfolio_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            ts REAL NOT NULL,
+            value REAL NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_portfolio_history_user ON portfolio_history (username, id)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS portfolio_history_blocks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            first_id INTEGER NOT NULL,
+            last_id INTEGER NOT NULL,
+            ids BLOB NOT NULL,
+            ts BLOB NOT NULL,
+            value BLOB NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_portfolio_history_blocks_user ON portfolio_history_blocks (username, last_id)")
+    from src.schema import link_new_tables
+    link_new_tables(conn, ["portfolio_history", "portfolio_history_blocks"])
+
+
+def import_legacy_history(conn, path=legacy_history_path):
+    """Copy the JSON history into the tables; returns the usernames imported.
+
+    Users that already have history in this database are skipped, so running it
+    twice does not duplicate points.
+    """
+    try:
+        with open(path, 'r') as f:
+            history = json.load(f)
+    except (OSError, ValueError):
+        return []
+    present = {row[0] for row in conn.execute(
+        "SELECT username FROM portfolio_history UNION SELECT username FROM portfolio_history_blocks"
+    )}
+    history = {username: points for username, points in history.items() if username not in present}
+    rows = []
+    for username, points in history.items():
+        for point in points:
+            try:
+                ts = datetime.datetime.fromisoformat(point["timestamp"]).timestamp()
+                rows.append((username, ts, float(point["value"])))
+            except (KeyError, TypeError, ValueError):
+                continue
+    rows.sort(key=lambda r: r[1])
+    conn.executemany("INSERT INTO portfolio_history (username, ts, value) VALUES (?, ?, ?)", rows)
+    for username in history:
+        compact_history(conn, username)
+    return list(history.keys())
+
+
+def compact_history(conn, username):
+    rows = conn.execute(
+        "SELECT id, ts, value FROM portfolio_history WHERE username = ? ORDER BY id", (username,)
+    ).fetchall()
+    full = len(rows) - len(rows) % BLOCK_SIZE
+    for start in range(0, full, BLOCK_SIZE):
+        chunk = rows[start:start + BLOCK_SIZE]
+        conn.execute(
+            "INSERT INTO portfolio_history_blocks (username, first_id, last_id, ids, ts, value) VALUES (?, ?, ?, ?, ?, ?)",
+            (username, chunk[0][0], chunk[-1][0],
+             array('q', (r[0] for r in chunk)).tobytes(),
+             array('d', (r[1] for r in chunk)).tobytes(),
+             array('d', (r[2] for r in chunk)).tobytes())
+        )
+    if full:
+        conn.execute("DELETE FROM portfolio_history WHERE username = ? AND id <= ?", (username, rows[full - 1][0]))
+
+
+def add_value(conn, username, value, ts):
+    ensure_history_table(conn)
+    cursor = conn.execute(
+        "INSERT INTO portfolio_history (username, ts, value) VALUES (?, ?, ?)", (username, ts, value)
+    )
+    pending = conn.execute("SELECT COUNT(*) FROM portfolio_history WHERE username = ?", (username,)).fetchone()[0]
+    if pending >= BLOCK_SIZE:
+        compact_history(conn, username)
+    return cursor.lastrowid
+
+
+def record_value(db_path, username, value, ts=None):
+    """Queue one point on the database writer; returns the Future of its id."""
+    from src import db_writer
+    ts = time.time() if ts is None else ts
+    return db_writer.submit(db_path, lambda conn: add_value(conn, username, value, ts))
+
+
+def record_values(db_path, values, ts=None):
+    """Record one point for each (username, value) pair in a single transaction."""
+    ts = time.time() if ts is None else ts
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_history_table(conn)
+        conn.executemany("INSERT INTO portfolio_history (username, ts, value) VALUES (?, ?, ?)",
+                         [(username, ts, value) for username, value in values])
+        full = conn.execute(
+            "SELECT username FROM portfolio_history GROUP BY username HAVING COUNT(*) >= ?", (BLOCK_SIZE,)
+        ).fetchall()
+        for (username,) in full:
+            compact_history(conn, username)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def connect_readonly(db_path):
+    """A connection that cannot write, for readers that must not create or migrate anything."""
+    uri = pathlib.Path(os.path.abspath(db_path)).as_uri() + "?mode=ro"
+    return sqlite3.connect(uri, uri=True)
+
+
+def _has_history(conn):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'portfolio_history_blocks'"
+    ).fetchone() is not None
+
+
+def load_history(db_path, username, after_id=0):
+    """Return (ids, timestamps, values) as NumPy arrays for points newer than `after_id`.
+
+    Callers that already hold a prefix of the series pass the last id they have
+    and only receive the appended points.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        return read_history(conn, username, after_id)
+    finally:
+        conn.close()
+
+
+def read_history(conn, username, after_id=0, limit=None):
+    """Up to `limit` points newer than `after_id` as (ids, timestamps, values), over an open connection.
+
+    Only the blocks and tail rows those points come from are read, so paging
+    through a long series costs one page of I/O per call. Nothing is created: a
+    database without history tables has no points.
+    """
+    import numpy as np
+    empty = np.empty(0, dtype=np.int64), np.empty(0), np.empty(0)
+    if (limit is not None and limit <= 0) or not _has_history(conn):
+        return empty
+    ids, ts, values = [], [], []
+    count = 0
+    blocks = conn.execute(
+        "SELECT ids, ts, value FROM portfolio_history_blocks WHERE username = ? AND last_id > ? ORDER BY last_id LIMIT ?",
+        # The first block may be partly before after_id, so one more than limit needs.
+        (username, after_id, -1 if limit is None else -(-limit // BLOCK_SIZE) + 1)
+    )
+    for ids_blob, ts_blob, value_blob in blocks:
+        block_ids = np.frombuffer(ids_blob, dtype=np.int64)
+        start = int(np.searchsorted(block_ids, after_id, side='right'))
+        keep = slice(start, None if limit is None else start + limit - count)
+        ids.append(block_ids[keep])
+        ts.append(np.frombuffer(ts_blob, dtype=np.float64)[keep])
+        values.append(np.frombuffer(value_blob, dtype=np.float64)[keep])
+        count += len(ids[-1])
+        if limit is not None and count >= limit:
+            break
+    tail = []
+    if limit is None or count < limit:
+        tail = conn.execute(
+            "SELECT id, ts, value FROM portfolio_history WHERE username = ? AND id > ? ORDER BY id LIMIT ?",
+            (username, after_id, -1 if limit is None else limit - count)
+        ).fetchall()
+    if tail:
+        tail = np.array(tail, dtype=np.float64)
+        ids.append(tail[:, 0].astype(np.int64)); ts.append(tail[:, 1]); values.append(tail[:, 2])
+    if not ids:
+        return empty
+    return np.concatenate(ids), np.concatenate(ts), np.concatenate(values)
+
+
+def iter_history(conn, username, chunk_size, after_id=0):
+    """Yield a user's history as (ids, timestamps, values) slices of at most chunk_size points."""
+    while True:
+        ids, ts, values = read_history(conn, username, after_id, chunk_size)
+        if len(ids):
+            yield ids, ts, values
+        if len(ids) < chunk_size:
+            return
+        after_id = int(ids[-1])
+
+
+def history_version(db_path, username):
+    conn = sqlite3.connect(db_path)
+    try:
+        if not _has_history(conn):
+            return 0
+        row = conn.execute("""
+            SELECT MAX(v) FROM (
+                SELECT MAX(id) AS v FROM portfolio_history WHERE username = ?
+                UNION ALL
+                SELECT MAX(last_id) FROM portfolio_history_blocks WHERE username = ?
+            )
+        """, (username, username)).fetchone()
+        return row[0] or 0
+    finally:
+        conn.close()
+
+
+def history_users(db_path, conn=None):
+    """Usernames that have any recorded history, in name order."""
+    own = conn is None
+    conn = conn or sqlite3.connect(db_path)
+    try:
+        if not _has_history(conn):
+            return []
+        return [row[0] for row in conn.execute(
+            "SELECT username FROM portfolio_history UNION SELECT username FROM portfolio_history_blocks ORDER BY username"
+        )]
+    finally:
+        if own: conn.close()
+
+
+# Coin prices seen on each refresh, for per-coin analytics (see src/analytics.py).
+# Recent prices are kept as recorded; older ones are thinned to the last price
+# per symbol in each bucket, so the table stops growing with every refresh.
+PRICE_TIERS = (
+    (7 * 86400, 3600),          # older than a week: one price per hour
+    (90 * 86400, 86400),        # older than 90 days: one price per day
+)
+PRICE_COMPACT_EVERY = 3600      # record_prices compacts at most this often per database
+_price_compacted = {}
+
+
+def ensure_price_history_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS price_history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            symbol TEXT NOT NULL,
+            ts REAL NOT NULL,
+            usd REAL NOT NULL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_price_history_symbol ON price_history (symbol, ts)")
+
+
+def record_prices(db_path, prices, ts=None):
+    """Queue a price snapshot on the database writer; returns its Future (None if nothing to record)."""
+    from src import db_writer
+    ts = time.time() if ts is None else ts
+    rows = []
+    for symbol, entry in prices.items():
+        try:
+            rows.append((symbol.upper(), ts, float(entry["usd"])))
+        except (KeyError, TypeError, ValueError):
+            continue
+    if not rows:
+        return None
+    key = os.path.abspath(db_path)
+
+    def mutation(conn):
+        ensure_price_history_table(conn)
+        conn.executemany("INSERT INTO price_history (symbol, ts, usd) VALUES (?, ?, ?)", rows)
+        if ts - _price_compacted.get(key, 0) >= PRICE_COMPACT_EVERY:
+            compact_price_history(conn, ts)
+            _price_compacted[key] = ts
+    return db_writer.submit(db_path, mutation)
+
+
+def compact_price_history(conn, now=None):
+    """Downsample price_history per PRICE_TIERS; returns the number of rows removed."""
+    now = time.time() if now is None else now
+    removed = 0
+    for age, bucket in PRICE_TIERS:
+        cutoff = now - age
+        removed += conn.execute("""
+            DELETE FROM price_history WHERE ts < ? AND id NOT IN (
+                SELECT MAX(id) FROM price_history WHERE ts < ? GROUP BY symbol, CAST(ts / ? AS INTEGER)
+            )
+        """, (cutoff, cutoff, bucket)).rowcount
+    return removed
+
+
+def price_at(conn, symbol, ts):
+    """Last recorded USD price of `symbol` at or before `ts` (or the first one after it), else None."""
+    row = conn.execute(
+        "SELECT usd FROM price_history WHERE symbol = ? AND ts <= ? ORDER BY ts DESC LIMIT 1", (symbol, ts)
+    ).fetchone() or conn.execute(
+        "SELECT usd FROM price_history WHERE symbol = ? AND ts > ? ORDER BY ts LIMIT 1", (symbol, ts)
+    ).fetchone()
+    return row[0] if row else None
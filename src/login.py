@@ -10,7 +10,6 @@ import sqlite3
 import hashlib
 import os
 import sys
-from src.dashboard import UserDashboard
 
 def get_database_path():
     if getattr(sys, 'frozen', False):
@@ -143,6 +142,7 @@ class UserLoginScreen(QWidget):
             elif result[0] != hashed_password:
                 QMessageBox.warning(self, "Login Failed", "Incorrect password.")
             else:
+                from src.dashboard import UserDashboard
                 self.dashboard = UserDashboard(username)
                 self.dashboard.show()
                 self.close()
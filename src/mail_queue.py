@@ -0,0 +1,451 @@
+# src/mail_queue.py
+
+import sqlite3
+import os
+import json
+import time
+import socket
+import threading
+import asyncio
+
+# Outgoing mail is written to the mail_queue table and delivered by a background
+# sender thread that keeps one authenticated SMTP session open across messages.
+# Failed deliveries are retried with exponential backoff; 5xx rejections fail at once.
+#
+# No credentials ship with the app. They come from mail_config.json next to the
+# database (gitignored), e.g. {"username": "...", "password": "...", "sender": "..."},
+# or from the COINTETHER_SMTP_* variables below; "transport": "file" writes .eml
+# files instead of sending.
+
+DEFAULT_MAIL_CONFIG = {
+    "transport": "smtp",          # "smtp" or "file" (writes .eml files, no network)
+    "host": "smtp.gmail.com",
+    "port": 587,
+    "starttls": True,
+    "username": "",
+    "password": "",
+    "sender": "",                 # defaults to username
+    "directory": "outbox",
+}
+LOCAL_HOSTS = ("127.0.0.1", "localhost", "::1")     # relays (and LocalSmtpSink) that need no login
+
+# Environment overrides, e.g. COINTETHER_SMTP_HOST=127.0.0.1 COINTETHER_SMTP_PORT=8025
+# COINTETHER_SMTP_STARTTLS=0 to point the app at a LocalSmtpSink.
+ENV_OVERRIDES = {
+    "transport": "COINTETHER_MAIL_TRANSPORT",
+    "host": "COINTETHER_SMTP_HOST",
+    "port": "COINTETHER_SMTP_PORT",
+    "starttls": "COINTETHER_SMTP_STARTTLS",
+    "username": "COINTETHER_SMTP_USER",
+    "password": "COINTETHER_SMTP_PASSWORD",
+    "sender": "COINTETHER_MAIL_SENDER",
+    "directory": "COINTETHER_MAIL_DIR",
+}
+
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 6
+RETRY_BASE = 30
+RETRY_MAX = 3600
+CLAIM_LEASE = 10 * 60       # a 'sending' row whose claim is older than this was abandoned
+POLL_INTERVAL = 30
+IDLE_CLOSE = 60
+
+
+def load_mail_config(db_path):
+    """Defaults, then mail_config.json next to the database, then environment variables."""
+    config = dict(DEFAULT_MAIL_CONFIG)
+    config_path = os.path.join(os.path.dirname(os.path.abspath(db_path)), "mail_config.json")
+    try:
+        with open(config_path, "r") as f:
+            config.update(json.load(f))
+    except (OSError, ValueError):
+        pass
+    for key, var in ENV_OVERRIDES.items():
+        if var in os.environ:
+            config[key] = os.environ[var]
+    config["port"] = int(config["port"])
+    if isinstance(config["starttls"], str):
+        config["starttls"] = config["starttls"].lower() not in ("0", "false", "no", "")
+    if not os.path.isabs(config["directory"]):
+        config["directory"] = os.path.join(os.path.dirname(os.path.abspath(db_path)), config["directory"])
+    config["sender"] = config["sender"] or config["username"] or ("cointether@localhost" if config["host"] in LOCAL_HOSTS else "")
+    return config
+
+
+class MailConfigError(Exception):
+    pass
+
+
+def check_mail_config(config):
+    """Raise MailConfigError when the SMTP transport is chosen but cannot log in."""
+    if config["transport"] == "file" or config["host"] in LOCAL_HOSTS:
+        return
+    if not (config.get("username") and config.get("password")):
+        raise MailConfigError(
+            "Email is not configured: put \"username\" and \"password\" in mail_config.json next to the "
+            "database, or set COINTETHER_SMTP_USER and COINTETHER_SMTP_PASSWORD."
+        )
+
+
+def ensure_mail_table(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS mail_queue (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            recipient TEXT NOT NULL,
+            subject TEXT NOT NULL,
+            body TEXT NOT NULL,
+            attachment TEXT,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL DEFAULT 0,
+            last_error TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            claimed_by TEXT,
+            claimed_at REAL
+        )
+    """)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(mail_queue)")}
+    for column, kind in (("claimed_by", "TEXT"), ("claimed_at", "REAL")):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE mail_queue ADD COLUMN {column} {kind}")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_mail_queue_due ON mail_queue (status, next_attempt_at)")
+
+
+def enqueue(db_path, recipient, subject, body, attachment=None):
+    return enqueue_many(db_path, [(recipient, subject, body, attachment)])[0]
+
+
+def enqueue_many(db_path, messages):
+    """Queue (recipient, subject, body, attachment) tuples in one writer transaction; returns their ids."""
+    from src import db_writer
+
+    def mutation(conn):
+        ensure_mail_table(conn)
+        ids = []
+        for recipient, subject, body, attachment in messages:
+            cursor = conn.execute(
+                "INSERT INTO mail_queue (recipient, subject, body, attachment) VALUES (?, ?, ?, ?)",
+                (recipient, subject, body, attachment)
+            )
+            ids.append(cursor.lastrowid)
+        return ids
+    ids = db_writer.wait(db_writer.submit(db_path, mutation))
+    sender = _senders.get(os.path.abspath(db_path))
+    if sender:
+        sender.wake()
+    return ids
+
+
+def pending_count(db_path):
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        ensure_mail_table(conn)
+        return conn.execute("SELECT COUNT(*) FROM mail_queue WHERE status IN ('pending', 'sending')").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def build_message(sender, recipient, subject, body, attachment=None):
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.application import MIMEApplication
+    if attachment:
+        msg = MIMEMultipart()
+        msg.attach(MIMEText(body, "plain"))
+        with open(attachment, "rb") as f:
+            part = MIMEApplication(f.read(), Name=os.path.basename(attachment))
+        part["Content-Disposition"] = f'attachment; filename="{os.path.basename(attachment)}"'
+        msg.attach(part)
+    else:
+        msg = MIMEText(body, "plain")
+    msg["From"] = sender
+    msg["To"] = recipient
+    msg["Subject"] = subject
+    return msg
+
+
+class SmtpTransport:
+    """Keeps one SMTP connection (STARTTLS + login done once) and reuses it per message."""
+
+    def __init__(self, config):
+        self.config = config
+        self.server = None
+
+    def _connect(self):
+        import smtplib
+        server = smtplib.SMTP(self.config["host"], self.config["port"], timeout=30)
+        if self.config["starttls"]:
+            server.starttls()
+        if self.config.get("username") and self.config.get("password"):
+            server.login(self.config["username"], self.config["password"])
+        self.server = server
+
+    def send(self, recipient, msg):
+        import smtplib
+        if self.server is None:
+            self._connect()
+        try:
+            self.server.sendmail(self.config["sender"], recipient, msg.as_string())
+        except smtplib.SMTPServerDisconnected:
+            # The server dropped an idle session; reconnect once and retry.
+            self.server = None
+            self._connect()
+            self.server.sendmail(self.config["sender"], recipient, msg.as_string())
+
+    def close(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except Exception:
+                pass
+            self.server = None
+
+
+class FileTransport:
+    """Writes each message as an .eml file; a stand-in for SMTP on machines without mail access."""
+
+    def __init__(self, config):
+        self.directory = config["directory"]
+        os.makedirs(self.directory, exist_ok=True)
+
+    def send(self, recipient, msg):
+        name = f"{time.time():.6f}-{recipient.replace('@', '_at_')}.eml"
+        with open(os.path.join(self.directory, name), "w", encoding="utf-8") as f:
+            f.write(msg.as_string())
+
+    def close(self):
+        pass
+
+
+def make_transport(config):
+    check_mail_config(config)
+    return FileTransport(config) if config["transport"] == "file" else SmtpTransport(config)
+
+
+def _is_permanent(error):
+    import smtplib
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(error, smtplib.SMTPResponseException) and 500 <= error.smtp_code < 600
+
+
+class MailSender(threading.Thread):
+    """Background thread that drains mail_queue through a single reused transport.
+
+    Rows it takes are marked with its owner id and the claim time. Other senders
+    (another window, the batch job, the CLI) leave them alone until the claim is
+    CLAIM_LEASE old, which only happens when this sender died mid-batch; a live
+    sender renews its claim while it works through a slow batch.
+    """
+
+    def __init__(self, db_path, config=None, transport=None):
+        super().__init__(name="mail-sender", daemon=True)
+        self.db_path = db_path
+        self.config = config or load_mail_config(db_path)
+        self.transport = transport or make_transport(self.config)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{id(self):x}"
+        self._renewed_at = 0
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stopping.set()
+        self._wake.set()
+
+    def _claim(self, conn):
+        # BEGIN IMMEDIATE takes the write lock, so two app instances never claim the same rows.
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        # Claims abandoned by a sender that crashed or was closed mid-batch go back in the queue.
+        conn.execute(
+            "UPDATE mail_queue SET status = 'pending', claimed_by = NULL, claimed_at = NULL "
+            "WHERE status = 'sending' AND (claimed_at IS NULL OR claimed_at < ?)", (now - CLAIM_LEASE,)
+        )
+        rows = conn.execute(
+            "SELECT id, recipient, subject, body, attachment, attempts FROM mail_queue "
+            "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+            (now, BATCH_SIZE)
+        ).fetchall()
+        conn.executemany(
+            "UPDATE mail_queue SET status = 'sending', claimed_by = ?, claimed_at = ? WHERE id = ?",
+            [(self.owner, now, r[0]) for r in rows]
+        )
+        conn.commit()
+        self._renewed_at = now
+        return rows
+
+    def _renew_claim(self, conn):
+        now = time.time()
+        if now - self._renewed_at > CLAIM_LEASE / 3:
+            conn.execute(
+                "UPDATE mail_queue SET claimed_at = ? WHERE status = 'sending' AND claimed_by = ?", (now, self.owner)
+            )
+            self._renewed_at = now
+
+    def send_pending(self, conn):
+        """Deliver every message that is due. Returns how many were handled."""
+        handled = 0
+        while not self._stopping.is_set():
+            rows = self._claim(conn)
+            if not rows:
+                break
+            results = []
+            for msg_id, recipient, subject, body, attachment, attempts in rows:
+                self._renew_claim(conn)
+                try:
+                    msg = build_message(self.config["sender"], recipient, subject, body, attachment)
+                    self.transport.send(recipient, msg)
+                    results.append(("sent", attempts + 1, 0, None, msg_id, self.owner))
+                except Exception as e:
+                    attempts += 1
+                    if attempts >= MAX_ATTEMPTS or _is_permanent(e):
+                        results.append(("failed", attempts, 0, str(e), msg_id, self.owner))
+                    else:
+                        delay = min(RETRY_BASE * 2 ** (attempts - 1), RETRY_MAX)
+                        results.append(("pending", attempts, time.time() + delay, str(e), msg_id, self.owner))
+                    self.transport.close()
+            conn.executemany(
+                "UPDATE mail_queue SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?, "
+                "claimed_by = NULL, claimed_at = NULL WHERE id = ? AND claimed_by = ?",
+                results
+            )
+            conn.commit()
+            handled += len(rows)
+        return handled
+
+    def run(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout = 30000")
+        ensure_mail_table(conn)
+        last_activity = time.time()
+        try:
+            while not self._stopping.is_set():
+                if self.send_pending(conn):
+                    last_activity = time.time()
+                elif time.time() - last_activity > IDLE_CLOSE:
+                    self.transport.close()
+                self._wake.wait(POLL_INTERVAL)
+                self._wake.clear()
+        finally:
+            self.transport.close()
+            conn.close()
+
+
+_senders = {}
+_senders_lock = threading.Lock()
+
+
+def start_background_sender(db_path):
+    """Start (once per database) the shared background sender, or wake it if running.
+
+    Raises MailConfigError when mail is not configured; queued messages stay queued.
+    """
+    key = os.path.abspath(db_path)
+    with _senders_lock:
+        sender = _senders.get(key)
+        if sender is None or not sender.is_alive():
+            sender = MailSender(db_path)
+            _senders[key] = sender
+            sender.start()
+        else:
+            sender.wake()
+    return sender
+
+
+class LocalSmtpSink:
+    """Minimal in-process SMTP server for tests and benchmarks.
+
+    Accepts any message without authentication and keeps (sender, recipients, data)
+    tuples in `messages`; if `directory` is given each message is also written there.
+    Point the app at it with COINTETHER_SMTP_HOST/PORT and COINTETHER_SMTP_STARTTLS=0.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, directory=None):
+        self.host = host
+        self.port = port
+        self.directory = directory
+        self.messages = []
+        self.connections = 0
+        self._loop = None
+        self._server = None
+        self._ready = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="smtp-sink", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(5)
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        self._server = self._loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            self._loop.close()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+
+        def reply(line):
+            writer.write((line + "\r\n").encode())
+
+        reply("220 CoinTether local SMTP sink")
+        sender, recipients = None, []
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            command = line.decode("utf-8", "replace").strip()
+            verb = command[:4].upper()
+            if verb in ("HELO", "EHLO"):
+                reply("250 localhost")
+            elif verb == "MAIL":
+                sender, recipients = command[10:].strip(" <>"), []
+                reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(command[8:].strip(" <>"))
+                reply("250 OK")
+            elif verb == "DATA":
+                reply("354 End data with <CR><LF>.<CR><LF>")
+                await writer.drain()
+                lines = []
+                while True:
+                    data = await reader.readline()
+                    if not data or data in (b".\r\n", b".\n"):
+                        break
+                    lines.append(data[1:] if data.startswith(b"..") else data)
+                self._store(sender, recipients, b"".join(lines))
+                reply("250 OK queued")
+            elif verb == "RSET":
+                sender, recipients = None, []
+                reply("250 OK")
+            elif verb == "NOOP":
+                reply("250 OK")
+            elif verb == "QUIT":
+                reply("221 Bye")
+                await writer.drain()
+                break
+            else:
+                reply("502 Command not implemented")
+            await writer.drain()
+        writer.close()
+
+    def _store(self, sender, recipients, data):
+        self.messages.append((sender, recipients, data))
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, f"{len(self.messages):08d}.eml"), "wb") as f:
+                f.write(data)
@@ -0,0 +1,91 @@
+# src/markets.py
+
+import os
+import json
+import time
+import sqlite3
+
+from src import price_fetcher
+
+# Page cache behind the market explorer. CoinGecko's /coins/markets is paged by
+# market cap, PER_PAGE coins at a time; every page is stored here with the time it
+# was fetched and served from disk until it is PAGE_TTL old, so reopening the
+# explorer (or a second window) does not spend the API's rate limit on pages it
+# already has. A page that cannot be refetched is served stale rather than not
+# at all. Pages the explorer already shows are never asked for again -- see
+# MarketModel in src/market_explorer.py.
+
+PER_PAGE = price_fetcher.PRICE_BATCH
+MAX_COINS = 5000
+MAX_PAGES = MAX_COINS // PER_PAGE
+PAGE_TTL = 5 * 60
+
+markets_path = os.environ.get(
+    "COINTETHER_MARKET_DB", os.path.join(os.path.dirname(__file__), 'markets.db')
+)
+
+
+def connect(path=None):
+    conn = sqlite3.connect(path or markets_path, timeout=5)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS market_pages (
+            page INTEGER PRIMARY KEY,
+            per_page INTEGER NOT NULL,
+            fetched_at REAL NOT NULL,
+            coins TEXT NOT NULL
+        )
+    """)
+    return conn
+
+
+def cached_page(page, path=None):
+    """(fetched_at, coins) as last stored for `page`, or None."""
+    conn = connect(path)
+    try:
+        row = conn.execute(
+            "SELECT fetched_at, coins FROM market_pages WHERE page = ? AND per_page = ?", (page, PER_PAGE)
+        ).fetchone()
+    finally:
+        conn.close()
+    return (row[0], json.loads(row[1])) if row else None
+
+
+def store_page(page, coins, path=None, now=None):
+    now = now or time.time()
+    conn = connect(path)
+    try:
+        conn.execute(
+            "INSERT INTO market_pages (page, per_page, fetched_at, coins) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(page) DO UPDATE SET per_page = excluded.per_page, fetched_at = excluded.fetched_at, "
+            "coins = excluded.coins", (page, PER_PAGE, now, json.dumps(coins))
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return now
+
+
+def get_page(page, path=None, ttl=PAGE_TTL, now=None):
+    """{"page", "fetched_at", "coins", "cached"} for one page, or {"error": ...}.
+
+    Fresh cached pages are returned as they are; anything older is fetched again
+    and, if that fails, returned stale with the error attached.
+    """
+    now = now or time.time()
+    try:
+        cached = cached_page(page, path)
+    except sqlite3.Error:
+        cached = None
+    if cached and now - cached[0] < ttl:
+        return {"page": page, "fetched_at": cached[0], "coins": cached[1], "cached": True}
+    coins = price_fetcher.fetch_market_page(page, PER_PAGE)
+    if "error" in coins:
+        if cached:
+            return {"page": page, "fetched_at": cached[0], "coins": cached[1], "cached": True, "stale": coins["error"]}
+        return coins
+    try:
+        fetched_at = store_page(page, coins, path, now)
+    except sqlite3.Error:
+        fetched_at = now
+    return {"page": page, "fetched_at": fetched_at, "coins": coins, "cached": False}
@@ -0,0 +1,115 @@
+# src/perf.py
+
+import os
+import json
+import time
+import threading
+import functools
+from collections import deque
+
+# Lightweight timing spans for the places where the app spends its time (database
+# reads, price fetches, logo decoding, table population, chart drawing, exports).
+#
+#   with perf.span("prices.fetch", symbols=len(symbols)):
+#       ...
+#
+#   @perf.traced("exports.dataset")
+#   def export_dataset(...): ...
+#
+# A finished span is one tuple appended to a bounded ring buffer, so tracing costs
+# two perf_counter_ns() calls and a deque append and memory never grows. The
+# diagnostics dialog (Ctrl+Shift+D on either dashboard, see src/perf_dialog.py)
+# shows p50/p95 per span name and can save the buffer as a Chrome trace
+# (chrome://tracing or https://ui.perfetto.dev). COINTETHER_PERF=0 turns it off.
+
+RING_SIZE = 10000
+
+enabled = os.environ.get("COINTETHER_PERF", "1") != "0"
+spans = deque(maxlen=RING_SIZE)     # (name, start_ns, duration_ns, thread id, attrs)
+_origin_ns = time.perf_counter_ns()
+_thread_names = {}
+
+
+class span:
+    """Context manager timing one block; keyword arguments are kept as span attributes."""
+    __slots__ = ("name", "attrs", "start")
+
+    def __init__(self, name, **attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if enabled:
+            end = time.perf_counter_ns()
+            tid = threading.get_ident()
+            if tid not in _thread_names:
+                _thread_names[tid] = threading.current_thread().name
+            if exc_type is not None:
+                self.attrs["error"] = exc_type.__name__
+            spans.append((self.name, self.start, end - self.start, tid, self.attrs))
+        return False
+
+
+def traced(name=None):
+    """Decorator form of span(); the span is named after the function unless `name` is given."""
+    def decorate(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def clear():
+    spans.clear()
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0
+    k = (len(sorted_values) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summary():
+    """[(name, count, p50_ms, p95_ms, max_ms, total_ms)] for the spans in the buffer, slowest total first."""
+    durations = {}
+    for name, start, duration, tid, attrs in list(spans):
+        durations.setdefault(name, []).append(duration)
+    rows = []
+    for name, values in durations.items():
+        values.sort()
+        rows.append((name, len(values), percentile(values, 0.5) / 1e6, percentile(values, 0.95) / 1e6,
+                     values[-1] / 1e6, sum(values) / 1e6))
+    rows.sort(key=lambda r: r[5], reverse=True)
+    return rows
+
+
+def chrome_trace():
+    """The buffer in Chrome's Trace Event format (complete "X" events, microseconds)."""
+    pid = os.getpid()
+    events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+              for tid, name in list(_thread_names.items())]
+    for name, start, duration, tid, attrs in list(spans):
+        events.append({
+            "name": name, "cat": name.split(".", 1)[0], "ph": "X", "pid": pid, "tid": tid,
+            "ts": (start - _origin_ns) / 1000, "dur": duration / 1000,
+            "args": {k: v if isinstance(v, (int, float, str, bool)) or v is None else str(v) for k, v in attrs.items()},
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def write_chrome_trace(path):
+    with open(path + ".part", "w", encoding="utf-8") as f:
+        json.dump(chrome_trace(), f)
+    os.replace(path + ".part", path)
+    return path
@@ -0,0 +1,78 @@
+# src/perf_dialog.py
+
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QTableWidget, QTableWidgetItem,
+    QHeaderView, QAbstractItemView, QFileDialog, QShortcut, QMessageBox
+)
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QKeySequence
+import datetime
+
+from src import perf
+
+SHORTCUT = "Ctrl+Shift+D"
+
+
+class PerfDialog(QDialog):
+    """Hidden diagnostics panel: latency percentiles per span name, refreshed every second."""
+
+    COLUMNS = ["Span", "Count", "p50 (ms)", "p95 (ms)", "Max (ms)", "Total (ms)"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Diagnostics"); self.resize(720, 420)
+        layout = QVBoxLayout(self)
+        self.status_label = QLabel(); layout.addWidget(self.status_label)
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        buttons = QHBoxLayout()
+        for text, slot in [("Refresh", self.refresh), ("Clear", self.clear), ("Export Chrome Trace", self.export_trace)]:
+            btn = QPushButton(text); btn.clicked.connect(slot); buttons.addWidget(btn)
+        layout.addLayout(buttons)
+
+        self.timer = QTimer(self); self.timer.timeout.connect(self.refresh); self.timer.start(1000)
+        self.refresh()
+
+    def refresh(self):
+        rows = perf.summary()
+        self.status_label.setText(
+            f"{len(perf.spans):,} of the last {perf.RING_SIZE:,} spans" + ("" if perf.enabled else " (tracing is off: COINTETHER_PERF=0)")
+        )
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(rows))
+        for row_idx, (name, count, p50, p95, worst, total) in enumerate(rows):
+            self.table.setItem(row_idx, 0, QTableWidgetItem(name))
+            for col, value in enumerate([count, p50, p95, worst, total], start=1):
+                item = QTableWidgetItem()
+                item.setData(Qt.DisplayRole, value if col == 1 else round(value, 2))
+                item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row_idx, col, item)
+        self.table.setSortingEnabled(True)
+
+    def clear(self):
+        perf.clear(); self.refresh()
+
+    def export_trace(self):
+        default = f"cointether-trace-{datetime.datetime.now():%Y%m%d-%H%M%S}.json"
+        path, _ = QFileDialog.getSaveFileName(self, "Save Chrome Trace", default, "Trace JSON (*.json)")
+        if not path: return
+        try:
+            perf.write_chrome_trace(path)
+            QMessageBox.information(self, "Saved", f"Trace saved to:\n{path}\n\nOpen it in chrome://tracing or ui.perfetto.dev.")
+        except OSError as e:
+            QMessageBox.critical(self, "Error", str(e))
+
+
+def install_shortcut(window):
+    """Bind the diagnostics panel to SHORTCUT on `window`; the dialog is created on first use."""
+    def show():
+        if getattr(window, "perf_dialog", None) is None:
+            window.perf_dialog = PerfDialog(window)
+        window.perf_dialog.show(); window.perf_dialog.raise_()
+    window.perf_shortcut = QShortcut(QKeySequence(SHORTCUT), window)
+    window.perf_shortcut.activated.connect(show)
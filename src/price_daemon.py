@@ -0,0 +1,293 @@
+# src/price_daemon.py
+
+import sqlite3
+import os
+import sys
+import time
+import argparse
+import threading
+
+# Optional per-host price daemon. When it runs, it is the only process talking to
+# CoinGecko: every CoinTether window, the CLI and the batch job read prices from
+# a small WAL-mode SQLite file instead of calling the API themselves, so upstream
+# traffic is one request per PRICE_BATCH symbols per interval whatever the number
+# of sessions.
+#
+#   live_prices     symbol -> latest usd/inr/image and when it was fetched
+#                   (usd is NULL for symbols CoinGecko does not know)
+#   price_requests  symbols clients have asked for; the daemon refreshes those
+#                   asked for within REQUEST_TTL
+#   daemon_state    pid, heartbeat, interval and an upstream call counter
+#
+# Clients (price_fetcher.fetch_prices) only use the daemon while its heartbeat
+# is fresh, and fall back to calling CoinGecko directly otherwise. A symbol the
+# daemon has not priced yet is queued for it rather than fetched by the client.
+#
+# With --db it also evaluates every user's price and portfolio-value alerts in
+# that database after each full refresh, so alerts fire whether or not their
+# owner has a window open.
+#
+#   python -m src.price_daemon --interval 60 --db data/users.db
+
+DEFAULT_INTERVAL = 60
+HEARTBEAT_EVERY = 2
+HEARTBEAT_TTL = 10          # clients treat the daemon as gone after this long without a heartbeat
+MIN_FETCH_GAP = 5           # newly requested symbols are fetched at most this often
+REQUEST_TTL = 24 * 60 * 60
+POLL = 0.25
+
+live_prices_path = os.environ.get(
+    "COINTETHER_PRICE_DAEMON_DB", os.path.join(os.path.dirname(__file__), 'live_prices.db')
+)
+
+
+def connect(path=None, timeout=5):
+    conn = sqlite3.connect(path or live_prices_path, timeout=timeout)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def ensure_tables(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS live_prices (
+            symbol TEXT PRIMARY KEY,
+            usd REAL,
+            inr REAL,
+            image TEXT,
+            updated_at REAL NOT NULL
+        )
+    """)
+    conn.execute("CREATE TABLE IF NOT EXISTS price_requests (symbol TEXT PRIMARY KEY, requested_at REAL NOT NULL)")
+    conn.execute("CREATE TABLE IF NOT EXISTS daemon_state (key TEXT PRIMARY KEY, value REAL)")
+    conn.commit()
+
+
+def daemon_state(conn):
+    return dict(conn.execute("SELECT key, value FROM daemon_state"))
+
+
+# ---------------------- Client side ----------------------
+def _live_state(conn):
+    """The daemon's state if its heartbeat is fresh, else None."""
+    try:
+        state = daemon_state(conn)
+    except sqlite3.Error:
+        return None
+    return state if time.time() - state.get("heartbeat", 0) <= HEARTBEAT_TTL else None
+
+
+def running(path=None):
+    """True while a daemon is heartbeating on `path`."""
+    path = path or live_prices_path
+    if not os.path.exists(path):
+        return False
+    try:
+        conn = sqlite3.connect(path, timeout=5)
+    except sqlite3.Error:
+        return False
+    try:
+        return _live_state(conn) is not None
+    finally:
+        conn.close()
+
+
+def _select_in(conn, sql, symbols, *params):
+    rows = []
+    for i in range(0, len(symbols), 500):
+        batch = symbols[i:i + 500]
+        rows += conn.execute(sql.format(",".join("?" * len(batch))), batch + list(params)).fetchall()
+    return rows
+
+
+def read_live_prices(symbols, path=None, wait=0):
+    """Prices for `symbols` from a running daemon, or None if no daemon is running.
+
+    Symbols the daemon has no current price for yet are queued for its next pass
+    (within MIN_FETCH_GAP) and left out, so a first refresh or a newly added coin
+    never calls CoinGecko from the client; callers that can block pass `wait`
+    seconds to wait for them. Symbols CoinGecko does not know are left out too,
+    as fetch_upstream would; {"error": ...} if none of them can be priced at all.
+    """
+    path = path or live_prices_path
+    if not os.path.exists(path):
+        return None
+    symbols = sorted({s.upper() for s in symbols})
+    try:
+        conn = sqlite3.connect(path, timeout=5)
+    except sqlite3.Error:
+        return None
+    try:
+        state = _live_state(conn)
+        if state is None:
+            return None
+        now = time.time()
+        interval = state.get("interval", DEFAULT_INTERVAL)
+        # Reads stay reads: only symbols the daemon is not refreshing yet, or whose
+        # request is halfway to lapsing, are written.
+        requested = {row[0] for row in _select_in(
+            conn, "SELECT symbol FROM price_requests WHERE symbol IN ({}) AND requested_at >= ?", symbols, now - REQUEST_TTL / 2
+        )}
+        renew = [s for s in symbols if s not in requested]
+        if renew:
+            conn.executemany("""
+                INSERT INTO price_requests (symbol, requested_at) VALUES (?, ?)
+                ON CONFLICT(symbol) DO UPDATE SET requested_at = excluded.requested_at
+            """, [(s, now) for s in renew])
+            conn.commit()
+        deadline = now + wait
+        rows, missing = [], symbols
+        while missing:
+            # Only the symbols still missing are asked for again.
+            rows += _select_in(
+                conn, "SELECT symbol, usd, inr, image FROM live_prices WHERE symbol IN ({}) AND updated_at >= ?",
+                missing, time.time() - 3 * interval
+            )
+            found = {row[0] for row in rows}
+            missing = [s for s in missing if s not in found]
+            if not missing or time.time() >= deadline:
+                break
+            time.sleep(POLL)
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+    prices = {symbol: {"usd": usd, "inr": inr, "image": image} for symbol, usd, inr, image in rows if usd is not None}
+    if not prices and symbols and not missing:
+        return {"error": "The price daemon has no current price for " + ", ".join(symbols)}
+    return prices
+
+
+# ---------------------- Daemon ----------------------
+class PriceDaemon(threading.Thread):
+    """Refreshes every requested symbol each `interval` seconds and prices newly
+    requested symbols within MIN_FETCH_GAP. `run()` can also be called directly."""
+
+    def __init__(self, path=None, interval=DEFAULT_INTERVAL, symbols=(), alerts_db=None):
+        super().__init__(name="price-daemon", daemon=True)
+        self.path = path or live_prices_path
+        self.interval = interval
+        self.seed_symbols = sorted({s.upper() for s in symbols})
+        self.alerts_db = alerts_db
+        self.upstream_calls = 0
+        self._stopping = threading.Event()
+
+    def stop(self):
+        self._stopping.set()
+
+    def claim(self, conn):
+        """Become the host's daemon, unless another live one already is."""
+        conn.execute("BEGIN IMMEDIATE")
+        state = daemon_state(conn)
+        if time.time() - state.get("heartbeat", 0) <= HEARTBEAT_TTL and int(state.get("pid", 0)) != os.getpid():
+            conn.rollback()
+            raise RuntimeError(f"A price daemon (pid {int(state['pid'])}) is already running for {self.path}")
+        self.write_state(conn, pid=os.getpid(), interval=self.interval, heartbeat=time.time())
+        now = time.time()
+        conn.executemany("INSERT OR IGNORE INTO price_requests (symbol, requested_at) VALUES (?, ?)", [(s, now) for s in self.seed_symbols])
+        conn.commit()
+
+    def write_state(self, conn, **values):
+        conn.executemany("INSERT OR REPLACE INTO daemon_state (key, value) VALUES (?, ?)", list(values.items()))
+
+    def run(self):
+        conn = connect(self.path)
+        try:
+            ensure_tables(conn)
+            self.claim(conn)
+            next_full = last_fetch = last_beat = 0
+            while not self._stopping.is_set():
+                now = time.time()
+                wanted = [row[0] for row in conn.execute(
+                    "SELECT symbol FROM price_requests WHERE requested_at >= ? ORDER BY symbol", (now - REQUEST_TTL,)
+                )]
+                full = now >= next_full
+                if full:
+                    if self.alerts_db:
+                        wanted = sorted(set(wanted) | self.alert_symbols())
+                    targets, next_full = wanted, now + self.interval
+                else:
+                    priced = {row[0] for row in conn.execute(
+                        "SELECT symbol FROM live_prices WHERE updated_at >= ?", (now - self.interval,)
+                    )}
+                    targets = [s for s in wanted if s not in priced] if now - last_fetch >= MIN_FETCH_GAP else []
+                if targets:
+                    prices = self.refresh(conn, targets)
+                    last_fetch = time.time()
+                    if full and self.alerts_db:
+                        self.check_alerts(prices)
+                if time.time() - last_beat >= HEARTBEAT_EVERY:
+                    self.write_state(conn, heartbeat=time.time(), upstream_calls=self.upstream_calls)
+                    conn.commit()
+                    last_beat = time.time()
+                self._stopping.wait(POLL)
+            self.write_state(conn, heartbeat=0)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def refresh(self, conn, symbols):
+        """Fetch and store `symbols`; returns the {SYMBOL: entry} prices that came back."""
+        from src.price_fetcher import fetch_upstream, PRICE_BATCH
+        fetched = {}
+        for i in range(0, len(symbols), PRICE_BATCH):
+            batch = symbols[i:i + PRICE_BATCH]
+            prices = fetch_upstream(batch)
+            self.upstream_calls += 1
+            if "error" in prices and len(prices) == 1:
+                if prices["error"].startswith("No valid coins"):
+                    prices = {}         # none of these symbols exist upstream; record them as unpriced
+                else:
+                    continue            # upstream failure: keep the last prices until they go stale
+            now = time.time()
+            conn.executemany(
+                "INSERT OR REPLACE INTO live_prices (symbol, usd, inr, image, updated_at) VALUES (?, ?, ?, ?, ?)",
+                [(s, prices[s].get("usd"), prices[s].get("inr"), prices[s].get("image"), now) if s in prices
+                 else (s, None, None, None, now) for s in batch]
+            )
+            conn.commit()
+            fetched.update((s, prices[s]) for s in batch if s in prices)
+        return fetched
+
+    def alert_symbols(self):
+        from src.alerts import shared_engine
+        try:
+            return shared_engine(self.alerts_db).watched_symbols()
+        except sqlite3.Error as e:
+            print(f"Could not load alerts: {e}", file=sys.stderr)
+            return set()
+
+    def check_alerts(self, prices):
+        from src.alerts import shared_engine
+        try:
+            events = shared_engine(self.alerts_db).on_market(prices)
+        except sqlite3.Error as e:
+            print(f"Alert check failed: {e}", file=sys.stderr)
+            return
+        for alert_id, username, message, value in events:
+            print(f"alert {alert_id} for {username}: {message}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.price_daemon", description="Fetch prices once per host for every CoinTether session.")
+    parser.add_argument("--interval", type=int, default=DEFAULT_INTERVAL, help="seconds between refreshes")
+    parser.add_argument("--path", default=live_prices_path, help="shared SQLite file clients read")
+    parser.add_argument("--db", help="also keep every symbol held in this CoinTether database warm and check its alerts")
+    args = parser.parse_args(argv)
+    symbols = ()
+    if args.db:
+        from src.valuation import wallet_symbols
+        symbols = wallet_symbols(args.db)
+    daemon = PriceDaemon(args.path, max(args.interval, MIN_FETCH_GAP), symbols, alerts_db=args.db)
+    try:
+        daemon.run()
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
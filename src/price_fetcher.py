@@ -1,6 +1,8 @@
 # src/price_fetcher.py
 
-import requests
+import json
+import os
+import time
 
 SYMBOL_TO_ID = {
     'BTC': 'bitcoin',
@@ -20,16 +22,50 @@ SYMBOL_TO_ID = {
     'XLM': 'stellar'
 }
 
-def fetch_prices(symbols):
+catalogue_path = os.path.join(os.path.dirname(__file__), 'coin_catalogue.json')
+logo_cache_path = os.path.join(os.path.dirname(__file__), 'coin_logos.json')
+symbol_map_path = os.path.join(os.path.dirname(__file__), 'symbol_map.json')
+price_cache_path = os.path.join(os.path.dirname(__file__), 'price_cache.json')
+CATALOGUE_TTL = 24 * 60 * 60
+INR_PER_USD = 83        # crude INR conversion, also the "fx" source in src/valuation.py
+PRICE_BATCH = 250       # CoinGecko's per_page maximum for /coins/markets
+
+# requests is imported by the functions that call the API; reading prices from
+# the daemon or the caches does not need it.
+
+def daemon_enabled():
+    return os.environ.get("COINTETHER_PRICE_DAEMON", "1") != "0"
+
+def using_daemon():
+    """True when fetch_prices reads from a running price daemon instead of CoinGecko."""
+    from src import price_daemon
+    return daemon_enabled() and price_daemon.running()
+
+def fetch_prices(symbols, wait=0):
+    """Prices for `symbols`, from the local price daemon when one is running (see src/price_daemon.py).
+
+    From the daemon, coins it has not priced yet are missing from the result
+    until its next pass; see read_live_prices for `wait`.
+    """
+    if daemon_enabled():
+        from src import price_daemon
+        live = price_daemon.read_live_prices(symbols, wait=wait)
+        if live is not None:
+            return live
+    return fetch_upstream(symbols)
+
+def fetch_upstream(symbols):
+    import requests
     print("Fetching prices for:", symbols)
 
     ids = []
     symbol_map = {}
 
+    custom_ids = _load_json(symbol_map_path, {})
     for sym in symbols:
         sym_upper = sym.upper()
-        if sym_upper in SYMBOL_TO_ID:
-            coingecko_id = SYMBOL_TO_ID[sym_upper]
+        coingecko_id = SYMBOL_TO_ID.get(sym_upper) or custom_ids.get(sym_upper)
+        if coingecko_id:
             ids.append(coingecko_id)
             symbol_map[coingecko_id] = sym_upper
 
@@ -44,7 +80,7 @@ def fetch_prices(symbols):
         "order": "market_cap_desc",
         "per_page": len(ids),
         "page": 1,
-        "sparkline": "false"
+        "sparkline": "true"      # 7-day series for the trend column (src/sparklines.py)
     }
 
     try:
@@ -54,22 +90,144 @@ def fetch_prices(symbols):
         response.raise_for_status()
 
         data = response.json()
-        print("API Response:\n", data)
+        print("API Response:", len(data), "coins")
 
         prices = {}
+        series = {}
         for coin in data:
             sym = symbol_map.get(coin["id"])
             if sym:
                 prices[sym] = {
                     "usd": coin.get("current_price", "N/A"),
-                    "inr": coin.get("current_price", 0) * 83,  # crude INR conversion
+                    "inr": coin.get("current_price", 0) * INR_PER_USD,
                     "image": coin.get("image")
                 }
+                series[sym] = [p for p in (coin.get("sparkline_in_7d") or {}).get("price") or [] if p is not None]
 
-        print("Final price dictionary:", prices)
+        try:
+            from src import sparklines
+            sparklines.store(series)
+        except Exception as e:
+            print("Could not store sparklines:", str(e))
         return prices
 
     except Exception as e:
         print("Exception occurred while fetching prices:", str(e))
         return {"error": str(e)}
 
+
+def load_price_cache():
+    """Last prices saved by the dashboard, {SYMBOL: {"usd", "inr", "image"}}."""
+    return _load_json(price_cache_path, {})
+
+def save_price_cache(prices):
+    _save_json(price_cache_path, prices)
+
+def fetch_all_prices(symbols):
+    """Prices for any number of symbols in PRICE_BATCH-sized requests.
+
+    Symbols the API could not price (or every symbol, when offline) fall back to
+    the dashboard's price cache, so callers always get the best prices known.
+    """
+    symbols = sorted({s.upper() for s in symbols})
+    prices = {}
+    for i in range(0, len(symbols), PRICE_BATCH):
+        batch = fetch_prices(symbols[i:i + PRICE_BATCH])
+        if "error" not in batch:
+            prices.update(batch)
+    if len(prices) < len(symbols):
+        cached = load_price_cache()
+        for symbol in symbols:
+            if symbol not in prices and symbol in cached:
+                prices[symbol] = cached[symbol]
+    return prices
+
+def _load_json(path, default):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+def _save_json(path, data):
+    try:
+        with open(path, 'w') as f:
+            json.dump(data, f)
+    except OSError:
+        pass
+
+def builtin_catalogue():
+    return [{"id": coin_id, "symbol": sym.lower(), "name": coin_id.replace("-", " ").title()}
+            for sym, coin_id in SYMBOL_TO_ID.items()]
+
+def load_coin_catalogue():
+    """Full coin list from the local cache, or the built-in coins if it was never fetched."""
+    return _load_json(catalogue_path, None) or builtin_catalogue()
+
+def catalogue_is_stale():
+    try:
+        return time.time() - os.path.getmtime(catalogue_path) > CATALOGUE_TTL
+    except OSError:
+        return True
+
+def fetch_coin_catalogue():
+    # /coins/list returns id, symbol and name for every listed coin without any market data.
+    import requests
+    try:
+        response = requests.get("https://api.coingecko.com/api/v3/coins/list", timeout=20)
+        response.raise_for_status()
+        coins = [{"id": c["id"], "symbol": c["symbol"], "name": c["name"]} for c in response.json()]
+        _save_json(catalogue_path, coins)
+        return coins
+    except Exception as e:
+        return {"error": str(e)}
+
+def fetch_market_page(page, per_page=PRICE_BATCH):
+    """One page of /coins/markets by market cap (page 1 = the top `per_page` coins)."""
+    import requests
+    try:
+        response = requests.get("https://api.coingecko.com/api/v3/coins/markets", params={
+            "vs_currency": "usd", "order": "market_cap_desc", "per_page": per_page, "page": page,
+            "sparkline": "false", "price_change_percentage": "24h"
+        }, timeout=15)
+        response.raise_for_status()
+        return [{
+            "id": c["id"], "symbol": c["symbol"], "name": c["name"], "image": c.get("image"),
+            "rank": c.get("market_cap_rank"), "usd": c.get("current_price"),
+            "change_24h": c.get("price_change_percentage_24h"), "market_cap": c.get("market_cap"),
+            "volume": c.get("total_volume")
+        } for c in response.json()]
+    except Exception as e:
+        return {"error": str(e)}
+
+def load_logo_urls():
+    return _load_json(logo_cache_path, {})
+
+def fetch_logo_urls(coin_ids):
+    urls = load_logo_urls()
+    missing = [cid for cid in coin_ids if cid not in urls]
+    if not missing:
+        return {cid: urls[cid] for cid in coin_ids if cid in urls}
+    import requests
+    try:
+        response = requests.get("https://api.coingecko.com/api/v3/coins/markets", params={
+            "vs_currency": "usd", "ids": ','.join(missing), "per_page": len(missing), "page": 1
+        }, timeout=10)
+        response.raise_for_status()
+        for coin in response.json():
+            if coin.get("image"):
+                urls[coin["id"]] = coin["image"]
+        _save_json(logo_cache_path, urls)
+    except Exception as e:
+        return {"error": str(e)}
+    return {cid: urls[cid] for cid in coin_ids if cid in urls}
+
+def register_symbol(symbol, coin_id):
+    """Remember which CoinGecko id a symbol picked from the catalogue refers to."""
+    symbol = symbol.upper()
+    if symbol in SYMBOL_TO_ID:
+        return
+    symbols = _load_json(symbol_map_path, {})
+    if symbols.get(symbol) != coin_id:
+        symbols[symbol] = coin_id
+        _save_json(symbol_map_path, symbols)
@@ -11,6 +11,8 @@ import hashlib
 import os
 import sys
 
+from src import db_writer
+
 def get_database_path():
     if getattr(sys, 'frozen', False):
         app_dir = os.path.dirname(sys.executable)
@@ -143,10 +145,8 @@ class RegisterScreen(QWidget):
 
         hashed = hashlib.sha256(pwd.encode()).hexdigest()
 
-        try:
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            cursor.execute("""
+        def insert_user(conn):
+            conn.execute("""
                 CREATE TABLE IF NOT EXISTS users (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     name TEXT NOT NULL,
@@ -155,12 +155,13 @@ class RegisterScreen(QWidget):
                     password TEXT NOT NULL
                 )
             """)
-            cursor.execute(
+            conn.execute(
                 "INSERT INTO users (name, username, email, password) VALUES (?, ?, ?, ?)",
                 (name, username, email, hashed)
             )
-            conn.commit()
-            conn.close()
+
+        try:
+            db_writer.wait(db_writer.submit(db_path, insert_user))
 
             QMessageBox.information(self, "Success", "Account created successfully!")
             self.redirect_to_login()
@@ -0,0 +1,271 @@
+# src/reports.py
+
+import os
+import sqlite3
+import zlib
+
+from src import perf
+
+# (header, width in mm, alignment); each layout fills the 190 mm between A4 margins.
+ADMIN_COLUMNS = [("Username", 45, "L"), ("Email", 65, "L"), ("Value (USD)", 30, "R"), ("Coins", 20, "R"), ("Status", 30, "L")]
+WALLET_COLUMNS = [("Coin", 45, "L"), ("Symbol", 25, "L"), ("Holdings", 35, "R"), ("Value (USD)", 42, "R"), ("Value (INR)", 43, "R")]
+
+PROGRESS_EVERY = 500
+
+MM = 72 / 25.4
+PAGE_WIDTH, PAGE_HEIGHT = 210 * MM, 297 * MM
+MARGIN, BOTTOM_MARGIN = 10 * MM, 15 * MM
+TITLE_HEIGHT, HEADER_HEIGHT, ROW_HEIGHT = 10 * MM, 7 * MM, 6 * MM
+FONT_SIZE, HEADER_FONT_SIZE, TITLE_FONT_SIZE = 9, 10, 14
+
+# Advance widths (per 1000 units of font size) of Helvetica for characters 32-126;
+# anything else is measured as 556. Used to clip cell text to its column.
+HELVETICA_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+
+
+class ReportCancelled(Exception):
+    pass
+
+
+def _pdf_text(value):
+    # The standard PDF fonts only cover Latin-1.
+    return str(value).encode('latin-1', 'replace').decode('latin-1')
+
+
+def text_width(text, size):
+    return sum(HELVETICA_WIDTHS[o - 32] if 32 <= o <= 126 else 556 for o in map(ord, text)) * size / 1000
+
+
+def _fit(text, width, size):
+    if text_width(text, size) <= width:
+        return text
+    while text and text_width(text + "...", size) > width:
+        text = text[:-1]
+    return text + "..."
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+class PdfTableWriter:
+    """Writes a paginated table straight to a binary file, one page at a time.
+
+    Each page's content stream is compressed and written out as soon as the page
+    fills up, so memory use is bounded by a single page regardless of row count.
+    Only the page object numbers are kept until close() writes the page tree.
+    Every page repeats the title and column headers and carries a page number.
+    """
+
+    def __init__(self, f, title, columns):
+        self.f = f
+        self.title = _pdf_text(title)
+        self.columns = [(name, width * MM, align) for name, width, align in columns]
+        self.offsets = {}
+        self.position = 0
+        self.next_id = 5
+        self.page_ids = []
+        self.ops = None
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        # 1 = catalog, 2 = page tree (written last, once all pages are known), 3/4 = fonts.
+        self._object(1, "<< /Type /Catalog /Pages 2 0 R >>")
+        self._object(3, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+        self._object(4, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>")
+
+    def _write(self, data):
+        self.f.write(data)
+        self.position += len(data)
+
+    def _object(self, obj_id, body, stream=None):
+        self.offsets[obj_id] = self.position
+        self._write(f"{obj_id} 0 obj\n{body}\n".encode("latin-1"))
+        if stream is not None:
+            self._write(b"stream\n" + stream + b"\nendstream\n")
+        self._write(b"endobj\n")
+
+    def _text(self, x, y, text, font="F1", size=FONT_SIZE):
+        self.ops.append(f"BT /{font} {size} Tf {x:.2f} {y:.2f} Td ({_escape(text)}) Tj ET")
+
+    def _cell(self, x, width, height, text, align, font="F1", size=FONT_SIZE, fill=False):
+        rect = f"{x:.2f} {self.y - height:.2f} {width:.2f} {height:.2f} re"
+        self.ops.append(f"0.86 g {rect} B 0 g" if fill else f"{rect} S")
+        text = _fit(text, width - 4, size)
+        if align == "R":
+            tx = x + width - 2 - text_width(text, size)
+        elif align == "C":
+            tx = x + (width - text_width(text, size)) / 2
+        else:
+            tx = x + 2
+        self._text(tx, self.y - height + (height - size * 0.7) / 2, text, font, size)
+
+    def _start_page(self):
+        self.ops = ["0.5 w"]
+        self.y = PAGE_HEIGHT - MARGIN
+        self._text((PAGE_WIDTH - text_width(self.title, TITLE_FONT_SIZE)) / 2, self.y - TITLE_HEIGHT + 8, self.title, "F2", TITLE_FONT_SIZE)
+        self.y -= TITLE_HEIGHT
+        x = MARGIN
+        for name, width, align in self.columns:
+            self._cell(x, width, HEADER_HEIGHT, name, align, "F2", HEADER_FONT_SIZE, fill=True)
+            x += width
+        self.y -= HEADER_HEIGHT
+
+    def _finish_page(self):
+        label = f"Page {len(self.page_ids) + 1}"
+        self._text((PAGE_WIDTH - text_width(label, 8)) / 2, BOTTOM_MARGIN / 2, label, "F1", 8)
+        content = zlib.compress("\n".join(self.ops).encode("latin-1"))
+        content_id, page_id = self.next_id, self.next_id + 1
+        self.next_id += 2
+        self._object(content_id, f"<< /Length {len(content)} /Filter /FlateDecode >>", content)
+        self._object(page_id, f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH:.2f} {PAGE_HEIGHT:.2f}] "
+                              f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {content_id} 0 R >>")
+        self.page_ids.append(page_id)
+        self.ops = None
+
+    def add_row(self, values):
+        if self.ops is None:
+            self._start_page()
+        elif self.y - ROW_HEIGHT < BOTTOM_MARGIN:
+            self._finish_page()
+            self._start_page()
+        x = MARGIN
+        for (name, width, align), value in zip(self.columns, values):
+            self._cell(x, width, ROW_HEIGHT, _pdf_text(value), align)
+            x += width
+        self.y -= ROW_HEIGHT
+
+    def add_summary(self, text):
+        if self.ops is None:
+            self._start_page()
+        elif self.y - 2 * ROW_HEIGHT < BOTTOM_MARGIN:
+            self._finish_page()
+            self._start_page()
+        self.y -= ROW_HEIGHT
+        text = _pdf_text(text)
+        self._text(PAGE_WIDTH - MARGIN - text_width(text, HEADER_FONT_SIZE), self.y, text, "F2", HEADER_FONT_SIZE)
+
+    def close(self):
+        if self.ops is None and not self.page_ids:
+            self._start_page()
+        if self.ops is not None:
+            self._finish_page()
+        kids = " ".join(f"{page_id} 0 R" for page_id in self.page_ids)
+        self._object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>")
+        xref_at = self.position
+        lines = [f"xref\n0 {self.next_id}\n", "0000000000 65535 f \n"]
+        lines += [f"{self.offsets[i]:010d} 00000 n \n" for i in range(1, self.next_id)]
+        lines.append(f"trailer\n<< /Size {self.next_id} /Root 1 0 R >>\nstartxref\n{xref_at}\n%%EOF\n")
+        self._write("".join(lines).encode("latin-1"))
+
+
+def write_table_pdf(path, title, columns, rows, total_rows=None, progress=None, cancelled=None, summary=None):
+    """Write `rows` (any iterable, typically a DB generator) as a paginated PDF table.
+
+    Rows are consumed one at a time and pages are flushed as they fill.
+    `progress(done, total_rows)` is called every PROGRESS_EVERY rows and
+    `cancelled()` is polled at the same points; returning True abandons the report
+    without touching `path`. `summary` is a callable producing a closing line once
+    all rows have been written. Returns the number of rows written.
+    """
+    partial = path + ".part"
+    done = 0
+    try:
+        with open(partial, "wb") as f:
+            writer = PdfTableWriter(f, title, columns)
+            for row in rows:
+                writer.add_row(row)
+                done += 1
+                if done % PROGRESS_EVERY == 0:
+                    if cancelled and cancelled():
+                        raise ReportCancelled()
+                    if progress:
+                        progress(done, total_rows or 0)
+            if summary:
+                writer.add_summary(summary())
+            writer.close()
+        os.replace(partial, path)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    if progress:
+        progress(done, total_rows or done)
+    return done
+
+
+def count_users(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def iter_admin_user_rows(db_path, prices=None):
+    """Admin user list rows with each user's market value; `prices` defaults to the price cache."""
+    from src.valuation import user_market_values
+    if prices is None:
+        from src.price_fetcher import load_price_cache
+        prices = load_price_cache()
+    conn = sqlite3.connect(db_path)
+    try:
+        values = user_market_values(conn, prices)
+        cursor = conn.execute("""
+            SELECT u.username, u.email, COALESCE(w.coins, 0), COALESCE(f.suspended, 0)
+            FROM users u
+            LEFT JOIN (SELECT username, COUNT(*) AS coins FROM user_wallets GROUP BY username) w ON w.username = u.username
+            LEFT JOIN user_flags f ON f.username = u.username
+            ORDER BY u.id
+        """)
+        for username, email, coins, suspended in cursor:
+            yield username, email, values.get(username, {}).get("usd", 0.0), coins, "Suspended" if suspended else "Active"
+    finally:
+        conn.close()
+
+
+def text_wallet_report(username, valuation):
+    """Plain-text report of a valuation.Valuation, used as the email body; unpriced coins are left out."""
+    lines = [f"CoinTether Portfolio Report for {username}:", ""]
+    lines.append("{:<15} {:<8} {:<12} {:<12}".format("Coin", "Symbol", "Holdings", "Value (USD | INR)"))
+    lines.append("-" * 55)
+    for coin, symbol, holdings, usd, inr in valuation.rows():
+        if usd is None:
+            continue
+        lines.append("{:<15} {:<8} {:<12,.4f} USD {:<12,.2f} | INR {:<12,.2f}".format(coin, symbol, holdings, usd, inr))
+    return "\n".join(lines) + "\n"
+
+
+@perf.traced("reports.admin_pdf")
+def write_admin_report(path, db_path, prices=None, progress=None, cancelled=None):
+    rows = ((username, email, f"{usd:,.2f}", str(coins), status)
+            for username, email, usd, coins, status in iter_admin_user_rows(db_path, prices))
+    return write_table_pdf(
+        path, "CoinTether Admin User Report", ADMIN_COLUMNS, rows,
+        total_rows=count_users(db_path), progress=progress, cancelled=cancelled
+    )
+
+
+def write_wallet_report(path, db_path, username, prices, progress=None, cancelled=None):
+    from src.valuation import value_wallet
+    return write_positions_report(path, username, value_wallet(db_path, username, prices), progress, cancelled)
+
+
+@perf.traced("reports.positions_pdf")
+def write_positions_report(path, username, valuation, progress=None, cancelled=None):
+    def rows():
+        for coin, symbol, holdings, usd, inr in valuation.rows():
+            if usd is None:
+                yield coin, symbol, f"{holdings:,.4f}", "N/A", "N/A"
+            else:
+                yield coin, symbol, f"{holdings:,.4f}", f"{usd:,.2f}", f"{inr:,.2f}"
+
+    return write_table_pdf(
+        path, f"{username} Portfolio Report", WALLET_COLUMNS, rows(), progress=progress, cancelled=cancelled,
+        summary=lambda: f"Total: USD {valuation.totals['usd']:,.2f} | INR {valuation.totals['inr']:,.2f}"
+    )
@@ -0,0 +1,140 @@
+# src/schema.py
+
+import sqlite3
+
+# Per-user tables carry an integer user_id that references users(id) with
+# ON DELETE CASCADE, so deleting a users row removes that user's wallets, flags,
+# notes, history and alerts in the same statement, found through the user_id
+# index rather than a scan on the username text.
+#
+# The username column stays (every reader and the exports still use it). On
+# INSERT a trigger fills user_id from the username, so code that only writes
+# usernames still gets linked rows. Tables are created linked (link_new_tables);
+# older databases are upgraded in place by ensure_user_links(), which only the
+# database writer (src/db_writer.py) and `python main.py admin orphans` run, never
+# a read path. Rows whose user no longer exists are kept with a NULL user_id and
+# reported (orphan_counts) rather than deleted; no cascade will ever reach them,
+# so removing them is left to an admin.
+#
+# ensure_schema() creates every table the app reads, with its indexes and
+# version triggers. The database writer runs it once when it connects, so read
+# paths never issue DDL; a window that reads before it has written anything
+# calls db_writer.ready() first.
+#
+# SQLite only enforces the cascade on connections that ran PRAGMA foreign_keys=ON
+# (see connect_with_foreign_keys and db_writer); admin_actions.delete_users
+# removes child rows itself when that is not the case.
+
+USER_TABLES = ["user_wallets", "user_flags", "user_notes", "portfolio_history", "portfolio_history_blocks",
+               "price_alerts", "alert_events"]
+
+
+def connect_with_foreign_keys(db_path, **kwargs):
+    conn = sqlite3.connect(db_path, **kwargs)
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+
+def foreign_keys_enabled(conn):
+    return bool(conn.execute("PRAGMA foreign_keys").fetchone()[0])
+
+
+def unlinked_user_tables(conn):
+    """Per-user tables that exist but do not have their link trigger yet."""
+    objects = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")}
+    if "users" not in objects:
+        return []
+    return [table for table in USER_TABLES if table in objects and f"trg_{table}_link_user" not in objects]
+
+
+def table_exists(conn, table):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone() is not None
+
+
+def link_table(conn, table):
+    """Add user_id (FK, indexed, trigger-filled) to `table` if it does not have one yet.
+
+    Returns how many rows could not be linked because their user is gone.
+    """
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    orphans = 0
+    if "user_id" not in columns:
+        try:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN user_id INTEGER REFERENCES users(id) ON DELETE CASCADE")
+        except sqlite3.OperationalError as e:
+            if "duplicate column" not in str(e):     # another instance got there first
+                raise
+        conn.execute(f"UPDATE {table} SET user_id = (SELECT id FROM users WHERE users.username = {table}.username)")
+        orphans = conn.execute(f"SELECT COUNT(*) FROM {table} WHERE user_id IS NULL").fetchone()[0]
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_user_id ON {table} (user_id)")
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_link_user AFTER INSERT ON {table}
+        WHEN NEW.user_id IS NULL
+        BEGIN
+            UPDATE {table} SET user_id = (SELECT id FROM users WHERE username = NEW.username) WHERE rowid = NEW.rowid;
+        END
+    """)
+    return orphans
+
+
+def ensure_user_links(conn):
+    """Link every per-user table that exists so far. Cheap (one read) once done.
+
+    Returns {table: rows left unlinked} for the tables upgraded now that had orphans.
+    """
+    orphans = {}
+    for table in unlinked_user_tables(conn):
+        count = link_table(conn, table)
+        if count:
+            orphans[table] = count
+    return orphans
+
+
+def link_new_tables(conn, tables):
+    """Link per-user tables the caller has just created; they are empty, so this is not an upgrade."""
+    if table_exists(conn, "users"):
+        for table in tables:
+            link_table(conn, table)
+
+
+def ensure_schema(conn):
+    """Create the app's tables, indexes and triggers if missing. The caller commits."""
+    from src import admin_actions, alerts, history, mail_queue, versions
+    new = [] if table_exists(conn, "user_wallets") else ["user_wallets"]
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            username TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS user_wallets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            coin_name TEXT NOT NULL,
+            symbol TEXT NOT NULL,
+            holdings REAL DEFAULT 0
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_user_wallets_username ON user_wallets (username)")
+    link_new_tables(conn, new)
+    admin_actions.ensure_admin_tables(conn)
+    history.ensure_history_table(conn)
+    history.ensure_price_history_table(conn)
+    alerts.ensure_alert_tables(conn)
+    mail_queue.ensure_mail_table(conn)
+    versions.ensure_versions(conn)
+
+
+def orphan_counts(conn):
+    """{table: rows whose user no longer exists} over the linked per-user tables."""
+    counts = {}
+    for table in USER_TABLES:
+        if table_exists(conn, table) and "user_id" in {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}:
+            count = conn.execute(f"SELECT COUNT(*) FROM {table} WHERE user_id IS NULL").fetchone()[0]
+            if count:
+                counts[table] = count
+    return counts
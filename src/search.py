@@ -0,0 +1,169 @@
+# src/search.py
+
+import re
+import json
+import sqlite3
+
+# Full-text search for the admin dashboard, kept inside the database with FTS5:
+#
+#   users_fts  username, email and name of every user. Trigram tokens, so any
+#              fragment of three or more characters matches ("0123", "gmail").
+#   notes_fts  admin notes. Word tokens with prefix indexes, so "refu" finds
+#              "refund requested" without scanning the notes.
+#
+# Both are external-content tables over users / user_notes, keyed on their
+# INTEGER PRIMARY KEY (never the implicit rowid, which VACUUM may renumber), and
+# triggers keep them in step with every insert, update and delete (cascaded
+# deletes included), so nothing else in the app has to know they exist.
+# search_users() ranks matches with bm25; a username or email hit outranks a hit
+# in a note.
+#
+# Building the index is a write that can take seconds on a large database, so the
+# dashboard runs ensure_search_index() on the database writer from a worker and
+# only checks search_ready() itself. SQLite builds without FTS5 (or without the
+# trigram tokenizer) still work: ensure_search_index() returns False and the
+# dashboard keeps its substring filter.
+
+MIN_FRAGMENT = 3            # trigram needs three characters
+NOTE_WEIGHT = 0.5           # note matches count half as much as profile matches
+RESULT_LIMIT = 5000
+
+_TRIGGERS = {
+    "users": ("users_fts", "id", ["username", "email", "name"]),
+    "user_notes": ("notes_fts", "id", ["note"]),
+}
+
+
+def fts_tables(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE name IN ('users_fts', 'notes_fts')")}
+
+
+def _notes_fts_keyed(conn):
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'notes_fts'").fetchone()
+    return row is not None and "content_rowid='id'" in row[0]
+
+
+def search_ready(conn):
+    """True once both FTS tables exist in their current form; a cheap read."""
+    return fts_tables(conn) == {"users_fts", "notes_fts"} and _notes_fts_keyed(conn)
+
+
+def key_notes_by_id(conn):
+    """Give an older user_notes table (rowid only) an id INTEGER PRIMARY KEY, keeping each note's rowid as its id."""
+    from src import schema
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(user_notes)")]
+    if "id" in columns:
+        return
+    conn.execute("CREATE TABLE user_notes_keyed (id INTEGER PRIMARY KEY, username TEXT, note TEXT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)")
+    conn.execute("INSERT INTO user_notes_keyed (id, username, note, timestamp) SELECT rowid, username, note, timestamp FROM user_notes")
+    conn.execute("DROP TABLE user_notes")
+    conn.execute("ALTER TABLE user_notes_keyed RENAME TO user_notes")
+    schema.link_new_tables(conn, ["user_notes"])
+
+
+def ensure_search_index(conn):
+    """Create, fill and hook up the FTS tables if they are missing or out of date. Returns False without FTS5."""
+    from src.admin_actions import ensure_admin_tables
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if "users" not in tables:
+        return False
+    if search_ready(conn):
+        return True
+    ensure_admin_tables(conn)
+    if "notes_fts" in fts_tables(conn) and not _notes_fts_keyed(conn):
+        # Built on the rowid by an earlier version; rebuilt below on user_notes.id.
+        for event in ("insert", "delete", "update"):
+            conn.execute(f"DROP TRIGGER IF EXISTS trg_notes_fts_{event}")
+        conn.execute("DROP TABLE notes_fts")
+    key_notes_by_id(conn)
+    existing = fts_tables(conn)
+    try:
+        if "users_fts" not in existing:
+            conn.execute("""
+                CREATE VIRTUAL TABLE users_fts USING fts5(
+                    username, email, name, content='users', content_rowid='id', tokenize='trigram'
+                )
+            """)
+            conn.execute("INSERT INTO users_fts (users_fts) VALUES ('rebuild')")
+        if "notes_fts" not in existing:
+            conn.execute("""
+                CREATE VIRTUAL TABLE notes_fts USING fts5(
+                    note, content='user_notes', content_rowid='id', prefix='2 3'
+                )
+            """)
+            conn.execute("INSERT INTO notes_fts (notes_fts) VALUES ('rebuild')")
+    except sqlite3.OperationalError:
+        return False
+    for table, (fts, key, columns) in _TRIGGERS.items():
+        cols = ", ".join(columns)
+        new = ", ".join(f"NEW.{c}" for c in columns)
+        old = ", ".join(f"OLD.{c}" for c in columns)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{fts}_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts} (rowid, {cols}) VALUES (NEW.{key}, {new});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{fts}_delete AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', OLD.{key}, {old});
+            END
+        """)
+        conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{fts}_update AFTER UPDATE OF {cols} ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', OLD.{key}, {old});
+                INSERT INTO {fts} (rowid, {cols}) VALUES (NEW.{key}, {new});
+            END
+        """)
+    return True
+
+
+def fragment_query(text):
+    """The text as one quoted FTS5 string (substring match under trigram)."""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def prefix_query(text):
+    """Every word of the text as a prefix term: 'refund req' -> "refund"* "req"*."""
+    words = re.findall(r"\w+", text)
+    return " ".join('"' + w + '"*' for w in words) if words else None
+
+
+def ranked_rowids(conn, fts, query, limit, weights=""):
+    """[(rowid, score)] for a MATCH, best first.
+
+    Ranking has to score every match, which is slow for a word that is in half of
+    all notes and says little anyway. So the newest limit+1 matches are fetched in
+    rowid order first (FTS5 stops early there); only when that is the whole match
+    set are they ranked with bm25, otherwise the newest ones are returned unranked.
+    """
+    rowids = [row[0] for row in conn.execute(
+        f"SELECT rowid FROM {fts} WHERE {fts} MATCH ? ORDER BY rowid DESC LIMIT ?", (query, limit + 1)
+    )]
+    if len(rowids) > limit:
+        return [(rowid, 0.0) for rowid in rowids[:limit]]
+    return conn.execute(
+        f"SELECT rowid, bm25({fts}{weights}) AS score FROM {fts} WHERE {fts} MATCH ? ORDER BY score", (query,)
+    ).fetchall()
+
+
+def search_users(conn, text, limit=RESULT_LIMIT):
+    """[(username, score)] best first, or None when the index cannot answer (too short, no FTS5)."""
+    text = text.strip()
+    if len(text) < MIN_FRAGMENT or not search_ready(conn):
+        return None
+    scores = {}
+    users = ranked_rowids(conn, "users_fts", fragment_query(text), limit, ", 10.0, 5.0, 1.0")
+    notes = ranked_rowids(conn, "notes_fts", prefix_query(text), limit) if prefix_query(text) else []
+    for source, key, matches, weight in [("users", "id", users, 1.0), ("user_notes", "id", notes, NOTE_WEIGHT)]:
+        if not matches:
+            continue
+        score_of = dict(matches)
+        rows = conn.execute(
+            f"SELECT {key}, username FROM {source} WHERE {key} IN (SELECT value FROM json_each(?))",
+            (json.dumps(list(score_of)),)
+        )
+        for rowid, username in rows:
+            score = score_of[rowid] * weight
+            if username not in scores or score < scores[username]:
+                scores[username] = score
+    return sorted(scores.items(), key=lambda item: item[1])[:limit]
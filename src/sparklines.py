@@ -0,0 +1,87 @@
+# src/sparklines.py
+
+import os
+import time
+import sqlite3
+from array import array
+
+# 7-day price series that CoinGecko's /coins/markets returns alongside the price
+# (sparkline=true, ~168 hourly points per coin). fetch_upstream() stores them here
+# as one float32 blob per symbol (~670 bytes), in a small SQLite file shared by the
+# GUI, the CLI and the price daemon, so whichever process fetched prices last has
+# also refreshed the trends. The dashboard draws them with SparklineDelegate.
+
+sparklines_path = os.environ.get(
+    "COINTETHER_SPARKLINE_DB", os.path.join(os.path.dirname(__file__), 'sparklines.db')
+)
+
+
+def pack(points):
+    return array('f', points).tobytes()
+
+
+def unpack(blob):
+    points = array('f')
+    points.frombytes(blob)
+    return points
+
+
+def connect(path=None):
+    conn = sqlite3.connect(path or sparklines_path, timeout=5)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sparklines (
+            symbol TEXT PRIMARY KEY,
+            updated_at REAL NOT NULL,
+            points BLOB NOT NULL
+        )
+    """)
+    return conn
+
+
+def store(series, path=None, now=None):
+    """Save {SYMBOL: [price, ...]}; empty series are skipped and unchanged ones keep their updated_at."""
+    now = now or time.time()
+    rows = [(symbol.upper(), now, pack(points)) for symbol, points in series.items() if points]
+    if not rows:
+        return 0
+    conn = connect(path)
+    try:
+        conn.executemany(
+            "INSERT INTO sparklines (symbol, updated_at, points) VALUES (?, ?, ?) "
+            "ON CONFLICT(symbol) DO UPDATE SET updated_at = excluded.updated_at, points = excluded.points "
+            "WHERE points != excluded.points", rows
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return len(rows)
+
+
+def load(symbols, path=None, since=None):
+    """{SYMBOL: (updated_at, float32 array)} for the symbols that have a series
+    (only those changed after `since`, when given)."""
+    symbols = sorted({s.upper() for s in symbols})
+    if not symbols or not os.path.exists(path or sparklines_path):
+        return {}
+    try:
+        conn = connect(path)
+    except sqlite3.Error:
+        return {}
+    try:
+        rows = conn.execute(
+            f"SELECT symbol, updated_at, points FROM sparklines WHERE symbol IN ({','.join('?' * len(symbols))})"
+            + (" AND updated_at > ?" if since is not None else ""), symbols + ([since] if since is not None else [])
+        ).fetchall()
+    except sqlite3.Error:
+        return {}
+    finally:
+        conn.close()
+    return {symbol: (updated_at, unpack(points)) for symbol, updated_at, points in rows}
+
+
+def change(points):
+    """Fractional change over the series, or None if it is too short or starts at zero."""
+    if len(points) < 2 or not points[0]:
+        return None
+    return points[-1] / points[0] - 1
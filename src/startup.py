@@ -0,0 +1,119 @@
+# src/startup.py
+
+import builtins
+import importlib
+import os
+import sys
+import threading
+import time
+
+# Heavy modules the dashboards need sooner or later. They are imported in a
+# background thread once the welcome window has painted, so the first click on
+# "Login" does not stall on matplotlib.
+WARM_MODULES = [
+    "requests",
+    "src.price_fetcher",
+    "src.login",
+    "src.register",
+    "src.admin_login",
+    "src.dashboard",
+    "src.admin_dashboard",
+    "src.reports",
+    "numpy",
+    "matplotlib.figure",
+    "matplotlib.backends.backend_qt5agg",
+]
+
+PROFILE_FLAG = "--profile-startup"
+
+
+def profiling_requested(argv=None):
+    argv = sys.argv if argv is None else argv
+    return PROFILE_FLAG in argv or os.environ.get("COINTETHER_PROFILE_STARTUP") == "1"
+
+
+def warm_up_enabled():
+    return os.environ.get("COINTETHER_WARM_IMPORTS", "1") != "0"
+
+
+class ImportProfiler:
+    """Times every first-time import by wrapping builtins.__import__.
+
+    Each record holds the cumulative time (including nested imports) and the
+    self time (excluding them), like `python -X importtime`, but it also works
+    inside the frozen PyInstaller build where interpreter flags are not available.
+    """
+
+    def __init__(self):
+        self.records = []
+        self._stack = []
+        self._lock = threading.Lock()
+        self._original_import = None
+        self.started_at = time.perf_counter()
+        self.marks = []
+
+    def start(self):
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def stop(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def mark(self, label):
+        self.marks.append((label, time.perf_counter() - self.started_at))
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # Relative and already-loaded imports are dictionary lookups; only time real loads.
+        if level or name in sys.modules or threading.current_thread() is not threading.main_thread():
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        children = [0.0]
+        self._stack.append(children)
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1][0] += elapsed
+            with self._lock:
+                self.records.append((name, elapsed, elapsed - children[0], len(self._stack)))
+
+    def report(self, limit=30):
+        lines = ["CoinTether startup profile", ""]
+        for label, at in self.marks:
+            lines.append(f"{label:<40} {at * 1000:>9.1f} ms")
+        lines.append("")
+        lines.append(f"{'module':<40} {'cumulative':>12} {'self':>10}")
+        lines.append("-" * 64)
+        for name, cumulative, self_time, depth in sorted(self.records, key=lambda r: r[1], reverse=True)[:limit]:
+            lines.append(f"{name:<40} {cumulative * 1000:>9.1f} ms {self_time * 1000:>7.1f} ms")
+        return "\n".join(lines)
+
+    def write_report(self):
+        text = self.report()
+        # The windowed (console=False) build has no stderr, so fall back to a file.
+        if sys.stderr is not None:
+            print(text, file=sys.stderr)
+        else:
+            path = os.path.join(os.path.expanduser("~"), "cointether_startup_profile.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+
+
+def _warm(modules):
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            # A module that fails here will fail again, visibly, when its screen opens.
+            continue
+
+
+def warm_up_in_background(modules=None):
+    thread = threading.Thread(target=_warm, args=(modules or WARM_MODULES,), name="import-warmup", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,88 @@
+# src/store.py
+
+from src import perf
+
+# A small reactive store for derived data.
+#
+#   store = Store()
+#   store.set("prices", prices)                      # a source; its version goes up
+#   store.derive("totals", lambda s: value_positions(s.get("holdings"), s.get("prices")).totals)
+#   store.get("totals")                              # computed, remembering what it read
+#   store.get("totals")                              # same versions: the memo, no work
+#
+# Sources are plain values with a version counter. Derived values are functions of
+# the store; while one computes, every get() it makes is recorded with the version
+# it saw, and the result is kept until one of those versions moves. Checking is a
+# few dict lookups per dependency, so asking again after a refresh that changed
+# nothing is almost free, and changing one source recomputes only what read it.
+# A recomputed value equal to the old one keeps its version, so whatever was
+# derived from it stays valid too.
+#
+# Keys are names or tuples starting with a name: get(("summary", "alice")) calls
+# the "summary" function with "alice". A store is not thread-safe; give each
+# owner its own (or a lock, as src/api_server.py does around UserValueCache).
+
+
+class Store:
+    def __init__(self):
+        self._values = {}       # key -> current value, sources and memoized derived values
+        self._versions = {}     # key -> version
+        self._derived = {}      # name -> fn(store, *args)
+        self._reads = {}        # derived key -> {key: version it read}
+        self._tracking = []     # read sets of the derived values being computed
+
+    def set(self, key, value):
+        self._values[key] = value
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+    def update(self, key, value):
+        """set() unless `value` equals the stored one; returns True when it changed."""
+        if key in self._values and _same(self._values[key], value):
+            return False
+        self.set(key, value)
+        return True
+
+    def derive(self, name, fn):
+        self._derived[name] = fn
+        for key in [k for k in self._reads if _name(k) == name]:
+            del self._reads[key]
+
+    def version(self, key):
+        """Version of `key`, bringing it up to date first if it is derived."""
+        if _name(key) in self._derived:
+            self._refresh(key)
+        return self._versions.get(key, 0)
+
+    def get(self, key, default=None):
+        version = self.version(key)
+        if self._tracking:
+            self._tracking[-1][key] = version
+        return self._values.get(key, default)
+
+    def _refresh(self, key):
+        reads = self._reads.get(key)
+        if reads is not None and all(self.version(k) == v for k, v in reads.items()):
+            return
+        name = _name(key)
+        args = key[1:] if isinstance(key, tuple) else ()
+        self._tracking.append({})
+        try:
+            with perf.span("derive." + name):
+                value = self._derived[name](self, *args)
+        finally:
+            reads = self._tracking.pop()
+        self._reads[key] = reads
+        self.update(key, value)
+
+
+def _name(key):
+    return key[0] if isinstance(key, tuple) else key
+
+
+def _same(a, b):
+    if a is b:
+        return True
+    try:
+        return bool(a == b)
+    except (TypeError, ValueError):     # e.g. NumPy arrays compare element-wise
+        return False
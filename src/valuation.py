@@ -0,0 +1,232 @@
+# src/valuation.py
+
+import sqlite3
+
+# One valuation pass for every view. Positions go in as parallel arrays, prices
+# are looked up once per distinct symbol, and values, weights and totals for every
+# currency come out of a handful of NumPy operations. The dashboard, the pie chart,
+# email/PDF reports and the batch job all read their numbers from a Valuation, so
+# a portfolio has the same total wherever it is shown.
+
+CURRENCIES = ("usd", "inr")
+
+
+class Valuation:
+    """Values of a book of positions against a price snapshot.
+
+    Attributes (arrays are aligned with the input positions):
+      coins, symbols      - display names and symbols as given
+      holdings            - float64 array
+      prices[cur]         - unit price per position, NaN where the coin is unpriced
+      values[cur]         - holdings * price, NaN where unpriced
+      priced              - bool array, True where every currency has a price
+      totals[cur]         - sum over priced positions
+      weights             - share of the USD total per position (0 where unpriced)
+    """
+
+    def __init__(self, coins, symbols, holdings, prices, currencies=CURRENCIES):
+        import numpy as np
+        self.coins = list(coins)
+        self.symbols = list(symbols)
+        self.holdings = np.asarray(holdings, dtype=np.float64)
+        self.currencies = currencies
+
+        # Price lookups happen per distinct symbol, not per position.
+        keys, codes = _factorize(self.symbols)
+        self.prices, self.values = {}, {}
+        for cur in currencies:
+            unit = np.array([_price(prices.get(key.upper()), cur) for key in keys], dtype=np.float64)
+            self.prices[cur] = unit[codes]
+            self.values[cur] = self.holdings * self.prices[cur]
+        self._summarise()
+
+    def _summarise(self):
+        import numpy as np
+        self.priced = np.ones(len(self.holdings), dtype=bool)
+        for cur in self.currencies:
+            self.priced &= ~np.isnan(self.values[cur])
+        self.totals = {cur: float(self.values[cur][self.priced].sum()) for cur in self.currencies}
+        base = self.currencies[0]
+        usd = np.where(self.priced, self.values[base], 0.0)
+        self.weights = usd / self.totals[base] if self.totals[base] else np.zeros_like(usd)
+
+    def __len__(self):
+        return len(self.holdings)
+
+    def rows(self, start=0, stop=None):
+        """Yield (coin, symbol, holdings, usd, inr, ...) with None values for unpriced coins."""
+        stop = len(self) if stop is None else stop
+        columns = [self.values[cur][start:stop].tolist() for cur in self.currencies]
+        priced = self.priced[start:stop].tolist()
+        for i, (coin, symbol, holdings) in enumerate(zip(self.coins[start:stop], self.symbols[start:stop], self.holdings[start:stop].tolist())):
+            if priced[i]:
+                yield (coin, symbol, holdings) + tuple(col[i] for col in columns)
+            else:
+                yield (coin, symbol, holdings) + (None,) * len(columns)
+
+    def slice(self, start, stop):
+        """Valuation of positions[start:stop], sharing this snapshot's prices."""
+        part = Valuation.__new__(Valuation)
+        part.coins, part.symbols = self.coins[start:stop], self.symbols[start:stop]
+        part.holdings, part.currencies = self.holdings[start:stop], self.currencies
+        part.prices = {cur: a[start:stop] for cur, a in self.prices.items()}
+        part.values = {cur: a[start:stop] for cur, a in self.values.items()}
+        part._summarise()
+        return part
+
+    def allocation(self, by="coin"):
+        """[(label, {cur: value}, weight)] summed per coin name (or symbol), priced positions only."""
+        import numpy as np
+        labels = self.coins if by == "coin" else [s.upper() for s in self.symbols]
+        keep = np.flatnonzero(self.priced)
+        if not len(keep):
+            return []
+        # Labels come out in the order they first appear in the book.
+        keys, codes = _factorize([labels[i] for i in keep])
+        sums = {cur: np.bincount(codes, weights=self.values[cur][keep], minlength=len(keys)) for cur in self.currencies}
+        weights = np.bincount(codes, weights=self.weights[keep], minlength=len(keys))
+        return [(key, {cur: float(sums[cur][k]) for cur in self.currencies}, float(weights[k])) for k, key in enumerate(keys)]
+
+
+def _factorize(labels):
+    """(distinct labels in first-seen order, int codes mapping each label to its index)."""
+    import numpy as np
+    index = dict.fromkeys(labels)
+    for i, key in enumerate(index):
+        index[key] = i
+    return list(index), np.fromiter(map(index.__getitem__, labels), dtype=np.intp, count=len(labels))
+
+
+def _price(entry, currency):
+    try:
+        return float(entry[currency])
+    except (KeyError, TypeError, ValueError):
+        return float("nan")
+
+
+def value_positions(positions, prices):
+    """Valuation of (coin, symbol, holdings) tuples or of a {id: (coin, symbol, holdings)} dict."""
+    if isinstance(positions, dict):
+        positions = positions.values()
+    positions = list(positions)
+    return Valuation([p[0] for p in positions], [p[1] for p in positions], [p[2] for p in positions], prices)
+
+
+def value_wallet(db_path, username, prices):
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT coin_name, symbol, holdings FROM user_wallets WHERE username = ? ORDER BY id", (username,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return value_positions(rows, prices)
+
+
+def wallet_symbols(db_path):
+    """Every distinct symbol held by any user, upper-cased."""
+    conn = sqlite3.connect(db_path)
+    try:
+        return sorted({row[0].upper() for row in conn.execute("SELECT DISTINCT symbol FROM user_wallets")})
+    finally:
+        conn.close()
+
+
+def user_market_values(conn, prices, currencies=CURRENCIES):
+    """{username: {"usd": value, "inr": value}} for every user with priced holdings.
+
+    SQLite sums holdings per (user, symbol) in one grouped query; prices are looked
+    up once per distinct symbol and the per-user totals are a bincount of
+    holdings * price over the factorized usernames.
+    """
+    import numpy as np
+    rows = conn.execute(
+        "SELECT username, UPPER(symbol), SUM(holdings) FROM user_wallets GROUP BY username, UPPER(symbol)"
+    ).fetchall()
+    users, user_codes = _factorize([r[0] for r in rows])
+    symbols, symbol_codes = _factorize([r[1] for r in rows])
+    holdings = np.array([r[2] for r in rows], dtype=np.float64)
+    values = {}
+    for cur in currencies:
+        unit = np.array([_price(prices.get(symbol), cur) for symbol in symbols], dtype=np.float64)
+        values[cur] = holdings * unit[symbol_codes]
+    priced = np.ones(len(rows), dtype=bool)
+    for cur in currencies:
+        priced &= ~np.isnan(values[cur])
+    codes = user_codes[priced]
+    sums = {cur: np.bincount(codes, weights=values[cur][priced], minlength=len(users)) for cur in currencies}
+    has_priced = np.bincount(codes, minlength=len(users)) > 0
+    return {user: {cur: float(sums[cur][k]) for cur in currencies} for k, user in enumerate(users) if has_priced[k]}
+
+
+def fx_quotes(prices, fx):
+    """{SYMBOL: {cur: price}} from each coin's USD price and {cur: units per USD}; unpriced coins are left out."""
+    quotes = {}
+    for symbol, entry in prices.items():
+        usd = _price(entry, "usd")
+        if usd == usd:
+            quotes[symbol] = {cur: usd * rate for cur, rate in fx.items()}
+    return quotes
+
+
+def add_quotes(store, prices=None, fx=None):
+    """Give a Store (src/store.py) "prices" and "fx" sources and the "quotes" derived from them."""
+    from src.price_fetcher import INR_PER_USD
+    store.set("prices", dict(prices or {}))
+    store.set("fx", dict(fx or {"usd": 1.0, "inr": float(INR_PER_USD)}))
+    store.derive("quotes", lambda s: fx_quotes(s.get("prices"), s.get("fx")))
+    return store
+
+
+def portfolio_store(positions=None, prices=None, fx=None):
+    """Store over one portfolio: "holdings", "prices" and "fx" sources, and derived
+    "quotes", "valuation", "totals" and "allocation", each recomputed only when
+    something it reads has changed."""
+    from src.store import Store
+    store = add_quotes(Store(), prices, fx)
+    store.set("holdings", dict(positions or {}))
+    store.derive("valuation", lambda s: value_positions(s.get("holdings"), s.get("quotes")))
+    store.derive("totals", lambda s: s.get("valuation").totals)
+    store.derive("allocation", lambda s: s.get("valuation").allocation())
+    return store
+
+
+class UserValueCache:
+    """Per-user market values, recomputed only when holdings or prices change.
+
+    A portfolio-style Store whose holdings source is the user_wallets counter in
+    data_versions (see src/versions.py), so any process writing wallets is noticed.
+    Until that counter and its triggers exist (the database writer's schema
+    setup creates them) every call recomputes.
+    """
+
+    def __init__(self, db_path):
+        from src.store import Store
+        self.db_path = db_path
+        self.versioned = False
+        self.store = add_quotes(Store())
+        self.store.derive("user_values", self._user_values)
+
+    def _user_values(self, store):
+        store.get("wallets_version")
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return user_market_values(conn, store.get("quotes"))
+        finally:
+            conn.close()
+
+    def get(self, prices):
+        from src.versions import get_version, is_tracked
+        conn = sqlite3.connect(self.db_path)
+        try:
+            if not self.versioned:
+                self.versioned = is_tracked(conn, "user_wallets")
+            if self.versioned:
+                self.store.update("wallets_version", get_version(conn, "user_wallets"))
+            else:
+                self.store.set("wallets_version", None)     # untracked: always a new version
+        finally:
+            conn.close()
+        # Copied, entries too: callers update their price dict in place.
+        self.store.update("prices", {symbol: dict(entry) for symbol, entry in prices.items()})
+        return self.store.get("user_values")
@@ -8,10 +8,6 @@ from PyQt5.QtCore import Qt
 import os
 import sys
 
-from src.login import UserLoginScreen
-from src.register import RegisterScreen
-from src.admin_login import AdminLoginScreen
-
 class WelcomeScreen(QWidget):
     def __init__(self):
         super().__init__()
@@ -76,16 +72,19 @@ class WelcomeScreen(QWidget):
         """)
 
     def redirect_to_login(self):
+        from src.login import UserLoginScreen
         self.login = UserLoginScreen()
         self.login.show()
         self.close()
 
     def redirect_to_register(self):
+        from src.register import RegisterScreen
         self.register = RegisterScreen()
         self.register.show()
         self.close()
 
     def redirect_to_admin_login(self):
+        from src.admin_login import AdminLoginScreen
         self.admin = AdminLoginScreen()
         self.admin.show()
         self.close()
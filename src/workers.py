@@ -0,0 +1,95 @@
+# src/workers.py
+
+from PyQt5.QtWidgets import QProgressDialog, QMessageBox
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+
+
+class FunctionWorker(QThread):
+    """Runs `func(*args)` off the GUI thread and hands its return value back as a signal.
+
+    Owners must keep a reference to the worker until `finished` fires, otherwise
+    Qt destroys the thread object while it is still running.
+    """
+    result = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, func, *args, parent=None):
+        super().__init__(parent)
+        self.func = func
+        self.args = args
+
+    def run(self):
+        try:
+            self.result.emit(self.func(*self.args))
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
+class ProgressWorker(QThread):
+    """Like FunctionWorker, for long jobs that report progress and can be cancelled.
+
+    `func` is called as func(*args, progress=..., cancelled=...), where progress(done, total)
+    forwards to the `progress` signal and cancelled() turns True once cancel() is called.
+    """
+    progress = pyqtSignal(int, int)
+    result = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, func, *args, parent=None):
+        super().__init__(parent)
+        self.func = func
+        self.args = args
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def run(self):
+        try:
+            self.result.emit(self.func(*self.args, progress=self.progress.emit, cancelled=self.is_cancelled))
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
+# Workers are kept alive here until they finish, so closing the dialog that
+# started one does not destroy a QThread that is still running.
+_active = set()
+
+
+def start_worker(worker):
+    _active.add(worker)
+    worker.finished.connect(lambda: _active.discard(worker))
+    worker.start()
+    return worker
+
+
+def run_with_progress(parent, label, worker, on_result):
+    """Start a ProgressWorker behind a cancellable progress dialog; the GUI stays responsive."""
+    dialog = QProgressDialog(label, "Cancel", 0, 0, parent)
+    dialog.setWindowModality(Qt.WindowModal)
+    dialog.setMinimumDuration(300)
+
+    def on_progress(done, total):
+        if total:
+            dialog.setMaximum(total)
+            dialog.setValue(min(done, total - 1))
+        else:
+            dialog.setLabelText(f"{label} ({done:,} rows)")
+
+    def on_failed(error):
+        dialog.reset()
+        if not worker.is_cancelled():
+            QMessageBox.critical(parent, "Error", error)
+
+    def on_done(result):
+        dialog.reset()
+        on_result(result)
+
+    worker.progress.connect(on_progress)
+    worker.result.connect(on_done)
+    worker.failed.connect(on_failed)
+    dialog.canceled.connect(worker.cancel)
+    return start_worker(worker)